@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+FetiiAI HTTP API Server
+Serves one shared in-memory dataset to many concurrent clients over HTTP/1.1 keep-alive.
+
+    python api_server.py --data FetiiAI_Data_Austin.xlsx --port 8000
+    python api_server.py --data FetiiAI_Data_Austin.xlsx --workers 4   # one loader, 4 forked workers
+
+Endpoints (JSON responses):
+    GET  /health
+    GET  /summary
+    GET  /analyze/<group_size|hourly|daily|age|monthly>?age_group=&day_of_week=&time_period=
+    GET  /destinations/search?q=<term>&limit=10
+    GET  /destinations/stats?destination=<name>&time_period=
+    GET  /riders/<user_id>
+    GET  /export/<csv|xlsx|parquet>?compress=&start=&end=&min_group_size=&max_group_size=&sort_by=&descending=
+    POST /ask  {"question": "..."}
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+import pandas as pd
+
+from data_processor import FetiiDataProcessor
+from events import LoggingSink
+from exports import EXPORT_FORMATS, export_to_file, export_file_name, export_mime, parquet_available
+
+logger = logging.getLogger("fetii.api")
+
+# Analysis endpoints and the filters each helper understands
+ANALYSES = {
+    "group_size": ("analyze_group_size_patterns", {"age_group", "day_of_week", "time_period"}),
+    "hourly": ("analyze_hourly_patterns", {"age_group", "day_of_week"}),
+    "daily": ("analyze_day_of_week_patterns", {"age_group", "time_period"}),
+    "age": ("analyze_age_group_correlations", {"day_of_week", "time_period"}),
+    "monthly": ("analyze_monthly_trends", {"age_group", "day_of_week"})
+}
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 1024 * 1024
+# Exports are sent from their temporary file in blocks of this size
+EXPORT_SEND_BYTES = 256 * 1024
+
+
+class HttpError(Exception):
+    """Error carrying the HTTP status to send back"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class FileResponse:
+    """Response body sent from an open file, which is closed once sent"""
+
+    def __init__(self, file, content_type: str, file_name: str):
+        self.file = file
+        self.content_type = content_type
+        self.file_name = file_name
+
+
+def to_jsonable(value: Any) -> Any:
+    """Convert pandas/numpy results into plain JSON types"""
+    if isinstance(value, pd.DataFrame):
+        return [to_jsonable(row) for row in value.to_dict("records")]
+    if isinstance(value, pd.Series):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {str(to_jsonable(k)): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [to_jsonable(v) for v in value]
+    return value
+
+
+class ApiServer:
+    """Async HTTP front end over a shared FetiiDataProcessor (and optional FetiiChatbot)"""
+
+    def __init__(self, data_processor: FetiiDataProcessor, chatbot=None, max_workers: int = None,
+                 keepalive_timeout: float = 15.0):
+        self.data_processor = data_processor
+        self.chatbot = chatbot
+        self.keepalive_timeout = keepalive_timeout
+        # pandas work runs off the event loop so slow queries don't stall other connections
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count())
+        self.server = None
+        self._connections = set()
+
+    async def start(self, host: str = "0.0.0.0", port: int = 8000, reuse_port: bool = False):
+        """Start listening; returns the asyncio server"""
+        self.server = await asyncio.start_server(
+            self._handle_connection, host, port, limit=MAX_HEADER_BYTES, reuse_port=reuse_port or None
+        )
+        return self.server
+
+    async def serve_forever(self, host: str = "0.0.0.0", port: int = 8000, reuse_port: bool = False):
+        """Start listening and serve until cancelled"""
+        server = await self.start(host, port, reuse_port)
+        logger.info("Serving on %s", ", ".join(str(sock.getsockname()) for sock in server.sockets))
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        """Stop accepting connections and release worker threads"""
+        if self.server is not None:
+            self.server.close()
+            # Idle keep-alive connections would otherwise hold wait_closed() open
+            for task in list(self._connections):
+                task.cancel()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=False)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on one connection until the client closes it or it idles out"""
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._write_response(writer, 413, {"error": "Headers too large"}, keep_alive=False)
+                    break
+
+                keep_alive = False
+                try:
+                    method, target, version, headers = self._parse_head(head)
+                    keep_alive = self._wants_keep_alive(version, headers)
+                    body = await self._read_body(reader, headers)
+                    status, payload = await self._dispatch(method, target, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": e.message}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    logger.exception("Unhandled error")
+                    status, payload = 500, {"error": str(e)}
+
+                await self._write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    @staticmethod
+    def _parse_head(head: bytes) -> Tuple[str, str, str, Dict[str, str]]:
+        """Parse the request line and headers"""
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HttpError(400, "Malformed request line")
+
+        headers = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return method.upper(), target, version.upper(), headers
+
+    @staticmethod
+    def _wants_keep_alive(version: str, headers: Dict[str, str]) -> bool:
+        """HTTP/1.1 keeps connections open unless asked not to; HTTP/1.0 only on request"""
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    @staticmethod
+    async def _read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+        """Read a Content-Length delimited body"""
+        length = headers.get("content-length")
+        if not length:
+            return b""
+        try:
+            length = int(length)
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length")
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "Request body too large")
+        return await reader.readexactly(length)
+
+    async def _write_response(self, writer: asyncio.StreamWriter, status: int, payload: Any, keep_alive: bool):
+        """Send a JSON response, or stream a FileResponse"""
+        if isinstance(payload, FileResponse):
+            await self._write_file(writer, status, payload, keep_alive)
+            return
+        body = json.dumps(payload, default=str).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n"
+        ).encode("latin-1")
+        writer.write(head + body)
+        await writer.drain()
+
+    async def _write_file(self, writer: asyncio.StreamWriter, status: int, response: FileResponse, keep_alive: bool):
+        """Send a file block by block, so only one block of it is ever in memory"""
+        try:
+            size = os.fstat(response.file.fileno()).st_size
+            head = (
+                f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}\r\n"
+                f"Content-Type: {response.content_type}\r\n"
+                f"Content-Disposition: attachment; filename=\"{response.file_name}\"\r\n"
+                f"Content-Length: {size}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                f"\r\n"
+            ).encode("latin-1")
+            writer.write(head)
+            while True:
+                block = await self._run(response.file.read, EXPORT_SEND_BYTES)
+                if not block:
+                    break
+                writer.write(block)
+                await writer.drain()
+        finally:
+            response.file.close()
+
+    async def _run(self, func, *args):
+        """Run blocking analytics work on the worker pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, Any]:
+        """Route a request to its handler"""
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if path == "/ask":
+            if method != "POST":
+                raise HttpError(405, "Use POST for /ask")
+            return 200, await self._run(self._ask, body)
+
+        if method != "GET":
+            raise HttpError(405, f"Use GET for {path}")
+
+        if path == "/health":
+            return 200, {"status": "ok", "trips": self._trip_count(), "data_version": self.data_processor.data_version}
+        if path == "/summary":
+            return 200, await self._run(lambda: to_jsonable(self.data_processor.get_data_summary()))
+        if path.startswith("/analyze/"):
+            return 200, await self._run(self._analyze, path[len("/analyze/"):], params)
+        if path == "/destinations/search":
+            return 200, await self._run(self._search_destinations, params)
+        if path == "/destinations/stats":
+            return 200, await self._run(self._destination_stats, params)
+        if path.startswith("/riders/"):
+            return 200, await self._run(self._rider_profile, path[len("/riders/"):])
+        if path.startswith("/export/"):
+            return 200, await self._run(self._export, path[len("/export/"):], params)
+        raise HttpError(404, f"No route for {path}")
+
+    def _trip_count(self) -> int:
+        trips = self.data_processor.trips_data
+        return 0 if trips is None else len(trips)
+
+    def _require_data(self):
+        if self.data_processor.trips_data is None:
+            raise HttpError(503, "No data loaded")
+
+    def _analyze(self, kind: str, params: Dict[str, str]) -> Dict[str, Any]:
+        """Run one of the analysis helpers with query-string filters"""
+        self._require_data()
+        if kind not in ANALYSES:
+            raise HttpError(404, f"Unknown analysis {kind!r}; expected one of {sorted(ANALYSES)}")
+        method_name, allowed = ANALYSES[kind]
+        unknown = set(params) - allowed
+        if unknown:
+            raise HttpError(400, f"Unsupported filters {sorted(unknown)} for {kind}")
+        return to_jsonable(getattr(self.data_processor, method_name)(params or None))
+
+    def _search_destinations(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """Destination name search"""
+        self._require_data()
+        term = params.get("q")
+        if not term:
+            raise HttpError(400, "Missing query parameter 'q'")
+        limit = self._int_param(params, "limit", 10)
+        return {"query": term, "matches": self.data_processor.search_similar_destinations(term, limit)}
+
+    def _destination_stats(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """Statistics for one destination"""
+        self._require_data()
+        destination = params.get("destination")
+        if not destination:
+            raise HttpError(400, "Missing query parameter 'destination'")
+        return to_jsonable(self.data_processor.get_destination_stats(destination, params.get("time_period")))
+
+    def _rider_profile(self, user_id: str) -> Dict[str, Any]:
+        """Profile for one rider"""
+        self._require_data()
+        profile = self.data_processor.get_rider_profiles().lookup(user_id)
+        if profile is None:
+            raise HttpError(404, f"No trips found for rider {user_id}")
+        return to_jsonable(profile)
+
+    def _export(self, fmt: str, params: Dict[str, str]) -> FileResponse:
+        """Trips export written to a temporary file; query parameters select and sort rows like the Data Explorer"""
+        self._require_data()
+        if fmt not in EXPORT_FORMATS:
+            raise HttpError(404, f"Unknown export format {fmt!r}; expected one of {sorted(EXPORT_FORMATS)}")
+        if fmt == "parquet" and not parquet_available():
+            raise HttpError(503, "Parquet export needs pyarrow")
+        compress = params.get("compress", "0").lower() in ("1", "true", "yes")
+
+        query = {}
+        try:
+            for bound in ("start", "end"):
+                if params.get(bound):
+                    query[bound] = pd.Timestamp(params[bound])
+        except ValueError:
+            raise HttpError(400, "Query parameters 'start' and 'end' must be dates")
+        if "min_group_size" in params or "max_group_size" in params:
+            query["filters"] = {"group_size": (self._int_param(params, "min_group_size", None),
+                                               self._int_param(params, "max_group_size", None))}
+        if params.get("sort_by"):
+            if params["sort_by"] not in self.data_processor.trips_data.columns:
+                raise HttpError(400, f"Unknown sort column {params['sort_by']!r}")
+            query["sort_by"] = params["sort_by"]
+            query["ascending"] = params.get("descending", "0").lower() not in ("1", "true", "yes")
+
+        sheets = {"Trips": self.data_processor.trips_data}
+        rows = None
+        if query:
+            rows = self.data_processor.query_trip_rows(**query)
+        elif self.data_processor.users_data is not None:
+            sheets["Users"] = self.data_processor.users_data
+        if rows is not None:
+            stem = "filtered_fetii_data"
+        else:
+            stem = "fetii_data" if fmt == "xlsx" else "fetii_trips_data"
+        return FileResponse(export_to_file(fmt, sheets, rows, compress),
+                            export_mime(fmt, compress), export_file_name(stem, fmt, compress))
+
+    def _ask(self, body: bytes) -> Dict[str, Any]:
+        """Answer a natural-language question through the chatbot"""
+        if self.chatbot is None:
+            raise HttpError(503, "Question answering is unavailable: no OpenAI API key configured")
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError:
+            raise HttpError(400, "Body must be JSON")
+        question = request.get("question") if isinstance(request, dict) else None
+        if not question or not isinstance(question, str):
+            raise HttpError(400, "Missing 'question'")
+
+        response = self.chatbot.process_question(question)
+        data = response.get("data")
+        visualization = response.get("visualization")
+        return {
+            "question": question,
+            "answer": response.get("answer"),
+            "answered_by": response.get("answered_by", "llm"),
+            "confidence": response.get("confidence"),
+            "records": 0 if data is None else len(data),
+            "data": to_jsonable(data.head(50)) if data is not None else None,
+            "visualization": json.loads(visualization) if visualization is not None else None
+        }
+
+    @staticmethod
+    def _int_param(params: Dict[str, str], name: str, default: Optional[int]) -> Optional[int]:
+        if name not in params:
+            return default
+        try:
+            return int(params[name])
+        except ValueError:
+            raise HttpError(400, f"Query parameter '{name}' must be an integer")
+
+
+def build_engine(data_file: str, api_key: Optional[str], store: Optional[str] = None):
+    """Load the dataset (or map a trip store) and return (data_processor, chatbot or None)"""
+    sink = LoggingSink()
+    chatbot = None
+    if api_key:
+        from chatbot import FetiiChatbot
+        chatbot = FetiiChatbot(api_key, sink=sink)
+        data_processor = chatbot.data_processor
+    else:
+        logger.warning("No OpenAI API key found; /ask will return 503")
+        data_processor = FetiiDataProcessor(sink)
+
+    if store:
+        if not data_processor.load_store(store):
+            raise SystemExit(f"Could not open trip store {store}")
+    elif not data_processor.load_data(data_file=data_file):
+        raise SystemExit(f"Could not load data from {data_file}")
+    return data_processor, chatbot
+
+
+def serve_workers(args, api_key: Optional[str]) -> None:
+    """Parse the data once into a trip store, then fork workers that map it and share one port"""
+    store = args.store or tempfile.mkdtemp(prefix="fetii-store-")
+    loader = FetiiDataProcessor(LoggingSink())
+    if not loader.load_data(data_file=args.data):
+        raise SystemExit(f"Could not load data from {args.data}")
+    loader.save_store(store)
+    # Drop the heap copy before forking so workers only hold the mapped pages
+    del loader
+
+    children = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                data_processor, chatbot = build_engine(args.data, api_key, store=store)
+                server = ApiServer(data_processor, chatbot, max_workers=args.threads)
+                asyncio.run(server.serve_forever(args.host, args.port, reuse_port=True))
+            except KeyboardInterrupt:
+                pass
+            except BaseException:
+                logger.exception("Worker %s failed", os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        children.append(pid)
+    logger.info("Started %s workers on port %s sharing %s", len(children), args.port, store)
+
+    def stop_children(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop_children)
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        stop_children(signal.SIGINT, None)
+        print("\n👋 Server stopped by user")
+
+
+def main():
+    """Parse arguments, load data and serve"""
+    parser = argparse.ArgumentParser(description="FetiiAI HTTP API server")
+    parser.add_argument("--data", default="FetiiAI_Data_Austin.xlsx", help="Excel data file to serve")
+    parser.add_argument("--store", default=None, help="Trip store directory (written by the loader in --workers mode)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--threads", type=int, default=None, help="Worker threads for analytics (default: CPU count)")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes sharing the port and the mapped dataset")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    from config import OPENAI_API_KEY
+
+    if args.workers > 1:
+        if not hasattr(os, "fork"):
+            raise SystemExit("--workers needs a platform with fork(); run one process per port instead")
+        serve_workers(args, OPENAI_API_KEY)
+        return
+
+    data_processor, chatbot = build_engine(args.data, OPENAI_API_KEY, store=args.store)
+    server = ApiServer(data_processor, chatbot, max_workers=args.threads)
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n👋 Server stopped by user")
+
+
+if __name__ == "__main__":
+    main()
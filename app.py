@@ -13,6 +13,7 @@ import uuid
 # Import our custom modules
 from chatbot import FetiiChatbot
 from data_processor import FetiiDataProcessor
+from events import StreamlitSink
 from config import STREAMLIT_CONFIG, AUSTIN_DESTINATIONS
 
 # Page configuration
@@ -297,7 +298,7 @@ def restore_chatbot_state():
         
         if api_key:
             try:
-                st.session_state.chatbot = FetiiChatbot(api_key)
+                st.session_state.chatbot = FetiiChatbot(api_key, sink=StreamlitSink())
                 
                 # Restore data if it was loaded
                 if st.session_state.data_loaded:
@@ -335,7 +336,7 @@ def auto_load_app():
         # If we found an API key, initialize the chatbot
         if api_key:
             try:
-                st.session_state.chatbot = FetiiChatbot(api_key)
+                st.session_state.chatbot = FetiiChatbot(api_key, sink=StreamlitSink())
                 st.session_state.api_key_entered = True
                 save_session_data()  # Save session data
                 
@@ -379,7 +380,7 @@ def main():
         if api_key and st.session_state.chatbot is None:
             try:
                 from chatbot import FetiiChatbot
-                st.session_state.chatbot = FetiiChatbot(api_key)
+                st.session_state.chatbot = FetiiChatbot(api_key, sink=StreamlitSink())
                 st.success("✅ Chatbot initialized!")
             except Exception as e:
                 st.error(f"❌ Error: {str(e)}")
@@ -664,7 +665,7 @@ def render_sidebar():
         
         if api_key:
             try:
-                st.session_state.chatbot = FetiiChatbot(api_key)
+                st.session_state.chatbot = FetiiChatbot(api_key, sink=StreamlitSink())
                 st.session_state.api_key_entered = True
                 save_session_data()  # Save session data
                 st.success("✅ API Key configured successfully!")
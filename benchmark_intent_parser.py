@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Intent Parser Benchmark
+Times parse_question over the labelled question corpus.
+Accuracy is checked by test_intent_parser.py (python -m pytest test_intent_parser.py).
+
+    python benchmark_intent_parser.py [iterations]
+"""
+
+import sys
+import time
+
+from intent_corpus import DESTINATIONS, QUESTION_CORPUS
+from intent_parser import DestinationIndex, parse_question
+
+
+def run_benchmark(index: DestinationIndex, iterations: int) -> None:
+    """Time parse_question over the corpus"""
+    questions = [question for question, _, _ in QUESTION_CORPUS]
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for question in questions:
+            parse_question(question, index)
+    elapsed = time.perf_counter() - start
+    per_question = elapsed / (iterations * len(questions)) * 1e6
+    print(f"⏱️  {iterations * len(questions)} parses in {elapsed:.3f}s ({per_question:.1f} µs/question)")
+
+
+def main():
+    """Run the microbenchmark"""
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    run_benchmark(DestinationIndex(DESTINATIONS), iterations)
+
+
+if __name__ == "__main__":
+    main()
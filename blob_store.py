@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
+
+import pandas as pd
+
+BLOB_DIR = ".fetii_blobs"
+# Recently read blobs kept decoded so chat reruns don't re-read them from disk
+MAX_CACHED_BLOBS = 32
+# Frame blob formats, tried in order: Parquet needs pyarrow (optional), gzipped pickle always works
+FRAME_EXTENSIONS = (".parquet", ".pkl.gz")
+
+
+def frame_digest(frame: pd.DataFrame) -> str:
+    """Content hash of a frame's values, index, column names and dtypes"""
+    digest = hashlib.sha256()
+    digest.update(repr((list(frame.columns), [str(dtype) for dtype in frame.dtypes], frame.index.names)).encode("utf-8"))
+    try:
+        digest.update(pd.util.hash_pandas_object(frame, index=True).to_numpy().tobytes())
+    except TypeError:
+        # Unhashable cell values (lists, dicts): fall back to their text form
+        digest.update(frame.to_csv().encode("utf-8"))
+    return digest.hexdigest()
+
+
+class BlobStore:
+    """Content-addressed files: frames as Parquet (gzipped pickle without pyarrow), figure JSON gzip-compressed.
+
+    A blob's name is the hash of its content, so a result seen in many messages or sessions
+    is written once and messages only keep the hash."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = os.getenv("FETII_BLOB_DIR", BLOB_DIR) if directory is None else directory
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, digest: str, extension: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest + extension)
+
+    def _write(self, path: str, write):
+        """Write via a temporary file so readers never see a partial blob"""
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+        try:
+            write(staging)
+            os.replace(staging, path)
+        finally:
+            if os.path.exists(staging):
+                os.remove(staging)
+
+    def _remember(self, key: str, value: Any) -> Any:
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            if len(self._cache) > MAX_CACHED_BLOBS:
+                self._cache.popitem(last=False)
+        return value
+
+    def _recall(self, key: str) -> Any:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        return None
+
+    def put_frame(self, frame: pd.DataFrame) -> str:
+        """Store a frame (skipped if the same content is stored) and return its hash"""
+        digest = frame_digest(frame)
+        if any(os.path.exists(self._path(digest, extension)) for extension in FRAME_EXTENSIONS):
+            return digest
+        try:
+            self._write(self._path(digest, ".parquet"), lambda path: frame.to_parquet(path))
+        except (ImportError, TypeError, ValueError, NotImplementedError):
+            # No pyarrow, or columns Arrow cannot type (mixed objects) or write (empty structs)
+            self._write(self._path(digest, ".pkl.gz"), lambda path: frame.to_pickle(path, compression="gzip"))
+        return digest
+
+    def get_frame(self, digest: str) -> Optional[pd.DataFrame]:
+        """Stored frame, or None if the blob is missing"""
+        cached = self._recall(digest)
+        if cached is not None:
+            return cached
+        path = self._path(digest, ".parquet")
+        if os.path.exists(path):
+            return self._remember(digest, pd.read_parquet(path))
+        path = self._path(digest, ".pkl.gz")
+        if os.path.exists(path):
+            return self._remember(digest, pd.read_pickle(path, compression="gzip"))
+        return None
+
+    def put_figure(self, figure_json: str) -> str:
+        """Store plotly figure JSON gzip-compressed and return its hash"""
+        data = figure_json.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+
+        def write(path):
+            with gzip.open(path, "wb") as f:
+                f.write(data)
+        self._write(self._path(digest, ".json.gz"), write)
+        return digest
+
+    def get_figure(self, digest: str) -> Optional[str]:
+        """Stored figure JSON, or None if the blob is missing"""
+        cached = self._recall(digest)
+        if cached is not None:
+            return cached
+        path = self._path(digest, ".json.gz")
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rb") as f:
+            return self._remember(digest, f.read().decode("utf-8"))
@@ -0,0 +1,158 @@
+import json
+import os
+import sqlite3
+import zlib
+from contextlib import closing
+from typing import Dict, List, Any, Optional
+
+CHAT_DB_FILE = "chat_history.db"
+LEGACY_SESSION_FILE = "session_data.json"
+# Inline message payloads (figure JSON from imported histories); stored compressed, read only when a session is shown
+PAYLOAD_FIELDS = ("visualization",)
+MESSAGE_FIELDS = ("role", "content", "timestamp")
+# Hashes of message data and charts in the blob store
+BLOB_FIELDS = ("data_blob", "visualization_blob")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    created_at TEXT,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    role TEXT,
+    content TEXT,
+    timestamp TEXT,
+    data_blob TEXT,
+    visualization_blob TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_by_session ON messages (session_id, id);
+CREATE TABLE IF NOT EXISTS message_payloads (
+    message_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    body BLOB,
+    PRIMARY KEY (message_id, name)
+);
+"""
+
+
+class ChatStore:
+    """Chat sessions and app settings in SQLite (WAL journal).
+
+    Saving a message appends one row instead of rewriting every session, and sessions are
+    listed from their metadata; messages are only read when a session is opened."""
+
+    def __init__(self, path: str = CHAT_DB_FILE):
+        self.path = path
+        with closing(self._connect()) as db, db:
+            db.executescript(SCHEMA)
+            # Databases created before blob references were added
+            columns = {row[1] for row in db.execute("PRAGMA table_info(messages)")}
+            for field in BLOB_FIELDS:
+                if field not in columns:
+                    db.execute(f"ALTER TABLE messages ADD COLUMN {field} TEXT")
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: Streamlit runs each browser session on its own thread
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def settings(self) -> Dict[str, Any]:
+        with closing(self._connect()) as db:
+            return {key: json.loads(value) for key, value in db.execute("SELECT key, value FROM settings")}
+
+    def save_settings(self, values: Dict[str, Any]):
+        with closing(self._connect()) as db, db:
+            self._save_settings(db, values)
+
+    @staticmethod
+    def _save_settings(db: sqlite3.Connection, values: Dict[str, Any]):
+        db.executemany("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                       [(key, json.dumps(value, default=str)) for key, value in values.items()])
+
+    def create_session(self, session_id: str, created_at: str):
+        with closing(self._connect()) as db, db:
+            self._create_session(db, session_id, created_at)
+
+    @staticmethod
+    def _create_session(db: sqlite3.Connection, session_id: str, created_at: str):
+        db.execute("INSERT OR IGNORE INTO sessions (id, created_at) VALUES (?, ?)", (session_id, created_at))
+
+    def list_sessions(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Session metadata (id, created_at, message_count), newest first"""
+        query = "SELECT id, created_at, message_count FROM sessions ORDER BY created_at DESC"
+        with closing(self._connect()) as db:
+            rows = db.execute(query + (" LIMIT ?" if limit else ""), (limit,) if limit else ()).fetchall()
+        return [{"id": row[0], "created_at": row[1], "message_count": row[2]} for row in rows]
+
+    def append_message(self, session_id: str, message: Dict[str, Any]) -> int:
+        """Append one message; blob hashes are stored with it, inline figure JSON goes to the payload table compressed"""
+        with closing(self._connect()) as db, db:
+            return self._append_message(db, session_id, message)
+
+    @staticmethod
+    def _append_message(db: sqlite3.Connection, session_id: str, message: Dict[str, Any]) -> int:
+        fields = MESSAGE_FIELDS + BLOB_FIELDS
+        cursor = db.execute(f"INSERT INTO messages (session_id, {', '.join(fields)}) VALUES (?{', ?' * len(fields)})",
+                            (session_id, *(message.get(field) for field in fields)))
+        message_id = cursor.lastrowid
+        payloads = [(message_id, name, zlib.compress(message[name].encode("utf-8")))
+                    for name in PAYLOAD_FIELDS if isinstance(message.get(name), str)]
+        db.executemany("INSERT INTO message_payloads (message_id, name, body) VALUES (?, ?, ?)", payloads)
+        db.execute("UPDATE sessions SET message_count = message_count + 1 WHERE id = ?", (session_id,))
+        return message_id
+
+    def load_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        """Messages of one session in order, with their blob hashes and payloads"""
+        fields = MESSAGE_FIELDS + BLOB_FIELDS
+        with closing(self._connect()) as db:
+            rows = db.execute(f"SELECT id, {', '.join(fields)} FROM messages WHERE session_id = ? ORDER BY id",
+                              (session_id,)).fetchall()
+            payloads = db.execute(
+                "SELECT p.message_id, p.name, p.body FROM message_payloads p "
+                "JOIN messages m ON m.id = p.message_id WHERE m.session_id = ?", (session_id,)
+            ).fetchall()
+        messages = {
+            row[0]: {field: value for field, value in zip(fields, row[1:]) if value is not None or field in MESSAGE_FIELDS}
+            for row in rows
+        }
+        for message_id, name, body in payloads:
+            messages[message_id][name] = zlib.decompress(body).decode("utf-8")
+        return list(messages.values())
+
+    def clear_session(self, session_id: str):
+        with closing(self._connect()) as db, db:
+            db.execute("DELETE FROM message_payloads WHERE message_id IN "
+                       "(SELECT id FROM messages WHERE session_id = ?)", (session_id,))
+            db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            db.execute("UPDATE sessions SET message_count = 0 WHERE id = ?", (session_id,))
+
+    def import_legacy(self, path: str = LEGACY_SESSION_FILE) -> bool:
+        """One-time import of a whole-file session_data.json written by earlier versions.
+
+        The check, the import and the legacy_imported flag share one write transaction, so two
+        processes starting together import once, and a failed import leaves nothing behind."""
+        if not os.path.exists(path):
+            return False
+        with closing(self._connect()) as db:
+            # Take the write lock before the check; a concurrent importer waits here, then sees the flag
+            db.execute("BEGIN IMMEDIATE")
+            with db:
+                row = db.execute("SELECT value FROM settings WHERE key = 'legacy_imported'").fetchone()
+                if row is not None and json.loads(row[0]):
+                    return False
+                with open(path, "r") as f:
+                    legacy = json.load(f)
+                for session_id, session in legacy.get("chat_sessions", {}).items():
+                    self._create_session(db, session_id, session.get("created_at", ""))
+                    for message in session.get("messages", []):
+                        if isinstance(message, dict):
+                            self._append_message(db, session_id, message)
+                settings = {key: value for key, value in legacy.items() if key not in ("chat_sessions", "chat_history")}
+                self._save_settings(db, {**settings, "legacy_imported": True})
+        return True
@@ -1,5 +1,8 @@
 import os
+import json
+import time
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage, SystemMessage
@@ -7,20 +10,37 @@ from langchain.prompts import ChatPromptTemplate, SystemMessagePromptTemplate, H
 from langchain.memory import ConversationBufferMemory
 from langchain.chains import ConversationChain
 from data_processor import FetiiDataProcessor
-import streamlit as st
+from query_planner import QueryPlanner
+from intent_parser import parse_question, extract_destination, extract_time_period, scan_slots, tokenize
+from events import EventSink
+from time_windows import describe_window
 
 class FetiiChatbot:
     """GPT-powered chatbot for Fetii rideshare data analysis"""
     
-    def __init__(self, api_key: str):
+    # Filters each templated aggregate answer applies exactly
+    FAST_PATH_FILTERS = {
+        "busiest_hour": {"age_group", "day_of_week"},
+        "busiest_day": {"age_group", "time_period"},
+        "average_group_size": {"age_group", "day_of_week", "time_period"},
+        "top_destinations": {"age_group", "day_of_week"}
+    }
+    
+    def __init__(self, api_key: str, enable_fast_path: bool = True, planner_mode: bool = False,
+                 sink: EventSink = None, llm=None):
         self.api_key = api_key
-        self.llm = ChatOpenAI(
+        self.sink = sink or EventSink()
+        self.enable_fast_path = enable_fast_path
+        self.planner_mode = planner_mode
+        # Any chat model can be passed in (e.g. a scripted fake in tests); defaults to OpenAI
+        self.llm = llm if llm is not None else ChatOpenAI(
             openai_api_key=api_key,
             model_name="gpt-3.5-turbo",
             temperature=0.7,
             max_tokens=1000
         )
-        self.data_processor = FetiiDataProcessor()
+        self.data_processor = FetiiDataProcessor(self.sink)
+        self.planner = QueryPlanner(self.data_processor, self.llm)
         self.memory = ConversationBufferMemory(return_messages=True)
         self.conversation = ConversationChain(
             llm=self.llm,
@@ -114,25 +134,39 @@ class FetiiChatbot:
             try:
                 data_query = self._analyze_question(question)
             except Exception as e:
-                st.error(f"❌ Error analyzing question: {str(e)}")
-                st.exception(e)
+                self.sink.error(f"❌ Error analyzing question: {str(e)}")
+                self.sink.exception(e)
                 data_query = {"type": "general", "visualization": None}
             
+            # Pure-aggregate questions are answered from the analysis helpers without the LLM
+            if self.enable_fast_path:
+                try:
+                    fast_response = self._answer_aggregate(data_query)
+                except Exception as e:
+                    self.sink.warning(f"Could not answer directly, falling back to AI: {str(e)}")
+                    fast_response = None
+                if fast_response is not None:
+                    return fast_response
+            
+            # Planner mode lets the model call analysis tools instead of reading pre-built context
+            if self.planner_mode:
+                return self._answer_with_planner(question)
+            
             if data_query:
                 # Fetch relevant data
                 try:
                     data = self._fetch_data(data_query)
                     response["data"] = data
                 except Exception as e:
-                    st.error(f"❌ Error fetching data: {str(e)}")
-                    st.exception(e)
+                    self.sink.error(f"❌ Error fetching data: {str(e)}")
+                    self.sink.exception(e)
                     response["data"] = None
                 
                 # Show data results
                 if data is not None and not data.empty:
-                    st.success(f"📊 Found {len(data)} records matching your query")
+                    self.sink.success(f"📊 Found {len(data)} records matching your query")
                 else:
-                    st.warning("⚠️ No data found matching your query")
+                    self.sink.warning("⚠️ No data found matching your query")
                 
                 # Create visualization if appropriate and data is suitable
                 if data_query and data_query.get("visualization") and data is not None and not data.empty:
@@ -140,207 +174,374 @@ class FetiiChatbot:
                         viz = self._create_visualization(data_query, data)
                         response["visualization"] = viz
                     except Exception as e:
-                        st.warning(f"Could not create visualization: {str(e)}")
+                        self.sink.warning(f"Could not create visualization: {str(e)}")
                         response["visualization"] = None
             
             # Generate natural language response
             try:
                 context = self._build_context(data_query, response["data"])
             except Exception as e:
-                st.error(f"❌ Error building context: {str(e)}")
-                st.exception(e)
+                self.sink.error(f"❌ Error building context: {str(e)}")
+                self.sink.exception(e)
                 context = "Error building context"
             
             try:
-                prompt = f"""
-                You are FetiiAI, an expert data analyst for rideshare data. You have access to real Fetii rideshare data and must provide accurate, data-driven answers.
-
-                User Question: {question}
-                
-                DATA ANALYSIS CONTEXT:
-                {context}
-                
-                INSTRUCTIONS:
-                1. Use ONLY the data provided in the context above
-                2. Provide specific numbers, counts, and statistics from the data
-                3. If data is available, give exact answers (e.g., "X groups went to Moody Center last month")
-                4. Include relevant insights and patterns from the data
-                5. If no data is available, clearly state this and suggest what data would be needed
-                6. Be conversational but data-focused
-                7. Always base your answer on the actual uploaded dataset, not general knowledge
-                
-                Answer the user's question using the data provided:
-                """
-                
-                response["answer"] = self.llm.invoke(prompt).content
+                response["answer"] = self._generate_answer(question, context)
             except Exception as e:
-                st.error(f"❌ Error in LLM call: {str(e)}")
-                st.exception(e)
+                self.sink.error(f"❌ Error in LLM call: {str(e)}")
+                self.sink.exception(e)
                 response["answer"] = f"I encountered an error processing your question: {str(e)}. Please try rephrasing your question."
                 response["confidence"] = "low"
             
         except Exception as e:
             response["answer"] = f"I encountered an error processing your question: {str(e)}. Please try rephrasing your question."
             response["confidence"] = "low"
-            st.error(f"❌ General Error: {str(e)}")
-            st.exception(e)
+            self.sink.error(f"❌ General Error: {str(e)}")
+            self.sink.exception(e)
         
         return response
     
-    def _analyze_question(self, question: str) -> Optional[Dict[str, Any]]:
-        """Analyze the question to determine what data to fetch - enhanced with RAG capabilities"""
-        question_lower = question.lower()
+    def _generate_answer(self, question: str, context: str) -> str:
+        """Ask the LLM to answer the question from the data context"""
+        prompt = f"""
+        You are FetiiAI, an expert data analyst for rideshare data. You have access to real Fetii rideshare data and must provide accurate, data-driven answers.
+
+        User Question: {question}
+        
+        DATA ANALYSIS CONTEXT:
+        {context}
+        
+        INSTRUCTIONS:
+        1. Use ONLY the data provided in the context above
+        2. Provide specific numbers, counts, and statistics from the data
+        3. If data is available, give exact answers (e.g., "X groups went to Moody Center last month")
+        4. Include relevant insights and patterns from the data
+        5. If no data is available, clearly state this and suggest what data would be needed
+        6. Be conversational but data-focused
+        7. Always base your answer on the actual uploaded dataset, not general knowledge
+        
+        Answer the user's question using the data provided:
+        """
+        return self.llm.invoke(prompt).content
+    
+    def process_batch(self, questions: List[str], max_concurrency: int = 4,
+                      include_visualizations: bool = False) -> Dict[str, Any]:
+        """Answer many questions headlessly, sharing parsed queries, data and aggregates"""
+        started = time.perf_counter()
+        results = [None] * len(questions)
+        metrics = {
+            "questions": len(questions),
+            "unique_questions": len(set(questions)),
+            "unique_queries": 0,
+            "template_answers": 0,
+            "llm_calls": 0,
+            "errors": 0
+        }
         
-        # Extract key information from the question
-        analysis = {
-            "type": "general",
-            "visualization": "bar",
-            "question": question,
-            "filters": {},
-            "destination_query": None,
-            "time_period": None
+        if self.data_processor.trips_data is None:
+            for i, question in enumerate(questions):
+                results[i] = {"question": question, "answer": None, "error": "No data loaded"}
+            metrics["errors"] = len(questions)
+            metrics["elapsed_seconds"] = time.perf_counter() - started
+            return {"results": results, "metrics": metrics}
+        
+        # Parse once per distinct question and group questions by their parsed query
+        parsed = {}
+        groups = {}
+        parse_errors = {}
+        for question in questions:
+            if question in parsed:
+                continue
+            try:
+                query = self._analyze_question(question)
+                key = json.dumps({k: v for k, v in query.items() if k != "question"}, sort_keys=True, default=str)
+            except Exception as e:
+                # A question the parser can't handle gets its own error entry instead of failing the batch
+                query, key = None, f"error:{question}"
+                parse_errors[key] = f"Could not analyze question: {str(e)}"
+            parsed[question] = (key, query)
+            groups.setdefault(key, []).append(question)
+        metrics["unique_queries"] = len(groups) - len(parse_errors)
+        
+        # Aggregates shared by every question in the batch
+        shared = {"summary": self.data_processor.get_data_summary(), "detailed": {}}
+        
+        # Fetch data, charts and context once per parsed query
+        prepared = {}
+        pending = {}
+        for key, group_questions in groups.items():
+            query = parsed[group_questions[0]][1]
+            entry = {"query": query, "data": None, "visualization": None, "answer": None,
+                     "answered_by": "llm", "error": parse_errors.get(key)}
+            prepared[key] = entry
+            if entry["error"]:
+                continue
+            try:
+                fast_response = self._answer_aggregate(query) if self.enable_fast_path else None
+                if fast_response is not None:
+                    entry.update(data=fast_response["data"], visualization=fast_response["visualization"],
+                                 answer=fast_response["answer"], answered_by="template")
+                elif self.planner_mode:
+                    # Same route as process_question: the planner picks its own tools per question
+                    entry["answered_by"] = "planner"
+                    for question in group_questions:
+                        pending[question] = (self._answer_with_planner, (question,))
+                else:
+                    entry["data"] = self._fetch_data(query)
+                    if include_visualizations and query.get("visualization") and entry["data"] is not None and not entry["data"].empty:
+                        entry["visualization"] = self._create_visualization(query, entry["data"])
+                    context = self._build_context(query, entry["data"], shared)
+                    for question in group_questions:
+                        pending[question] = (self._generate_answer, (question, context))
+            except Exception as e:
+                entry["error"] = str(e)
+        prepare_seconds = time.perf_counter() - started
+        
+        # Fan out LLM calls with bounded concurrency
+        answers = {}
+        if pending:
+            with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+                futures = {question: executor.submit(answer_question, *args)
+                           for question, (answer_question, args) in pending.items()}
+                for question, future in futures.items():
+                    try:
+                        answers[question] = (future.result(), None)
+                    except Exception as e:
+                        answers[question] = (None, str(e))
+            # The planner makes two model calls per question: the plan and the answer
+            metrics["llm_calls"] = sum(2 if prepared[parsed[question][0]]["answered_by"] == "planner" else 1
+                                       for question in pending)
+        
+        for i, question in enumerate(questions):
+            entry = prepared[parsed[question][0]]
+            answer, error = entry["answer"], entry["error"]
+            plan = None
+            if question in answers:
+                answer, error = answers[question]
+                if entry["answered_by"] == "planner" and answer is not None:
+                    plan, answer = answer["plan"], answer["answer"]
+            result = {
+                "question": question,
+                "answer": answer,
+                "answered_by": entry["answered_by"],
+                "query": entry["query"],
+                "records": 0 if entry["data"] is None else len(entry["data"]),
+                "data": entry["data"],
+                "error": error
+            }
+            if plan is not None:
+                result["plan"] = plan
+            if include_visualizations:
+                result["visualization"] = entry["visualization"]
+            if error:
+                metrics["errors"] += 1
+            elif entry["answered_by"] == "template":
+                metrics["template_answers"] += 1
+            results[i] = result
+        
+        elapsed = time.perf_counter() - started
+        metrics["prepare_seconds"] = prepare_seconds
+        metrics["llm_seconds"] = elapsed - prepare_seconds
+        metrics["elapsed_seconds"] = elapsed
+        metrics["questions_per_second"] = len(questions) / elapsed if elapsed > 0 else 0.0
+        return {"results": results, "metrics": metrics}
+    
+    def _answer_with_planner(self, question: str) -> Dict[str, Any]:
+        """Answer a question through the tool-calling query planner"""
+        result = self.planner.answer(question)
+        for error in result["errors"]:
+            self.sink.warning(f"⚠️ Skipped planned call: {error}")
+        
+        return {
+            "answer": result["answer"],
+            "data": None,
+            "visualization": None,
+            "confidence": "high" if result["plan"] and not result["errors"] else "low",
+            "answered_by": "planner",
+            "plan": result["plan"],
+            "tool_results": result["results"]
         }
+    
+    def _answer_aggregate(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Answer a pure-aggregate question with a template, or return None to use the LLM"""
+        if not query:
+            return None
         
-        # Extract destination from question using RAG approach
-        destination = self._extract_destination_from_question(question)
-        if destination:
-            analysis["destination_query"] = destination
-            analysis["type"] = "destination_search"
-        
-        # Extract time period
-        time_period = self._extract_time_period(question)
-        if time_period:
-            analysis["time_period"] = time_period
-        
-        # Check for age group mentions
-        if "18-24" in question_lower or "18 to 24" in question_lower:
-            analysis["filters"]["age_group"] = "18-24"
-        elif "25-34" in question_lower or "25 to 34" in question_lower:
-            analysis["filters"]["age_group"] = "25-34"
-        elif "35-44" in question_lower or "35 to 44" in question_lower:
-            analysis["filters"]["age_group"] = "35-44"
-        elif "45+" in question_lower or "45 and up" in question_lower:
-            analysis["filters"]["age_group"] = "45+"
-        
-        # Check for day of week mentions
-        days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-        for day in days:
-            if day in question_lower:
-                analysis["filters"]["day_of_week"] = day.capitalize()
-                break
-        
-        # Check for time-related queries
-        if any(word in question_lower for word in ["night", "evening", "late"]):
-            analysis["filters"]["time_period"] = "evening"
-        elif any(word in question_lower for word in ["morning", "early", "dawn"]):
-            analysis["filters"]["time_period"] = "morning"
-        elif any(word in question_lower for word in ["afternoon", "midday"]):
-            analysis["filters"]["time_period"] = "afternoon"
-        
-        # Check for location mentions
-        if "downtown" in question_lower:
-            analysis["filters"]["location_keyword"] = "downtown"
-        elif "austin" in question_lower:
-            analysis["filters"]["location_keyword"] = "austin"
-        
-        # Check for group size mentions
-        if "large group" in question_lower or "6+" in question_lower or "6 or more" in question_lower:
-            analysis["filters"]["min_group_size"] = 6
-        elif "small group" in question_lower or "1-3" in question_lower:
-            analysis["filters"]["max_group_size"] = 3
-        
-        # Determine visualization type based on question content
-        if any(word in question_lower for word in ["time", "hour", "when", "schedule", "duration", "pattern"]):
-            analysis["visualization"] = "line"
-        elif any(word in question_lower for word in ["distribution", "percentage", "proportion", "share"]):
-            analysis["visualization"] = "pie"
-        elif any(word in question_lower for word in ["top", "most", "popular", "best", "highest", "ranking"]):
-            analysis["visualization"] = "bar"
-        elif any(word in question_lower for word in ["map", "location", "geographic"]):
-            analysis["visualization"] = "scatter"
-        
-        # Determine specific query type based on analytical topics
-        if any(word in question_lower for word in ["group size", "group sizes", "group size analysis", "group distribution"]):
-            analysis["type"] = "group_size_analysis"
-        elif any(word in question_lower for word in ["hourly", "hourly distribution", "peak hours", "time patterns", "when do"]):
-            analysis["type"] = "hourly_analysis"
-        elif any(word in question_lower for word in ["day of week", "weekday", "weekend", "saturday", "sunday", "monday", "tuesday", "wednesday", "thursday", "friday"]):
-            analysis["type"] = "day_of_week_analysis"
-        elif any(word in question_lower for word in ["age group", "age groups", "demographics", "young", "old", "18-24", "25-34", "35-44", "45+"]):
-            analysis["type"] = "age_group_analysis"
-        elif any(word in question_lower for word in ["monthly", "monthly trends", "seasonal", "over time", "trends"]):
-            analysis["type"] = "monthly_analysis"
-        elif any(word in question_lower for word in ["top", "most popular", "best", "ranking"]):
-            if "destination" in question_lower or "drop" in question_lower or "location" in question_lower:
-                analysis["type"] = "top_destinations"
-            elif "time" in question_lower or "hour" in question_lower:
-                analysis["type"] = "hourly_patterns"
+        aggregate = query.get("aggregate")
+        filters = query.get("filters", {})
+        if aggregate not in self.FAST_PATH_FILTERS:
+            return None
         
+        # Destinations, relative periods and unsupported filters need the full pipeline
+        if query.get("destination_query") or query.get("time_period"):
+            return None
+        if not set(filters) <= self.FAST_PATH_FILTERS[aggregate]:
+            return None
+        
+        scope = self._describe_scope(filters)
+        if aggregate == "busiest_hour":
+            answer, data, chart = self._busiest_hour_answer(filters, scope)
+        elif aggregate == "busiest_day":
+            answer, data, chart = self._busiest_day_answer(filters, scope)
+        elif aggregate == "average_group_size":
+            answer, data, chart = self._average_group_size_answer(filters, scope)
+        else:
+            answer, data, chart = self._top_destinations_answer(filters, scope)
+        
+        return {
+            "answer": answer,
+            "data": data,
+            "visualization": chart,
+            "confidence": "high",
+            "answered_by": "template"
+        }
+    
+    def _describe_scope(self, filters: Dict[str, Any]) -> str:
+        """Describe the active filters as a phrase such as 'for 18-24 year-olds on Fridays'"""
+        parts = []
+        if filters.get("age_group"):
+            parts.append(f"for {filters['age_group']} year-olds")
+        if filters.get("day_of_week"):
+            parts.append(f"on {filters['day_of_week']}s")
+        if filters.get("time_period"):
+            parts.append(f"in the {filters['time_period']}")
+        return (" " + " ".join(parts)) if parts else ""
+    
+    @staticmethod
+    def _format_hour(hour: int) -> str:
+        """Format an hour of day as a 12-hour clock label"""
+        return f"{hour % 12 or 12} {'AM' if hour < 12 else 'PM'}"
+    
+    def _busiest_hour_answer(self, filters: Dict[str, Any], scope: str):
+        """Templated answer for the busiest hour of day"""
+        analysis = self.data_processor.analyze_hourly_patterns(filters)
+        hourly = analysis.get("hourly_distribution", {})
+        total = analysis.get("total_trips", 0)
+        if not hourly or total == 0:
+            return f"I couldn't find any trips{scope}.", None, None
+        
+        ranked = sorted(hourly.items(), key=lambda item: (-item[1], item[0]))
+        peak_hour, peak_count = ranked[0]
+        answer = (
+            f"The busiest hour{scope} is **{self._format_hour(peak_hour)}** ({peak_hour}:00) "
+            f"with **{peak_count} trips**, {peak_count / total:.1%} of {total} trips."
+        )
+        if len(ranked) > 1:
+            runners_up = ", ".join(f"{self._format_hour(hour)} ({count})" for hour, count in ranked[1:3])
+            answer += f" Next busiest: {runners_up}."
+        
+        series = pd.Series(hourly).sort_index()
+        data = pd.DataFrame({"hour": series.index, "trip_count": series.values})
+        chart = self.data_processor.create_visualization_json(
+            "line", series,
+            title=f"Trips by Hour{scope}",
+            x_label="Hour of Day",
+            y_label="Number of Trips"
+        )
+        return answer, data, chart
+    
+    def _busiest_day_answer(self, filters: Dict[str, Any], scope: str):
+        """Templated answer for the busiest day of week"""
+        analysis = self.data_processor.analyze_day_of_week_patterns(filters)
+        daily = analysis.get("daily_distribution", {})
+        total = analysis.get("total_trips", 0)
+        if not daily or total == 0:
+            return f"I couldn't find any trips{scope}.", None, None
+        
+        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        ranked = sorted(daily.items(), key=lambda item: (-item[1], days.index(item[0]) if item[0] in days else 7))
+        peak_day, peak_count = ranked[0]
+        answer = (
+            f"The busiest day{scope} is **{peak_day}** with **{peak_count} trips**, "
+            f"{peak_count / total:.1%} of {total} trips."
+        )
+        weekend = analysis.get("weekend_vs_weekday", {})
+        if weekend:
+            answer += (
+                f" Weekends account for {weekend.get('weekend_trips', 0)} trips "
+                f"and weekdays for {weekend.get('weekday_trips', 0)}."
+            )
+        
+        series = pd.Series(daily).reindex([day for day in days if day in daily])
+        data = pd.DataFrame({"day_of_week": series.index, "trip_count": series.values})
+        chart = self.data_processor.create_visualization_json(
+            "bar", series,
+            title=f"Trips by Day of Week{scope}",
+            x_label="Day",
+            y_label="Number of Trips"
+        )
+        return answer, data, chart
+    
+    def _average_group_size_answer(self, filters: Dict[str, Any], scope: str):
+        """Templated answer for the average group size"""
+        analysis = self.data_processor.analyze_group_size_patterns(filters)
+        total = analysis.get("total_trips", 0)
+        if "error" in analysis or total == 0:
+            return f"I couldn't find any trips{scope}.", None, None
+        
+        stats = analysis["group_size_stats"]
+        categories = analysis.get("size_categories", {})
+        answer = (
+            f"The average group size{scope} is **{stats['mean']:.1f} riders** across {total} trips "
+            f"(median {stats['median']:g}, most common {stats['mode']}, range {stats['min']}–{stats['max']})."
+        )
+        if categories:
+            large = categories.get("large_groups_7_10", 0) + categories.get("very_large_groups_11plus", 0)
+            answer += f" {large} trips ({large / total:.1%}) carried groups of 7 or more."
+        
+        series = pd.Series(analysis["group_size_distribution"]).sort_index()
+        data = pd.DataFrame({"group_size": series.index, "trip_count": series.values})
+        chart = self.data_processor.create_visualization_json(
+            "bar", series,
+            title=f"Group Size Distribution{scope}",
+            x_label="Group Size",
+            y_label="Number of Trips"
+        )
+        return answer, data, chart
+    
+    def _top_destinations_answer(self, filters: Dict[str, Any], scope: str):
+        """Templated answer for the most popular destinations"""
+        data = self.data_processor.get_top_destinations_by_age_and_day(
+            filters.get("age_group"), filters.get("day_of_week"), limit=5
+        )
+        if data.empty:
+            return f"I couldn't find any trips{scope}.", None, None
+        
+        lines = [f"The top destinations{scope} are:"]
+        for i, row in enumerate(data.itertuples(index=False), 1):
+            lines.append(f"{i}. **{row.destination}** - {row.trip_count} trips")
+        
+        series = pd.Series(data["trip_count"].values, index=data["destination"].values)
+        chart = self.data_processor.create_visualization_json(
+            "bar", series,
+            title=f"Top Destinations{scope}",
+            x_label="Destination",
+            y_label="Number of Trips"
+        )
+        return "\n".join(lines), data, chart
+    
+    def _analyze_question(self, question: str) -> Optional[Dict[str, Any]]:
+        """Analyze the question to determine what data to fetch - enhanced with RAG capabilities"""
+        analysis = parse_question(question, self.data_processor.get_destination_index())
+        # Named months, rolling ranges and explicit dates resolve against the dataset's own timeline
+        if not analysis["time_period"]:
+            window = self.data_processor.resolve_time_window(question)
+            if window:
+                analysis["time_period"] = window["label"]
         return analysis
     
     def _extract_destination_from_question(self, question: str) -> Optional[str]:
         """Extract destination from question using RAG approach"""
         question_lower = question.lower()
-        
-        # Common destination keywords to look for
-        destination_keywords = [
-            "moody center", "moody", "center",
-            "downtown", "austin", "university", "campus",
-            "airport", "mall", "stadium", "theater",
-            "restaurant", "bar", "club", "hotel",
-            "park", "lake", "river", "bridge"
-        ]
-        
-        # Look for destination mentions
-        for keyword in destination_keywords:
-            if keyword in question_lower:
-                # Try to find the full destination name
-                similar_destinations = self.data_processor.search_similar_destinations(keyword, limit=5)
-                if similar_destinations:
-                    return similar_destinations[0]  # Return the most relevant match
-        
-        # If no specific destination found, look for "went to" or "go to" patterns
-        import re
-        patterns = [
-            r"went to ([^?]+)",
-            r"go to ([^?]+)",
-            r"visiting ([^?]+)",
-            r"at ([^?]+)",
-            r"in ([^?]+)"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, question_lower)
-            if match:
-                potential_dest = match.group(1).strip()
-                # Clean up the destination name
-                potential_dest = re.sub(r'\s+(last|this|next)\s+(month|week|year)', '', potential_dest)
-                potential_dest = re.sub(r'\s+(how many|groups|trips)', '', potential_dest)
-                if potential_dest and len(potential_dest) > 2:
-                    return potential_dest
-        
-        return None
+        return extract_destination(
+            question_lower,
+            scan_slots(tokenize(question_lower)),
+            self.data_processor.get_destination_index()
+        )
     
     def _extract_time_period(self, question: str) -> Optional[str]:
         """Extract time period from question"""
-        question_lower = question.lower()
-        
-        time_periods = {
-            "last month": ["last month", "previous month"],
-            "this month": ["this month", "current month"],
-            "last week": ["last week", "previous week"],
-            "this week": ["this week", "current week"],
-            "yesterday": ["yesterday"],
-            "today": ["today"],
-            "last year": ["last year", "previous year"],
-            "this year": ["this year", "current year"]
-        }
-        
-        for period, keywords in time_periods.items():
-            if any(keyword in question_lower for keyword in keywords):
-                return period
-        
-        return None
+        return extract_time_period(question)
     
     def _extract_day_of_week(self, question: str) -> Optional[str]:
         """Extract day of week from question"""
@@ -352,24 +553,10 @@ class FetiiChatbot:
     
     def _extract_month(self, question: str) -> Optional[int]:
         """Extract month from question"""
-        import datetime
-        
-        # Check for "last month"
-        if "last month" in question:
-            now = datetime.datetime.now()
-            last_month = now.month - 1 if now.month > 1 else 12
-            return last_month
-        
-        # Check for specific month names
-        month_names = {
-            "january": 1, "february": 2, "march": 3, "april": 4,
-            "may": 5, "june": 6, "july": 7, "august": 8,
-            "september": 9, "october": 10, "november": 11, "december": 12
-        }
-        
-        for month_name, month_num in month_names.items():
-            if month_name in question:
-                return month_num
+        # "last month", "in September" etc. resolve against the dataset's latest trip, not the wall clock
+        window = self.data_processor.resolve_time_window(question)
+        if window and window["start"].day == 1 and window["end"] == window["start"] + pd.DateOffset(months=1):
+            return window["start"].month
         
         # Check for month numbers
         import re
@@ -397,12 +584,16 @@ class FetiiChatbot:
             destination = query.get("destination_query")
             time_period = query.get("time_period")
             
+            # Restrict to the requested time window before searching destinations
+            window = self.data_processor.resolve_time_window(time_period) if time_period else None
+            scope = self.data_processor.get_trips_in_window(window["start"], window["end"]) if window else None
+            
             # Get comprehensive destination statistics
             dest_stats = self.data_processor.get_destination_stats(destination, time_period)
             
             if dest_stats.get("found", False):
                 # Return the actual data for the destination
-                dest_data = self.data_processor.search_destinations(destination)
+                dest_data = self.data_processor.search_destinations(destination, data=scope)
                 return dest_data
             else:
                 # Try fuzzy search for similar destinations
@@ -411,7 +602,7 @@ class FetiiChatbot:
                 if similar_destinations:
                     # Return data for the most similar destination
                     best_match = similar_destinations[0]
-                    dest_data = self.data_processor.search_destinations(best_match)
+                    dest_data = self.data_processor.search_destinations(best_match, data=scope)
                     return dest_data
                 else:
                     return pd.DataFrame()
@@ -483,7 +674,7 @@ class FetiiChatbot:
         return self.data_processor.trips_data
     
     def _create_visualization(self, query: Dict[str, Any], data: pd.DataFrame) -> Any:
-        """Create visualization based on query and data"""
+        """Create visualization (plotly figure JSON) based on query and data"""
         if data is None or data.empty:
             return None
         
@@ -494,7 +685,7 @@ class FetiiChatbot:
             viz_type = query.get("visualization", "bar")
             
             if query.get("type") == "top_destinations":
-                return self.data_processor.create_visualization(
+                return self.data_processor.create_visualization_json(
                     "bar", data, 
                     title="Top Destinations",
                     x_label="Destination",
@@ -503,14 +694,14 @@ class FetiiChatbot:
             elif query.get("type") == "age_group_destinations":
                 age_group = query.get("age_group", "specified age group")
                 day_filter = f" on {query.get('day_of_week')}" if query.get('day_of_week') else ""
-                return self.data_processor.create_visualization(
+                return self.data_processor.create_visualization_json(
                     "bar", data,
                     title=f"Top Destinations for {age_group} year-olds{day_filter}",
                     x_label="Destination",
                     y_label="Number of Trips"
                 )
             elif query.get("type") == "hourly_distribution":
-                return self.data_processor.create_visualization(
+                return self.data_processor.create_visualization_json(
                     "line", data,
                     title="Hourly Trip Distribution",
                     x_label="Hour of Day",
@@ -518,22 +709,22 @@ class FetiiChatbot:
                 )
             elif query.get("type") == "destination":
                 destination = query.get("destination", "specified destination")
-                return self.data_processor.create_visualization(
+                return self.data_processor.create_visualization_json(
                     "bar", data,
                     title=f"Trips to {destination}",
                     x_label="Trip Details",
                     y_label="Count"
                 )
             else:
-                return self.data_processor.create_visualization(
+                return self.data_processor.create_visualization_json(
                     viz_type, data,
                     title=f"Analysis: {query.get('type', 'Data')}"
                 )
         except Exception as e:
-            st.error(f"Visualization creation error: {str(e)}")
+            self.sink.error(f"Visualization creation error: {str(e)}")
             return None
     
-    def _build_context(self, query: Dict[str, Any], data: pd.DataFrame) -> str:
+    def _build_context(self, query: Dict[str, Any], data: pd.DataFrame, shared: Dict[str, Any] = None) -> str:
         """Build detailed context string for the LLM using RAG approach - enhanced for complex queries"""
         context_parts = []
         
@@ -543,10 +734,18 @@ class FetiiChatbot:
         
         # Get comprehensive analysis using the new detailed analysis function
         filters = query.get("filters", {})
-        detailed_analysis = self.data_processor.get_detailed_trip_analysis(filters)
+        if shared is not None:
+            # Batch runs reuse the summary and per-filter analyses across questions
+            filters_key = json.dumps(filters, sort_keys=True, default=str)
+            if filters_key not in shared["detailed"]:
+                shared["detailed"][filters_key] = self.data_processor.get_detailed_trip_analysis(filters)
+            detailed_analysis = shared["detailed"][filters_key]
+            summary = shared["summary"]
+        else:
+            detailed_analysis = self.data_processor.get_detailed_trip_analysis(filters)
+            summary = self.data_processor.get_data_summary()
         
         # Add overall data summary first
-        summary = self.data_processor.get_data_summary()
         if summary:
             context_parts.append(f"DATASET OVERVIEW:")
             context_parts.append(f"- Total trips in dataset: {summary.get('total_trips', 0)}")
@@ -606,7 +805,8 @@ class FetiiChatbot:
                 
                 context_parts.append(f"- Destination search results for: {destination}")
                 if time_period:
-                    context_parts.append(f"- Time period: {time_period}")
+                    window = self.data_processor.resolve_time_window(time_period)
+                    context_parts.append(f"- Time period: {describe_window(window) if window else time_period}")
                 
                 # Get destination statistics
                 dest_stats = self.data_processor.get_destination_stats(destination, time_period)
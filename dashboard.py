@@ -0,0 +1,130 @@
+from typing import Dict, List, Any, Optional
+
+import pandas as pd
+import plotly.express as px
+
+from trip_store import value_counts
+
+
+def _pickup_times(trips: pd.DataFrame) -> pd.Series:
+    """Pickup times as datetimes, parsed into a local series rather than written back to the frame"""
+    if pd.api.types.is_datetime64_any_dtype(trips['pickup_time']):
+        return trips['pickup_time']
+    return pd.to_datetime(trips['pickup_time'])
+
+
+def binned_map_figure(bins: Dict[str, Any]):
+    """Grid-cell map (one marker per cell, sized by trips, colored by average group size).
+
+    plotly >= 5.24 renders it with MapLibre (scatter_map), older releases with Mapbox."""
+    cells = bins["cells"]
+    options = dict(
+        lat='latitude',
+        lon='longitude',
+        size='trips',
+        color='avg_group_size' if 'avg_group_size' in cells.columns else None,
+        hover_data={'trips': True, 'latitude': ':.4f', 'longitude': ':.4f'},
+        labels={'trips': 'Trips', 'avg_group_size': 'Avg Group Size'},
+        center=bins["center"],
+        zoom=bins["zoom"],
+        title=f"{bins['layer'].title()} Density ({bins['points']:,} trips in {len(cells):,} cells)"
+    )
+    if hasattr(px, "scatter_map"):
+        fig = px.scatter_map(cells, map_style="open-street-map", **options)
+    else:
+        fig = px.scatter_mapbox(cells, mapbox_style="open-street-map", **options)
+    fig.update_layout(height=500)
+    return fig
+
+
+def build_analytics_snapshot(data_processor) -> Dict[str, Any]:
+    """Metrics and figure JSON for the analytics dashboard, computed without modifying the shared frames"""
+    trips = data_processor.trips_data
+    users = data_processor.users_data
+    snapshot = {"summary": data_processor.get_data_summary(), "figures": {}, "metrics": {}}
+    figures = snapshot["figures"]
+    if trips is None or trips.empty:
+        return snapshot
+
+    if 'dropoff_location' in trips.columns:
+        top_destinations = value_counts(trips['dropoff_location']).head(10)
+        if not top_destinations.empty:
+            fig = px.bar(
+                x=top_destinations.values,
+                y=top_destinations.index,
+                orientation='h',
+                title="Top 10 Destinations",
+                labels={'x': 'Number of Trips', 'y': 'Destination'}
+            )
+            fig.update_layout(height=500)
+            figures["top_destinations"] = fig.to_json()
+
+    if 'group_size' in trips.columns:
+        group_size_dist = trips['group_size'].value_counts().sort_index()
+        if not group_size_dist.empty:
+            figures["group_sizes"] = px.bar(
+                x=group_size_dist.index,
+                y=group_size_dist.values,
+                title="Group Size Distribution",
+                labels={'x': 'Group Size', 'y': 'Number of Trips'}
+            ).to_json()
+
+    if 'pickup_time' in trips.columns:
+        # Preprocessed trips already carry hour/day_of_week; raw frames get them derived locally
+        pickup_times = None if {'hour', 'day_of_week'} <= set(trips.columns) else _pickup_times(trips)
+        hours = trips['hour'] if pickup_times is None else pickup_times.dt.hour
+        days = trips['day_of_week'] if pickup_times is None else pickup_times.dt.day_name()
+
+        hourly_dist = hours.value_counts().sort_index()
+        if not hourly_dist.empty:
+            figures["hourly"] = px.bar(
+                x=hourly_dist.index,
+                y=hourly_dist.values,
+                title="Trips by Hour of Day",
+                labels={'x': 'Hour', 'y': 'Number of Trips'}
+            ).to_json()
+
+        daily_dist = value_counts(days)
+        if not daily_dist.empty:
+            figures["daily"] = px.bar(
+                x=daily_dist.index,
+                y=daily_dist.values,
+                title="Trips by Day of Week",
+                labels={'x': 'Day', 'y': 'Number of Trips'}
+            ).to_json()
+
+    if users is not None and not users.empty and 'age' in users.columns:
+        if 'age_group' in users.columns:
+            age_groups = users['age_group']
+        else:
+            age_groups = pd.cut(
+                users['age'],
+                bins=[0, 18, 25, 35, 45, 55, 100],
+                labels=['Under 18', '18-24', '25-34', '35-44', '45-54', '55+']
+            )
+        age_dist = value_counts(age_groups)
+        if not age_dist.empty:
+            figures["age_groups"] = px.pie(
+                values=age_dist.values,
+                names=age_dist.index,
+                title="Age Group Distribution"
+            ).to_json()
+
+    if 'pickup_latitude' in trips.columns and 'pickup_longitude' in trips.columns:
+        figures["pickup_map"] = data_processor.get_map_figure("pickup")
+
+    if 'group_size' in trips.columns:
+        # Assume $5 per person as base fare
+        estimated_revenue = trips['group_size'] * 5
+        snapshot["metrics"]["total_revenue"] = estimated_revenue.sum()
+        snapshot["metrics"]["avg_revenue_per_trip"] = estimated_revenue.mean()
+
+    corr_matrix = data_processor.get_quality_report()["trips"]["correlation"]
+    if corr_matrix is not None:
+        figures["correlation"] = px.imshow(
+            corr_matrix,
+            title="Correlation Matrix",
+            color_continuous_scale="RdBu"
+        ).to_json()
+
+    return snapshot
@@ -1,18 +1,109 @@
+import calendar
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from typing import Dict, List, Any, Optional
-import streamlit as st
+from events import EventSink
+from intent_parser import DestinationIndex
+from trip_store import write_store, open_store, read_manifest, source_fingerprint, default_store_dir, value_counts
+from time_partitions import TimePartitions
+from time_windows import find_time_window, describe_window
+from rollups import TripRollups
+from rider_profiles import RiderProfiles
+from trip_riders import TripRiders
+from user_directory import UserDirectory
+from data_quality import build_quality_report
+from dashboard import build_analytics_snapshot, binned_map_figure
+from geo_bins import bin_trips, MAP_LAYERS, MIN_ZOOM, MAX_ZOOM
+from trip_query import filter_rows, sort_rows, page_of
+from sketches import DistinctCounter, MetricCube, DISTINCT_METRICS, TIME_PERIOD_HOURS
+
+# Bump when preprocessing changes so stores built by older code are rebuilt
+PREPROCESS_VERSION = 6
+# Index columns older preprocessing added to trips; epochs and user codes now stay in TimePartitions/UserDirectory
+LEGACY_INTERNAL_COLUMNS = ("pickup_epoch_ns", "user_code")
+
+AGE_GROUPS = ["Under 18", "18-24", "25-34", "35-44", "45-54", "55+"]
+# Recent trip-table queries whose sorted row ids are kept for paging
+MAX_CACHED_QUERIES = 8
+# Chat chart figures kept as serialized JSON
+MAX_CACHED_FIGURES = 64
+EMPTY_FIGURE_JSON = go.Figure().to_json()
 
 class FetiiDataProcessor:
     """Process and analyze Fetii rideshare data"""
     
-    def __init__(self):
-        self.trips_data = None
-        self.users_data = None
+    def __init__(self, sink: EventSink = None, store_dir: Optional[str] = None):
+        self.sink = sink or EventSink()
+        # Parsed workbooks are cached here as memory-mapped column stores, by default in the user's
+        # cache directory rather than wherever the process starts; "" disables caching
+        self.store_dir = os.getenv("FETII_STORE_DIR", default_store_dir()) if store_dir is None else store_dir
+        self._trips_data = None
+        self._users_data = None
+        # "Checked in User ID's" sheet: one (trip_id, user_id) row per rider on a trip
+        self.checkins_data = None
         self.processed_data = None
+        self.data_version = 0
+        self._cache = {}
+        # API handlers and planner tool calls share one processor across threads; the lock guards the caches
+        self._lock = threading.Lock()
+        # One lock per cache key so concurrent callers build a structure once
+        self._build_locks = {}
+        # Fixed "now" for relative dates ("last month"); None anchors them to the latest trip
+        self.now = None
+        # Distinct counts come from mergeable sketches (exact below a few thousand values); True forces a scan
+        self.exact_distinct = False
+        # Chart JSON keyed by content, so it outlives data reloads
+        self._figure_cache = OrderedDict()
+    
+    @property
+    def trips_data(self) -> Optional[pd.DataFrame]:
+        """Trips frame; assigning a new frame bumps the data version"""
+        return self._trips_data
+    
+    @trips_data.setter
+    def trips_data(self, value: Optional[pd.DataFrame]):
+        with self._lock:
+            self._trips_data = value
+            self.data_version += 1
+            self._cache = {}
+    
+    @property
+    def users_data(self) -> Optional[pd.DataFrame]:
+        """User demographics; assigning a new frame drops structures derived from it"""
+        return self._users_data
+    
+    @users_data.setter
+    def users_data(self, value: Optional[pd.DataFrame]):
+        with self._lock:
+            self._users_data = value
+            self._cache = {}
+    
+    def _cached(self, key: str, builder):
+        """Memoize a derived structure for the current data version; concurrent callers build it once"""
+        with self._lock:
+            cache = self._cache
+            if key in cache:
+                return cache[key]
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        
+        with build_lock:
+            with self._lock:
+                if key in cache:
+                    return cache[key]
+            value = builder()
+            # A reload while building swaps in a new cache, so a stale value never reaches it
+            with self._lock:
+                cache[key] = value
+            return value
     
     def load_data(self, data_file: str = None, trips_file: str = None, users_file: str = None) -> bool:
         """Load data from Excel files - supports both single file with tabs or separate files"""
@@ -24,40 +115,47 @@ class FetiiDataProcessor:
                 import tempfile
                 
                 if not os.path.exists(data_file):
-                    st.error(f"❌ File not found: {data_file}")
+                    self.sink.error(f"❌ File not found: {data_file}")
                     return False
                 
                 # Check file permissions
                 if not os.access(data_file, os.R_OK):
-                    st.error(f"❌ Permission denied: Cannot read {data_file}")
-                    st.info("💡 **Solutions:**")
-                    st.info("1. Close Excel if the file is open")
-                    st.info("2. Check file permissions (right-click → Properties → Security)")
-                    st.info("3. Try copying the file to a different location")
-                    st.info("4. Use the file uploader below as an alternative")
+                    self.sink.error(f"❌ Permission denied: Cannot read {data_file}")
+                    self.sink.info("💡 **Solutions:**")
+                    self.sink.info("1. Close Excel if the file is open")
+                    self.sink.info("2. Check file permissions (right-click → Properties → Security)")
+                    self.sink.info("3. Try copying the file to a different location")
+                    self.sink.info("4. Use the file uploader below as an alternative")
                     
                     # Try to create a copy in temp directory
                     try:
-                        st.info("🔄 Attempting to create a temporary copy...")
+                        self.sink.info("🔄 Attempting to create a temporary copy...")
                         temp_dir = tempfile.mkdtemp()
                         temp_file = os.path.join(temp_dir, "FetiiAI_Data_Austin.xlsx")
                         shutil.copy2(data_file, temp_file)
                         data_file = temp_file
-                        st.success("✅ Created temporary copy successfully!")
+                        self.sink.success("✅ Created temporary copy successfully!")
                     except Exception as copy_error:
-                        st.error(f"❌ Could not create temporary copy: {str(copy_error)}")
+                        self.sink.error(f"❌ Could not create temporary copy: {str(copy_error)}")
                         return False
                 
+                # Reuse the store built from this exact file instead of parsing it again
+                store_path = self._store_path(data_file)
+                if store_path and read_manifest(store_path) is not None:
+                    self.sink.info("⚡ Reusing cached trip store")
+                    if self.load_store(store_path):
+                        return True
+                
                 # Try to open the file
                 try:
                     excel_file = pd.ExcelFile(data_file)
-                    st.info(f"📋 Found sheets: {excel_file.sheet_names}")
+                    self.sink.info(f"📋 Found sheets: {excel_file.sheet_names}")
                 except PermissionError as e:
-                    st.error(f"❌ Permission denied: {str(e)}")
-                    st.info("💡 Please close the Excel file if it's open and try again")
+                    self.sink.error(f"❌ Permission denied: {str(e)}")
+                    self.sink.info("💡 Please close the Excel file if it's open and try again")
                     return False
                 except Exception as e:
-                    st.error(f"❌ Error opening file: {str(e)}")
+                    self.sink.error(f"❌ Error opening file: {str(e)}")
                     return False
                 
                 # Load Trip data from 'Trip Data' tab (note the capital D)
@@ -78,6 +176,7 @@ class FetiiDataProcessor:
                     # Fallback: look for any sheet with 'rider' in the name
                     rider_sheet = [name for name in excel_file.sheet_names if 'rider' in name.lower()][0]
                     rider_data = pd.read_excel(data_file, sheet_name=rider_sheet)
+                self.checkins_data = rider_data
                 
                 # Load User demographics from 'Customer Demographics' tab
                 if 'Customer Demographics' in excel_file.sheet_names:
@@ -99,44 +198,117 @@ class FetiiDataProcessor:
                     self.users_data = pd.read_excel(users_file)
             
             if self.trips_data is not None:
-                st.info(f"✅ Loaded {len(self.trips_data)} trips")
+                self.sink.info(f"✅ Loaded {len(self.trips_data)} trips")
                 self._preprocess_data()
                 # Merge trips with user demographics for age-based analysis
                 self._merge_trips_with_demographics()
-                st.success("✅ Data preprocessing completed!")
+                self.get_rollups()
+                self.get_rider_profiles()
+                self.get_quality_report()
+                self.sink.success("✅ Data preprocessing completed!")
+                if data_file:
+                    self._persist_store(data_file)
             else:
-                st.warning("⚠️ No trips data loaded")
+                self.sink.warning("⚠️ No trips data loaded")
             return True
         except Exception as e:
-            st.error(f"❌ Error loading data: {str(e)}")
+            self.sink.error(f"❌ Error loading data: {str(e)}")
+            return False
+    
+    def save_store(self, directory: str) -> str:
+        """Write the preprocessed trips and demographics to a memory-mappable columnar store"""
+        if self.trips_data is None:
+            raise ValueError("No trips data to store")
+        path = write_store(directory, {"trips": self.trips_data, "users": self.users_data,
+                                       "checkins": self.checkins_data})
+        self.sink.success(f"✅ Saved {len(self.trips_data)} trips to {path}")
+        return path
+    
+    def _store_path(self, data_file: str) -> Optional[str]:
+        """Store directory for a source file's current contents, or None when caching is off"""
+        if not self.store_dir:
+            return None
+        return os.path.join(self.store_dir, source_fingerprint(data_file, PREPROCESS_VERSION))
+    
+    def _persist_store(self, data_file: str):
+        """Cache the preprocessed frames for the next load; failures only cost the next parse"""
+        store_path = self._store_path(data_file)
+        if not store_path:
+            return
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            write_store(store_path, {"trips": self.trips_data, "users": self.users_data,
+                                     "checkins": self.checkins_data},
+                        {"source": os.path.abspath(data_file), "preprocess_version": PREPROCESS_VERSION})
+            self._prune_stores(data_file, keep=store_path)
+        except Exception as e:
+            self.sink.warning(f"⚠️ Could not cache trip store: {str(e)}")
+    
+    def _prune_stores(self, data_file: str, keep: str):
+        """Remove stores built from older versions of the same source file"""
+        import shutil
+        source = os.path.abspath(data_file)
+        for name in os.listdir(self.store_dir):
+            path = os.path.join(self.store_dir, name)
+            if os.path.abspath(path) == os.path.abspath(keep):
+                continue
+            manifest = read_manifest(path)
+            if manifest is not None and manifest["metadata"].get("source") == source:
+                shutil.rmtree(path, ignore_errors=True)
+    
+    def load_store(self, directory: str) -> bool:
+        """Map a store written by save_store; columns (and string codes) are shared file pages"""
+        try:
+            tables, _ = open_store(directory)
+        except Exception as e:
+            self.sink.error(f"❌ Error opening trip store: {str(e)}")
             return False
+        self.users_data = tables.get("users")
+        self.checkins_data = tables.get("checkins")
+        self.trips_data = tables.get("trips")
+        if self.trips_data is not None:
+            # Stores written before preprocess version 6 carry internal index columns
+            self.trips_data = self.trips_data.drop(columns=list(LEGACY_INTERNAL_COLUMNS), errors="ignore")
+        self.get_rollups()
+        self.get_rider_profiles()
+        self.get_quality_report()
+        self.sink.info(f"✅ Mapped {len(self.trips_data)} trips from {directory}")
+        return True
     
     def _preprocess_data(self):
         """Preprocess the loaded data"""
         if self.trips_data is not None:
             # Map actual Fetii column names to expected names
             self._map_fetii_columns()
-            
-            # Convert datetime columns
-            if 'pickup_time' in self.trips_data.columns:
-                self.trips_data['pickup_time'] = pd.to_datetime(self.trips_data['pickup_time'])
-            if 'dropoff_time' in self.trips_data.columns:
-                self.trips_data['dropoff_time'] = pd.to_datetime(self.trips_data['dropoff_time'])
-            if 'date' in self.trips_data.columns:
-                self.trips_data['date'] = pd.to_datetime(self.trips_data['date'])
-            
-            # Extract additional features
-            if 'pickup_time' in self.trips_data.columns:
-                self.trips_data['hour'] = self.trips_data['pickup_time'].dt.hour
-                self.trips_data['day_of_week'] = self.trips_data['pickup_time'].dt.day_name()
-                self.trips_data['month'] = self.trips_data['pickup_time'].dt.month
-                self.trips_data['year'] = self.trips_data['pickup_time'].dt.year
-            
-            # Create trip duration
-            if 'pickup_time' in self.trips_data.columns and 'dropoff_time' in self.trips_data.columns:
-                self.trips_data['trip_duration'] = (
-                    self.trips_data['dropoff_time'] - self.trips_data['pickup_time']
-                ).dt.total_seconds() / 60  # in minutes
+            self.trips_data = self._derive_trip_features(self.trips_data)
+    
+    def _derive_trip_features(self, trips: pd.DataFrame) -> pd.DataFrame:
+        """Parse timestamps and add the derived time columns to mapped trips"""
+        # Convert datetime columns
+        if 'pickup_time' in trips.columns:
+            trips['pickup_time'] = pd.to_datetime(trips['pickup_time'])
+        if 'dropoff_time' in trips.columns:
+            trips['dropoff_time'] = pd.to_datetime(trips['dropoff_time'])
+        if 'date' in trips.columns:
+            trips['date'] = pd.to_datetime(trips['date'])
+        
+        # Keep trips in pickup order so month partitions are contiguous row ranges
+        if 'pickup_time' in trips.columns:
+            trips = trips.sort_values('pickup_time', kind='stable').reset_index(drop=True)
+        
+        # Extract additional features
+        if 'pickup_time' in trips.columns:
+            trips['hour'] = trips['pickup_time'].dt.hour
+            trips['day_of_week'] = trips['pickup_time'].dt.day_name()
+            trips['month'] = trips['pickup_time'].dt.month
+            trips['year'] = trips['pickup_time'].dt.year
+        
+        # Create trip duration
+        if 'pickup_time' in trips.columns and 'dropoff_time' in trips.columns:
+            trips['trip_duration'] = (
+                trips['dropoff_time'] - trips['pickup_time']
+            ).dt.total_seconds() / 60  # in minutes
+        return trips
     
     def _map_fetii_columns(self):
         """Map Fetii dataset column names to expected names"""
@@ -201,6 +373,16 @@ class FetiiDataProcessor:
             
             if user_column_mapping:
                 self.users_data = self.users_data.rename(columns=user_column_mapping)
+        
+        if self.checkins_data is not None:
+            checkin_column_mapping = {}
+            for col in self.checkins_data.columns:
+                col_lower = col.lower().strip()
+                if col_lower == 'trip id':
+                    checkin_column_mapping[col] = 'trip_id'
+                elif col_lower == 'user id':
+                    checkin_column_mapping[col] = 'user_id'
+            self.checkins_data = self.checkins_data.rename(columns=checkin_column_mapping)
     
     def _categorize_age(self, age):
         """Categorize age into age groups"""
@@ -220,21 +402,258 @@ class FetiiDataProcessor:
             return "55+"
     
     def _merge_trips_with_demographics(self):
-        """Merge trips data with user demographics to enable age-based analysis"""
+        """Attach user demographics to trips to enable age-based analysis"""
         if self.trips_data is not None and self.users_data is not None:
-            # Merge trips with user demographics based on user_id
-            self.trips_data = self.trips_data.merge(
-                self.users_data[['user_id', 'age', 'age_group']], 
-                on='user_id', 
-                how='left'
-            )
+            self.trips_data = self._gather_demographics(self.trips_data, UserDirectory(self.users_data))
+    
+    def _gather_demographics(self, trips: pd.DataFrame, directory: UserDirectory) -> pd.DataFrame:
+        """Add age and age_group by array gather from the directory instead of a merge"""
+        if 'user_id' not in trips.columns:
+            return trips
+        codes = directory.codes(trips['user_id'].to_numpy())
+        columns = [col for col in ['age', 'age_group'] if col in directory.attributes]
+        return trips.assign(**directory.gather(codes, columns))
+    
+    def get_user_directory(self) -> Optional[UserDirectory]:
+        """Dense user codes and demographics arrays for the current data"""
+        if self.users_data is None or 'user_id' not in self.users_data.columns:
+            return None
+        return self._cached("user_directory", lambda: UserDirectory(self.users_data))
+    
+    def reload_demographics(self, users_data: pd.DataFrame) -> None:
+        """Swap in new demographics; trips only get their age columns regathered"""
+        self.users_data = users_data
+        self._map_fetii_columns()
+        if self.trips_data is not None and self.users_data is not None:
+            self.trips_data = self._gather_demographics(self.trips_data, UserDirectory(self.users_data))
+    
+    def append_trips(self, new_trips: pd.DataFrame) -> int:
+        """Append trips (already in mapped column names), keeping order, derived columns and rollups current"""
+        if new_trips is None or new_trips.empty:
+            return 0
+        new_trips = self._derive_trip_features(new_trips.copy())
+        directory = self.get_user_directory()
+        if directory is not None and 'age' not in new_trips.columns:
+            new_trips = self._gather_demographics(new_trips, directory)
+        
+        # Replacing the frame clears the cache; carry incremental structures over and fold in only the new rows
+        with self._lock:
+            incremental = {key: self._cache[key] for key in ("rollups", "distinct_counter", "metric_cube") if key in self._cache}
+        if self.trips_data is None:
+            combined = new_trips
+        else:
+            combined = pd.concat([self.trips_data, new_trips], ignore_index=True)
+            if 'pickup_time' in combined.columns:
+                combined = combined.sort_values('pickup_time', kind='stable').reset_index(drop=True)
+        self.trips_data = combined
+        for key, structure in incremental.items():
+            structure.append(new_trips)
+            with self._lock:
+                self._cache[key] = structure
+        return len(new_trips)
+    
+    def get_rollups(self) -> Optional[TripRollups]:
+        """Day/week/month rollup tables for the current data"""
+        if self.trips_data is None:
+            return None
+        return self._cached("rollups", lambda: TripRollups(self.trips_data))
+    
+    def get_distinct_counter(self) -> Optional[DistinctCounter]:
+        """Distinct-count sketches per (day, age group, hour) cell for the current data"""
+        if self.trips_data is None:
+            return None
+        return self._cached("distinct_counter", lambda: DistinctCounter(self.trips_data))
+    
+    def get_metric_cube(self) -> Optional[MetricCube]:
+        """Group size and trip duration summaries per (age group, day of week, hour) cell"""
+        if self.trips_data is None:
+            return None
+        return self._cached("metric_cube", lambda: MetricCube(self.trips_data))
+    
+    def get_quality_report(self) -> Dict[str, Dict[str, Any]]:
+        """Data quality profile of the trips and users tables for the current data version"""
+        return self._cached("quality_report", lambda: build_quality_report({"trips": self.trips_data, "users": self.users_data}))
+    
+    def get_analytics_snapshot(self) -> Dict[str, Any]:
+        """Analytics dashboard metrics and figure JSON for the current data version"""
+        return self._cached("analytics_snapshot", lambda: build_analytics_snapshot(self))
+    
+    @staticmethod
+    def _map_zoom(zoom: Optional[int]) -> Optional[int]:
+        """Clamp a requested zoom so caches hold at most one entry per layer and zoom level"""
+        return None if zoom is None else int(np.clip(zoom, MIN_ZOOM, MAX_ZOOM))
+    
+    def get_map_bins(self, layer: str = "pickup", zoom: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Trips and average group size per map grid cell; zoom None fits the data extent"""
+        if self.trips_data is None or layer not in MAP_LAYERS or not set(MAP_LAYERS[layer]) <= set(self.trips_data.columns):
+            return None
+        zoom = self._map_zoom(zoom)
+        return self._cached(f"map_bins:{layer}:{zoom}", lambda: bin_trips(self.trips_data, layer, zoom))
+    
+    def get_map_figure(self, layer: str = "pickup", zoom: Optional[int] = None) -> Optional[str]:
+        """Binned map figure JSON; its size grows with occupied cells, not trips"""
+        bins = self.get_map_bins(layer, zoom)
+        if bins is None:
+            return None
+        return self._cached(f"map_figure:{layer}:{self._map_zoom(zoom)}", lambda: binned_map_figure(bins).to_json())
+    
+    def get_trip_riders(self) -> Optional[TripRiders]:
+        """CSR trip -> checked-in riders structure, aligned to the current trip rows"""
+        if self.trips_data is None or self.checkins_data is None or 'trip_id' not in self.trips_data.columns:
+            return None
+        if not {'trip_id', 'user_id'} <= set(self.checkins_data.columns):
+            return None
+        return self._cached("trip_riders", lambda: TripRiders(self.trips_data['trip_id'].to_numpy(), self.checkins_data))
+    
+    def get_trip_rider_mix(self) -> Optional[pd.DataFrame]:
+        """Per trip: checked-in riders, their mean age and how many fall in each age group"""
+        trip_riders = self.get_trip_riders()
+        directory = self.get_user_directory()
+        if trip_riders is None or directory is None or 'age_group' not in directory.attributes:
+            return None
+        return self._cached("trip_rider_mix", lambda: trip_riders.age_mix(directory, AGE_GROUPS).set_index(self.trips_data.index))
+    
+    def get_rider_profiles(self) -> Optional[RiderProfiles]:
+        """Per-rider profile table, built once per data version"""
+        if self.trips_data is None:
+            return None
+        return self._cached("rider_profiles", lambda: RiderProfiles(self.trips_data))
+    
+    def get_rider_profile(self, user_id) -> Dict[str, Any]:
+        """Trips, first/last ride, average group size, top destinations and typical hours for one rider"""
+        profiles = self.get_rider_profiles()
+        profile = profiles.lookup(user_id) if profiles is not None else None
+        if profile is None:
+            return {"error": f"No trips found for rider {user_id}"}
+        return profile
     
-    def get_trips_by_destination(self, destination: str, month: int = None) -> pd.DataFrame:
-        """Get trips to a specific destination"""
+    def get_most_frequent_riders(self, limit: int = 10) -> pd.DataFrame:
+        """Riders with the most trips, with their profiles"""
+        profiles = self.get_rider_profiles()
+        if profiles is None:
+            return pd.DataFrame()
+        return pd.DataFrame(profiles.most_frequent(limit))
+    
+    def count_distinct(self, metric: str, filters: Dict[str, Any] = None, start=None, end=None,
+                       exact: Optional[bool] = None) -> int:
+        """Distinct riders or destinations for the filters and [start, end) days; approximate unless exact"""
+        if self.trips_data is None:
+            return 0
+        if metric not in DISTINCT_METRICS:
+            raise ValueError(f"Unknown metric {metric!r}; expected one of {list(DISTINCT_METRICS)}")
+        exact = self.exact_distinct if exact is None else exact
+        if not exact:
+            return self.get_distinct_counter().count(metric, filters, start, end)
+        
+        column = next((col for col in DISTINCT_METRICS[metric] if col in self.trips_data.columns), None)
+        if column is None:
+            return 0
+        if start is not None:
+            start = pd.Timestamp(start).normalize()
+        data = self.get_trips_in_window(start, end)
+        filters = filters or {}
+        if filters.get('age_group') and 'age_group' in data.columns:
+            data = data[data['age_group'] == filters['age_group']]
+        if filters.get('day_of_week') and 'day_of_week' in data.columns:
+            data = data[data['day_of_week'].str.lower() == filters['day_of_week'].lower()]
+        if filters.get('time_period') in TIME_PERIOD_HOURS and 'hour' in data.columns:
+            low, high = TIME_PERIOD_HOURS[filters['time_period']]
+            data = data[(data['hour'] >= low) & (data['hour'] < high)]
+        return int(data[column].nunique())
+    
+    def get_time_partitions(self) -> Optional[TimePartitions]:
+        """Month partitions over pickup_time for the current data version"""
+        if self.trips_data is None or 'pickup_time' not in self.trips_data.columns:
+            return None
+        return self._cached("time_partitions", lambda: TimePartitions(self.trips_data['pickup_time']))
+    
+    def get_time_bounds(self) -> Optional[tuple]:
+        """(earliest, latest) pickup time, read from the partition metadata"""
+        partitions = self.get_time_partitions()
+        if partitions is None or not partitions.partitions:
+            return None
+        return partitions.partitions[0]["min"], partitions.partitions[-1]["max"]
+    
+    def get_rolling_trip_counts(self, bucket: str = "day", window: int = 1) -> pd.Series:
+        """Trips per day/week/month, optionally summed over a trailing window of buckets"""
+        partitions = self.get_time_partitions()
+        if partitions is None:
+            return pd.Series(dtype="int64")
+        return partitions.rolling_counts(bucket, window)
+    
+    def get_trips_in_window(self, start=None, end=None) -> pd.DataFrame:
+        """Trips picked up in [start, end), reading only the partitions that overlap the window"""
         if self.trips_data is None:
             return pd.DataFrame()
+        partitions = self.get_time_partitions()
+        if partitions is None:
+            return self.trips_data
+        return self.trips_data.iloc[partitions.positions(start, end)]
+    
+    def query_trip_rows(self, start=None, end=None, filters: Dict[str, Any] = None,
+                        sort_by: str = None, ascending: bool = True) -> np.ndarray:
+        """Row positions in [start, end) matching the column filters, in sort order.
         
-        filtered_data = self.trips_data.copy()
+        The window is a partition binary search and filters only read the rows inside it; results are
+        kept for recent queries so paging through them does not repeat the work."""
+        if self.trips_data is None:
+            return np.array([], dtype=np.int64)
+        key = (str(start), str(end), repr(sorted((filters or {}).items())), sort_by, ascending)
+        queries = self._cached("trip_queries", OrderedDict)
+        with self._lock:
+            if key in queries:
+                queries.move_to_end(key)
+                return queries[key]
+        
+        partitions = self.get_time_partitions()
+        if partitions is None or (start is None and end is None):
+            rows = np.arange(len(self.trips_data))
+        else:
+            selector = partitions.positions(start, end)
+            rows = np.arange(selector.start, selector.stop) if isinstance(selector, slice) else selector
+        rows = filter_rows(self.trips_data, rows, filters)
+        rows = sort_rows(self.trips_data, rows, sort_by, ascending,
+                         time_sorted=partitions is not None and partitions.order is None)
+        
+        with self._lock:
+            queries[key] = rows
+            queries.move_to_end(key)
+            if len(queries) > MAX_CACHED_QUERIES:
+                queries.popitem(last=False)
+        return rows
+    
+    def get_trip_page(self, page: int = 0, page_size: int = 50, **query) -> Dict[str, Any]:
+        """One page of a query_trip_rows() result with total and page counts"""
+        if self.trips_data is None:
+            return {"rows": pd.DataFrame(), "total": 0, "page": 0, "pages": 1, "page_size": page_size}
+        return page_of(self.trips_data, self.query_trip_rows(**query), page, page_size)
+    
+    def get_time_anchor(self) -> Optional[pd.Timestamp]:
+        """Reference "now" for relative dates: self.now if set, else the latest pickup time"""
+        if self.now is not None:
+            return pd.Timestamp(self.now)
+        bounds = self.get_time_bounds()
+        return bounds[1] if bounds else None
+    
+    def resolve_time_window(self, text: str) -> Optional[Dict[str, Any]]:
+        """Turn a phrase like "last month" or "in September" into a {label, start, end} window"""
+        return find_time_window(text, self.get_time_anchor())
+    
+    def get_trips_by_destination(self, destination: str, month: int = None,
+                                 start=None, end=None) -> pd.DataFrame:
+        """Get trips to a specific destination, optionally within a month or a [start, end) window"""
+        if self.trips_data is None:
+            return pd.DataFrame()
+        
+        # Prune to the requested partitions before scanning destination strings
+        partitions = self.get_time_partitions()
+        if partitions is not None and (start is not None or end is not None):
+            filtered_data = self.trips_data.iloc[partitions.positions(start, end)].copy()
+        elif partitions is not None and month:
+            filtered_data = self.trips_data.iloc[partitions.month_positions(month)].copy()
+            month = None
+        else:
+            filtered_data = self.trips_data.copy()
         
         # Filter by destination (case-insensitive)
         if 'dropoff_location' in filtered_data.columns:
@@ -313,7 +732,7 @@ class FetiiDataProcessor:
         
         # Get top destinations for this age group
         if 'dropoff_location' in filtered_data.columns:
-            return filtered_data['dropoff_location'].value_counts().head(10)
+            return value_counts(filtered_data['dropoff_location']).head(10)
         else:
             return pd.DataFrame()
     
@@ -322,7 +741,7 @@ class FetiiDataProcessor:
         if self.trips_data is None or 'dropoff_location' not in self.trips_data.columns:
             return pd.DataFrame()
         
-        result = self.trips_data['dropoff_location'].value_counts().head(limit)
+        result = value_counts(self.trips_data['dropoff_location']).head(limit)
         return result
     
     def get_hourly_distribution(self, day_of_week: str = None) -> pd.DataFrame:
@@ -339,48 +758,71 @@ class FetiiDataProcessor:
         
         return filtered_data['hour'].value_counts().sort_index()
     
+    def _chart_series(self, chart_type: str, data: pd.DataFrame) -> pd.DataFrame:
+        """Reduce chart input to the two plotted columns, named as the chart labels them"""
+        if isinstance(data, pd.Series):
+            # Convert Series to DataFrame for consistent handling
+            return pd.DataFrame({'category': data.index, 'value': data.to_numpy()}).dropna()
+        
+        # Rows with a missing value in any column are left out, as before
+        complete = data.notna().all(axis=1).to_numpy()
+        x_name = 'category' if 'category' in data.columns else (data.index.name or 'index')
+        y_name = 'value' if 'value' in data.columns else str(data.columns[0])
+        if x_name == y_name:
+            y_name = f"{y_name}_value"
+        x = data['category'] if 'category' in data.columns else data.index
+        y = data['value'] if 'value' in data.columns else data.iloc[:, 0]
+        series = pd.DataFrame({x_name: np.asarray(x)[complete], y_name: np.asarray(y)[complete]})
+        if chart_type == "pie":
+            # Pie slices with the same name are summed by plotly anyway
+            series = series.groupby(x_name, sort=False, as_index=False)[y_name].sum()
+        return series
+    
     def create_visualization(self, chart_type: str, data: pd.DataFrame, **kwargs) -> go.Figure:
         """Create various types of visualizations"""
+        return pio.from_json(self.create_visualization_json(chart_type, data, **kwargs))
+    
+    def create_visualization_json(self, chart_type: str, data: pd.DataFrame, **kwargs) -> str:
+        """Plotly figure JSON for a chart, cached by chart type, plotted data and labels"""
         if data.empty:
-            return go.Figure()
+            return EMPTY_FIGURE_JSON
         
         try:
-            # Ensure data is properly formatted
-            if isinstance(data, pd.Series):
-                # Convert Series to DataFrame for consistent handling
-                df = data.reset_index()
-                df.columns = ['category', 'value']
-            else:
-                df = data.copy()
-            
-            # Remove any NaN values
-            df = df.dropna()
-            
+            df = self._chart_series(chart_type, data)
             if df.empty:
-                return go.Figure()
-                return go.Figure()
+                return EMPTY_FIGURE_JSON
+            
+            fingerprint = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+            fingerprint.update(str(list(df.dtypes)).encode("utf-8"))
+            key = (chart_type, list(df.columns)[0], list(df.columns)[1], fingerprint.hexdigest(),
+                   json.dumps(kwargs, sort_keys=True, default=str))
+            with self._lock:
+                if key in self._figure_cache:
+                    self._figure_cache.move_to_end(key)
+                    return self._figure_cache[key]
             
+            x_name, y_name = df.columns
             if chart_type == "bar":
                 fig = px.bar(
                     df, 
-                    x='category' if 'category' in df.columns else df.index,
-                    y='value' if 'value' in df.columns else df.iloc[:, 0],
+                    x=x_name,
+                    y=y_name,
                     title=kwargs.get('title', 'Chart'),
                     labels={'x': kwargs.get('x_label', 'Category'), 'y': kwargs.get('y_label', 'Count')}
                 )
             elif chart_type == "line":
                 fig = px.line(
                     df, 
-                    x='category' if 'category' in df.columns else df.index,
-                    y='value' if 'value' in df.columns else df.iloc[:, 0],
+                    x=x_name,
+                    y=y_name,
                     title=kwargs.get('title', 'Chart'),
                     labels={'x': kwargs.get('x_label', 'Category'), 'y': kwargs.get('y_label', 'Count')}
                 )
             elif chart_type == "pie":
                 fig = px.pie(
                     df,
-                    values='value' if 'value' in df.columns else df.iloc[:, 0],
-                    names='category' if 'category' in df.columns else df.index,
+                    values=y_name,
+                    names=x_name,
                     title=kwargs.get('title', 'Chart')
                 )
             else:
@@ -392,10 +834,16 @@ class FetiiDataProcessor:
                 margin=dict(l=20, r=20, t=40, b=20)
             )
             
-            return fig
+            figure_json = fig.to_json()
+            with self._lock:
+                self._figure_cache[key] = figure_json
+                self._figure_cache.move_to_end(key)
+                if len(self._figure_cache) > MAX_CACHED_FIGURES:
+                    self._figure_cache.popitem(last=False)
+            return figure_json
             
         except Exception as e:
-            st.error(f"Visualization error: {str(e)}")
+            self.sink.error(f"Visualization error: {str(e)}")
             # Return a simple text-based visualization instead
             fig = go.Figure()
             fig.add_annotation(
@@ -404,7 +852,7 @@ class FetiiDataProcessor:
                 x=0.5, y=0.5, showarrow=False,
                 font=dict(size=16)
             )
-            return fig
+            return fig.to_json()
     
     def get_data_summary(self) -> Dict[str, Any]:
         """Get summary statistics of the data"""
@@ -436,12 +884,10 @@ class FetiiDataProcessor:
                 "end": self.trips_data['pickup_time'].max()
             }
         else:
-            st.warning(f"⚠️ No date column found. Available columns: {list(self.trips_data.columns)}")
+            self.sink.warning(f"⚠️ No date column found. Available columns: {list(self.trips_data.columns)}")
         
-        if 'Drop Off Address' in self.trips_data.columns:
-            summary["unique_destinations"] = self.trips_data['Drop Off Address'].nunique()
-        elif 'dropoff_location' in self.trips_data.columns:
-            summary["unique_destinations"] = self.trips_data['dropoff_location'].nunique()
+        summary["unique_destinations"] = self.count_distinct("destinations")
+        summary["unique_riders"] = self.count_distinct("riders")
         
         if 'Total Passengers' in self.trips_data.columns:
             summary["average_group_size"] = round(self.trips_data['Total Passengers'].mean(), 2)
@@ -498,7 +944,7 @@ class FetiiDataProcessor:
             return pd.DataFrame()
         
         # Count destinations
-        dest_counts = filtered_data[dest_col].value_counts().head(limit)
+        dest_counts = value_counts(filtered_data[dest_col]).head(limit)
         
         result = pd.DataFrame({
             'destination': dest_counts.index,
@@ -597,7 +1043,7 @@ class FetiiDataProcessor:
             analysis['hourly_distribution'] = data['hour'].value_counts().to_dict()
         
         if 'day_of_week' in data.columns:
-            analysis['daily_distribution'] = data['day_of_week'].value_counts().to_dict()
+            analysis['daily_distribution'] = value_counts(data['day_of_week']).to_dict()
         
         # Add destination analysis
         dest_col = None
@@ -607,7 +1053,7 @@ class FetiiDataProcessor:
                 break
         
         if dest_col:
-            analysis['top_destinations'] = data[dest_col].value_counts().head(10).to_dict()
+            analysis['top_destinations'] = value_counts(data[dest_col]).head(10).to_dict()
         
         # Add group size analysis
         group_col = None
@@ -627,15 +1073,17 @@ class FetiiDataProcessor:
         
         return analysis
     
-    def search_destinations(self, search_term: str, exact_match: bool = False) -> pd.DataFrame:
-        """Search for destinations using fuzzy matching or exact matching"""
+    def search_destinations(self, search_term: str, exact_match: bool = False,
+                            data: pd.DataFrame = None) -> pd.DataFrame:
+        """Search for destinations using fuzzy matching or exact matching, within `data` if given"""
         if self.trips_data is None:
             return pd.DataFrame()
+        trips = self.trips_data if data is None else data
         
         # Get destination column
         dest_col = None
         for col in ['Drop Off Address', 'dropoff_location', 'destination']:
-            if col in self.trips_data.columns:
+            if col in trips.columns:
                 dest_col = col
                 break
         
@@ -644,14 +1092,14 @@ class FetiiDataProcessor:
         
         if exact_match:
             # Exact match search
-            filtered_data = self.trips_data[
-                self.trips_data[dest_col].str.contains(search_term, case=False, na=False, regex=False)
+            filtered_data = trips[
+                trips[dest_col].str.contains(search_term, case=False, na=False, regex=False)
             ]
         else:
             # Fuzzy search - look for partial matches
             search_lower = search_term.lower()
-            filtered_data = self.trips_data[
-                self.trips_data[dest_col].str.contains(search_lower, case=False, na=False, regex=False)
+            filtered_data = trips[
+                trips[dest_col].str.contains(search_lower, case=False, na=False, regex=False)
             ]
         
         return filtered_data
@@ -661,15 +1109,23 @@ class FetiiDataProcessor:
         if self.trips_data is None:
             return {}
         
-        # Search for the destination
-        dest_data = self.search_destinations(destination)
+        # Resolve the time period up front and search only the trips inside that window
+        window = self.resolve_time_window(time_period) if time_period else None
+        scope = self.get_trips_in_window(window["start"], window["end"]) if window else None
+        dest_data = self.search_destinations(destination, data=scope)
         
         if dest_data.empty:
-            return {"found": False, "message": f"No trips found to {destination}"}
+            period = f" {describe_window(window)}" if window else ""
+            return {"found": False, "message": f"No trips found to {destination}{period}"}
         
         stats = {
             "found": True,
             "destination": destination,
+            "time_window": {
+                "label": window["label"],
+                "start": window["start"].strftime('%Y-%m-%d'),
+                "end": (window["end"] - pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+            } if window else None,
             "total_trips": len(dest_data),
             "total_passengers": 0,
             "average_group_size": 0,
@@ -706,28 +1162,18 @@ class FetiiDataProcessor:
             stats["min_group_size"] = dest_data[group_col].min()
             stats["max_group_size"] = dest_data[group_col].max()
         
-        # Time-based analysis
-        if 'Trip Date and Time' in dest_data.columns:
+        # Time-based analysis (the time window, if any, was applied before the search)
+        time_col = next((col for col in ['pickup_time', 'Trip Date and Time'] if col in dest_data.columns), None)
+        if time_col:
             try:
-                dest_data['datetime'] = pd.to_datetime(dest_data['Trip Date and Time'])
+                pickup_times = pd.to_datetime(dest_data[time_col])
                 stats["date_range"] = {
-                    "start": dest_data['datetime'].min().strftime('%Y-%m-%d'),
-                    "end": dest_data['datetime'].max().strftime('%Y-%m-%d')
+                    "start": pickup_times.min().strftime('%Y-%m-%d'),
+                    "end": pickup_times.max().strftime('%Y-%m-%d')
                 }
                 
                 # Monthly distribution
-                dest_data['month'] = dest_data['datetime'].dt.month
-                stats["monthly_distribution"] = dest_data['month'].value_counts().to_dict()
-                
-                # Filter by time period if specified
-                if time_period:
-                    if time_period.lower() == "last month":
-                        current_date = pd.Timestamp.now()
-                        last_month = current_date - pd.DateOffset(months=1)
-                        dest_data = dest_data[dest_data['datetime'] >= last_month]
-                        stats["total_trips"] = len(dest_data)
-                        stats["total_passengers"] = dest_data[group_col].sum() if group_col else 0
-                        stats["average_group_size"] = dest_data[group_col].mean() if group_col else 0
+                stats["monthly_distribution"] = pickup_times.dt.month.value_counts().to_dict()
                 
             except Exception as e:
                 stats["date_analysis_error"] = str(e)
@@ -738,7 +1184,7 @@ class FetiiDataProcessor:
         
         # Daily distribution
         if 'day_of_week' in dest_data.columns:
-            stats["daily_distribution"] = dest_data['day_of_week'].value_counts().to_dict()
+            stats["daily_distribution"] = value_counts(dest_data['day_of_week']).to_dict()
         
         return stats
     
@@ -758,100 +1204,79 @@ class FetiiDataProcessor:
         
         return self.trips_data[dest_col].dropna().unique().tolist()
     
+    def get_destination_index(self) -> DestinationIndex:
+        """Get the destination index for the current data version"""
+        return self._cached("destination_index", lambda: DestinationIndex(self.get_all_destinations()))
+    
     def search_similar_destinations(self, search_term: str, limit: int = 10) -> List[str]:
         """Find destinations similar to the search term"""
-        all_destinations = self.get_all_destinations()
-        search_lower = search_term.lower()
-        
-        # Find destinations that contain the search term
-        similar = [dest for dest in all_destinations 
-                  if search_lower in dest.lower()]
-        
-        # Sort by relevance (exact matches first, then partial matches)
-        similar.sort(key=lambda x: (
-            0 if search_lower in x.lower() else 1,
-            len(x)
-        ))
-        
-        return similar[:limit]
+        # Matches are ranked shortest first, i.e. closest to the search term
+        return self.get_destination_index().similar(search_term, limit)
     
     def analyze_group_size_patterns(self, filters: Dict[str, Any] = None) -> Dict[str, Any]:
         """Analyze group size patterns and distributions"""
         if self.trips_data is None:
             return {}
         
-        data = self.trips_data.copy()
+        # Statistics come from merged per-cell sketches rather than a scan of the filtered trips
+        cube = self.get_metric_cube()
+        if "group_size" not in cube.metrics:
+            return {"error": "No group size column found"}
+        summary = cube.summarize(filters)
+        sizes = summary["metrics"]["group_size"]
         
-        # Apply filters if provided
-        if filters:
-            if 'age_group' in filters and 'age_group' in data.columns:
-                data = data[data['age_group'] == filters['age_group']]
-            if 'day_of_week' in filters and 'day_of_week' in data.columns:
-                data = data[data['day_of_week'].str.lower() == filters['day_of_week'].lower()]
-            if 'time_period' in filters and 'hour' in data.columns:
-                if filters['time_period'] == 'morning':
-                    data = data[(data['hour'] >= 6) & (data['hour'] < 12)]
-                elif filters['time_period'] == 'afternoon':
-                    data = data[(data['hour'] >= 12) & (data['hour'] < 18)]
-                elif filters['time_period'] == 'evening':
-                    data = data[(data['hour'] >= 18) & (data['hour'] < 24)]
+        def as_size(value):
+            return int(value) if value is not None and float(value).is_integer() else value
         
-        group_col = None
-        for col in ['Total Passengers', 'group_size', 'passengers']:
-            if col in data.columns:
-                group_col = col
-                break
+        distribution = {as_size(size): count for size, count in sorted(sizes.histogram.items())}
         
-        if group_col is None:
-            return {"error": "No group size column found"}
+        def trips_between(low: float, high: float) -> int:
+            return sum(count for size, count in distribution.items() if low <= size <= high)
         
         analysis = {
-            "total_trips": len(data),
+            "total_trips": summary["rows"],
             "group_size_stats": {
-                "mean": data[group_col].mean(),
-                "median": data[group_col].median(),
-                "mode": data[group_col].mode().iloc[0] if not data[group_col].mode().empty else None,
-                "std": data[group_col].std(),
-                "min": data[group_col].min(),
-                "max": data[group_col].max(),
-                "q1": data[group_col].quantile(0.25),
-                "q3": data[group_col].quantile(0.75)
+                "mean": sizes.mean if sizes.count else float("nan"),
+                "median": sizes.quantile(0.5),
+                "mode": as_size(sizes.mode()),
+                "std": sizes.std,
+                "min": as_size(sizes.min),
+                "max": as_size(sizes.max),
+                "q1": sizes.quantile(0.25),
+                "q3": sizes.quantile(0.75)
             },
-            "group_size_distribution": data[group_col].value_counts().sort_index().to_dict(),
+            "group_size_distribution": distribution,
             "size_categories": {
-                "small_groups_1_3": len(data[data[group_col] <= 3]),
-                "medium_groups_4_6": len(data[(data[group_col] >= 4) & (data[group_col] <= 6)]),
-                "large_groups_7_10": len(data[(data[group_col] >= 7) & (data[group_col] <= 10)]),
-                "very_large_groups_11plus": len(data[data[group_col] >= 11])
+                "small_groups_1_3": trips_between(float("-inf"), 3),
+                "medium_groups_4_6": trips_between(4, 6),
+                "large_groups_7_10": trips_between(7, 10),
+                "very_large_groups_11plus": trips_between(11, float("inf"))
             }
         }
         
-        # Hourly group size patterns
-        if 'hour' in data.columns:
-            hourly_groups = data.groupby('hour')[group_col].agg(['mean', 'count']).reset_index()
-            analysis["hourly_group_patterns"] = {
-                "hours": hourly_groups['hour'].tolist(),
-                "avg_group_sizes": hourly_groups['mean'].tolist(),
-                "trip_counts": hourly_groups['count'].tolist()
+        if "trip_duration" in cube.metrics:
+            durations = summary["metrics"]["trip_duration"]
+            analysis["trip_duration_stats"] = {
+                "mean": durations.mean if durations.count else float("nan"),
+                "median": durations.quantile(0.5),
+                "std": durations.std,
+                "min": durations.min,
+                "max": durations.max,
+                "p90": durations.quantile(0.9)
             }
         
-        # Day of week group size patterns
-        if 'day_of_week' in data.columns:
-            daily_groups = data.groupby('day_of_week')[group_col].agg(['mean', 'count']).reset_index()
-            analysis["daily_group_patterns"] = {
-                "days": daily_groups['day_of_week'].tolist(),
-                "avg_group_sizes": daily_groups['mean'].tolist(),
-                "trip_counts": daily_groups['count'].tolist()
-            }
-        
-        # Age group correlations
-        if 'age_group' in data.columns:
-            age_groups = data.groupby('age_group')[group_col].agg(['mean', 'count']).reset_index()
-            analysis["age_group_correlations"] = {
-                "age_groups": age_groups['age_group'].tolist(),
-                "avg_group_sizes": age_groups['mean'].tolist(),
-                "trip_counts": age_groups['count'].tolist()
-            }
+        # Hourly, day of week and age group patterns from the per-dimension cell rollups
+        breakdowns = summary["breakdowns"]["group_size"]
+        for dimension, key, labels in [("hour", "hourly_group_patterns", "hours"),
+                                       ("day_of_week", "daily_group_patterns", "days"),
+                                       ("age_group", "age_group_correlations", "age_groups")]:
+            if dimension in breakdowns:
+                table = breakdowns[dimension]
+                analysis[key] = {
+                    labels: table.index.tolist(),
+                    "avg_group_sizes": table['mean'].tolist(),
+                    "trip_counts": table['count'].astype(int).tolist()
+                }
         
         return analysis
     
@@ -931,7 +1356,7 @@ class FetiiDataProcessor:
         
         analysis = {
             "total_trips": len(data),
-            "daily_distribution": data['day_of_week'].value_counts().to_dict(),
+            "daily_distribution": value_counts(data['day_of_week']).to_dict(),
             "most_popular_day": data['day_of_week'].mode().iloc[0] if not data['day_of_week'].mode().empty else None,
             "weekend_vs_weekday": {
                 "weekend_trips": len(data[data['day_of_week'].isin(['Saturday', 'Sunday'])]),
@@ -947,7 +1372,7 @@ class FetiiDataProcessor:
                 break
         
         if group_col:
-            daily_groups = data.groupby('day_of_week')[group_col].agg(['mean', 'count']).reset_index()
+            daily_groups = data.groupby('day_of_week', observed=True)[group_col].agg(['mean', 'count']).reset_index()
             analysis["daily_group_analysis"] = {
                 "days": daily_groups['day_of_week'].tolist(),
                 "avg_group_sizes": daily_groups['mean'].tolist(),
@@ -973,7 +1398,7 @@ class FetiiDataProcessor:
                 break
         
         if dest_col:
-            daily_destinations = data.groupby('day_of_week')[dest_col].apply(lambda x: x.value_counts().head(3).to_dict()).to_dict()
+            daily_destinations = data.groupby('day_of_week', observed=True)[dest_col].apply(lambda x: value_counts(x).head(3).to_dict()).to_dict()
             analysis["daily_destination_patterns"] = daily_destinations
         
         return analysis
@@ -1002,7 +1427,7 @@ class FetiiDataProcessor:
         
         analysis = {
             "total_trips": len(data),
-            "age_group_distribution": data['age_group'].value_counts().to_dict(),
+            "age_group_distribution": value_counts(data['age_group']).to_dict(),
             "most_common_age_group": data['age_group'].mode().iloc[0] if not data['age_group'].mode().empty else None
         }
         
@@ -1014,7 +1439,7 @@ class FetiiDataProcessor:
                 break
         
         if group_col:
-            age_groups = data.groupby('age_group')[group_col].agg(['mean', 'count', 'min', 'max']).reset_index()
+            age_groups = data.groupby('age_group', observed=True)[group_col].agg(['mean', 'count', 'min', 'max']).reset_index()
             analysis["age_group_group_sizes"] = {
                 "age_groups": age_groups['age_group'].tolist(),
                 "avg_group_sizes": age_groups['mean'].tolist(),
@@ -1026,7 +1451,7 @@ class FetiiDataProcessor:
             # Large group preferences by age
             large_groups = data[data[group_col] >= 6]
             if not large_groups.empty:
-                large_group_ages = large_groups['age_group'].value_counts().to_dict()
+                large_group_ages = value_counts(large_groups['age_group']).to_dict()
                 analysis["large_group_age_preferences"] = large_group_ages
         
         # Destination preferences by age group
@@ -1037,14 +1462,28 @@ class FetiiDataProcessor:
                 break
         
         if dest_col:
-            age_destinations = data.groupby('age_group')[dest_col].apply(lambda x: x.value_counts().head(3).to_dict()).to_dict()
+            age_destinations = data.groupby('age_group', observed=True)[dest_col].apply(lambda x: value_counts(x).head(3).to_dict()).to_dict()
             analysis["age_group_destination_preferences"] = age_destinations
         
         # Time patterns by age group
         if 'hour' in data.columns:
-            age_hours = data.groupby('age_group')['hour'].apply(lambda x: x.value_counts().head(3).to_dict()).to_dict()
+            age_hours = data.groupby('age_group', observed=True)['hour'].apply(lambda x: x.value_counts().head(3).to_dict()).to_dict()
             analysis["age_group_time_preferences"] = age_hours
         
+        # Every checked-in rider, not just the booking user
+        rider_mix = self.get_trip_rider_mix()
+        if rider_mix is not None:
+            rider_mix = rider_mix.loc[data.index]
+            groups = [col for col in rider_mix.columns if col not in ('checked_in_riders', 'riders_with_age', 'mean_rider_age')]
+            aged = rider_mix['riders_with_age'].sum()
+            analysis["checked_in_riders"] = {
+                "total_riders": int(rider_mix['checked_in_riders'].sum()),
+                "avg_riders_per_trip": rider_mix['checked_in_riders'].mean(),
+                "avg_rider_age": (rider_mix['mean_rider_age'] * rider_mix['riders_with_age']).sum() / aged if aged else None,
+                "age_group_distribution": {group: int(rider_mix[group].sum()) for group in groups if rider_mix[group].any()},
+                "trips_with_age_group": {group: int((rider_mix[group] > 0).sum()) for group in groups if rider_mix[group].any()}
+            }
+        
         return analysis
     
     def analyze_monthly_trends(self, filters: Dict[str, Any] = None) -> Dict[str, Any]:
@@ -1052,7 +1491,7 @@ class FetiiDataProcessor:
         if self.trips_data is None:
             return {}
         
-        data = self.trips_data.copy()
+        data = self.trips_data
         
         # Apply filters
         if filters:
@@ -1061,39 +1500,35 @@ class FetiiDataProcessor:
             if 'day_of_week' in filters and 'day_of_week' in data.columns:
                 data = data[data['day_of_week'].str.lower() == filters['day_of_week'].lower()]
         
-        # Convert to datetime if possible
-        if 'Trip Date and Time' in data.columns:
-            try:
-                data['datetime'] = pd.to_datetime(data['Trip Date and Time'])
-                data['month'] = data['datetime'].dt.month
-                data['month_name'] = data['datetime'].dt.month_name()
-                data['year'] = data['datetime'].dt.year
-            except:
-                return {"error": "Could not parse date column"}
-        else:
+        # Trend figures come from the monthly rollup; the shared one unless filters narrowed the rows
+        if not any(col in data.columns for col in ['pickup_time', 'Trip Date and Time']):
             return {"error": "No date column found"}
+        rollups = self.get_rollups() if data is self.trips_data else TripRollups(data, grains=["month"])
+        monthly = rollups.table("month")
+        by_month = monthly.groupby(monthly.index.month)[["trips", "passengers"]].sum()
+        month_names = {calendar.month_name[month]: int(count) for month, count in by_month["trips"].items()}
         
         analysis = {
             "total_trips": len(data),
-            "monthly_distribution": data['month'].value_counts().sort_index().to_dict(),
-            "monthly_names": data['month_name'].value_counts().to_dict(),
-            "yearly_distribution": data['year'].value_counts().sort_index().to_dict(),
-            "most_active_month": data['month_name'].mode().iloc[0] if not data['month_name'].mode().empty else None
+            "monthly_distribution": {int(month): int(count) for month, count in by_month["trips"].items()},
+            "monthly_names": dict(sorted(month_names.items(), key=lambda item: -item[1])),
+            "yearly_distribution": {
+                int(year): int(count) for year, count in monthly.groupby(monthly.index.year)["trips"].sum().items()
+            },
+            "most_active_month": max(month_names, key=month_names.get) if month_names else None,
+            "monthly_rollup": [
+                {"month": period.strftime('%Y-%m'), "trips": int(row.trips),
+                 "passengers": int(row.passengers), "riders": int(row.riders)}
+                for period, row in monthly.iterrows()
+            ]
         }
         
         # Group size trends by month
-        group_col = None
-        for col in ['Total Passengers', 'group_size', 'passengers']:
-            if col in data.columns:
-                group_col = col
-                break
-        
-        if group_col:
-            monthly_groups = data.groupby('month')[group_col].agg(['mean', 'count']).reset_index()
+        if not by_month.empty:
             analysis["monthly_group_trends"] = {
-                "months": monthly_groups['month'].tolist(),
-                "avg_group_sizes": monthly_groups['mean'].tolist(),
-                "trip_counts": monthly_groups['count'].tolist()
+                "months": [int(month) for month in by_month.index],
+                "avg_group_sizes": (by_month["passengers"] / by_month["trips"]).round(2).tolist(),
+                "trip_counts": by_month["trips"].astype(int).tolist()
             }
         
         # Destination trends by month
@@ -1103,8 +1538,8 @@ class FetiiDataProcessor:
                 dest_col = col
                 break
         
-        if dest_col:
-            monthly_destinations = data.groupby('month')[dest_col].apply(lambda x: x.value_counts().head(3).to_dict()).to_dict()
+        if dest_col and 'month' in data.columns:
+            monthly_destinations = data.groupby('month')[dest_col].apply(lambda x: value_counts(x).head(3).to_dict()).to_dict()
             analysis["monthly_destination_trends"] = monthly_destinations
         
         return analysis
@@ -0,0 +1,101 @@
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from trip_store import value_counts
+
+# (latitude, longitude) column pairs checked for valid coordinates
+COORDINATE_PAIRS = {
+    "pickup": ('pickup_latitude', 'pickup_longitude'),
+    "dropoff": ('dropoff_latitude', 'dropoff_longitude')
+}
+TOP_VALUES = 10
+
+
+def _column_kind(series: pd.Series) -> str:
+    """Numeric, categorical or other, as the explorer's column analysis classifies columns.
+
+    Excel loads give str columns and store loads give categoricals, so both count as categorical."""
+    dtype = series.dtype
+    if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+        return "numeric"
+    if isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype)) or dtype == object:
+        return "categorical"
+    return "other"
+
+
+def _iqr_outliers(series: pd.Series) -> int:
+    """Values outside 1.5 interquartile ranges of the quartiles"""
+    q1, q3 = series.quantile(0.25), series.quantile(0.75)
+    spread = 1.5 * (q3 - q1)
+    return int(((series < q1 - spread) | (series > q3 + spread)).sum())
+
+
+def _column_profile(series: pd.Series, missing: int) -> Dict[str, Any]:
+    kind = _column_kind(series)
+    profile = {"kind": kind, "dtype": str(series.dtype), "missing": missing, "unique": int(series.nunique())}
+    if kind == "numeric":
+        profile.update({
+            "min": series.min(),
+            "max": series.max(),
+            "mean": series.mean(),
+            "median": series.median(),
+            "outliers": _iqr_outliers(series)
+        })
+    elif kind == "categorical":
+        profile["top_values"] = value_counts(series).head(TOP_VALUES)
+    return profile
+
+
+def _coordinate_report(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Valid-coordinate counts and observed bounds for each latitude/longitude pair present"""
+    report = {}
+    for name, (lat_col, lon_col) in COORDINATE_PAIRS.items():
+        if lat_col not in frame.columns or lon_col not in frame.columns:
+            continue
+        lat, lon = frame[lat_col], frame[lon_col]
+        valid = lat.notna() & lon.notna() & lat.between(-90, 90) & lon.between(-180, 180)
+        report[name] = {
+            "valid": int(valid.sum()),
+            "invalid": int(len(frame) - valid.sum()),
+            "bounds": {
+                "min_latitude": lat[valid].min(), "max_latitude": lat[valid].max(),
+                "min_longitude": lon[valid].min(), "max_longitude": lon[valid].max()
+            }
+        }
+    return report
+
+
+def profile_frame(frame: pd.DataFrame) -> Dict[str, Any]:
+    """Quality report for one frame: nulls, duplicates, coordinate validity, outliers and per-column summaries"""
+    rows, columns = frame.shape
+    null_counts = frame.isnull().sum()
+    total_nulls = int(null_counts.sum())
+    duplicates = int(frame.duplicated().sum()) if rows else 0
+    numeric = frame.select_dtypes(include=[np.number])
+    coordinates = _coordinate_report(frame)
+
+    column_profiles = {col: _column_profile(frame[col], int(null_counts[col])) for col in frame.columns}
+    return {
+        "rows": rows,
+        "columns": list(frame.columns),
+        "dtypes": frame.dtypes,
+        "null_counts": null_counts,
+        "total_nulls": total_nulls,
+        "duplicate_rows": duplicates,
+        "completeness": (1 - total_nulls / (rows * columns)) * 100 if rows and columns else 100.0,
+        "uniqueness": (1 - duplicates / rows) * 100 if rows else 100.0,
+        # Share of rows with usable pickup coordinates
+        "validity": coordinates["pickup"]["valid"] / rows * 100 if rows and "pickup" in coordinates else 100.0,
+        "coordinates": coordinates,
+        "outliers": {col: profile["outliers"] for col, profile in column_profiles.items() if "outliers" in profile},
+        "describe": frame.describe() if rows else pd.DataFrame(),
+        "correlation": numeric.corr() if numeric.shape[1] > 1 and rows else None,
+        "column_profiles": column_profiles
+    }
+
+
+def build_quality_report(tables: Dict[str, Optional[pd.DataFrame]]) -> Dict[str, Dict[str, Any]]:
+    """Profile every non-empty table"""
+    return {name: profile_frame(frame) for name, frame in tables.items() if frame is not None and not frame.empty}
@@ -0,0 +1,66 @@
+import logging
+from typing import Optional
+
+
+class EventSink:
+    """Receives user-facing status messages from the analytics engine. The base class drops them."""
+
+    def info(self, message: str):
+        pass
+
+    def success(self, message: str):
+        pass
+
+    def warning(self, message: str):
+        pass
+
+    def error(self, message: str):
+        pass
+
+    def exception(self, error: Exception):
+        pass
+
+
+class LoggingSink(EventSink):
+    """Forward engine messages to the standard logging module (headless workers, scripts)"""
+
+    def __init__(self, logger: Optional[logging.Logger] = None):
+        self.logger = logger or logging.getLogger("fetii")
+
+    def info(self, message: str):
+        self.logger.info(message)
+
+    def success(self, message: str):
+        self.logger.info(message)
+
+    def warning(self, message: str):
+        self.logger.warning(message)
+
+    def error(self, message: str):
+        self.logger.error(message)
+
+    def exception(self, error: Exception):
+        self.logger.error("Unhandled error", exc_info=error)
+
+
+class StreamlitSink(EventSink):
+    """Render engine messages in the Streamlit UI; streamlit is only imported when this sink is used"""
+
+    def __init__(self):
+        import streamlit as st
+        self._st = st
+
+    def info(self, message: str):
+        self._st.info(message)
+
+    def success(self, message: str):
+        self._st.success(message)
+
+    def warning(self, message: str):
+        self._st.warning(message)
+
+    def error(self, message: str):
+        self._st.error(message)
+
+    def exception(self, error: Exception):
+        self._st.exception(error)
@@ -0,0 +1,135 @@
+import gzip
+import tempfile
+from typing import Dict, List, Any, Optional, BinaryIO, Iterator
+
+import numpy as np
+import pandas as pd
+
+EXPORT_CHUNK_ROWS = 10_000
+# format -> (mime type, file extension, extension when compressed)
+EXPORT_FORMATS = {
+    "csv": ("text/csv", ".csv", ".csv.gz"),
+    "xlsx": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", ".xlsx", ".xlsx"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet", ".parquet")
+}
+
+
+def parquet_available() -> bool:
+    """Parquet export needs pyarrow, which is optional"""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_file_name(stem: str, fmt: str, compress: bool = False) -> str:
+    _, extension, compressed_extension = EXPORT_FORMATS[fmt]
+    return stem + (compressed_extension if compress else extension)
+
+
+def export_mime(fmt: str, compress: bool = False) -> str:
+    return "application/gzip" if compress and fmt == "csv" else EXPORT_FORMATS[fmt][0]
+
+
+def iter_chunks(frame: pd.DataFrame, rows: Optional[np.ndarray] = None,
+                chunk_rows: int = EXPORT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """Frame slices of at most chunk_rows rows; mapped store columns are only read a chunk at a time"""
+    total = len(frame) if rows is None else len(rows)
+    for start in range(0, total, chunk_rows):
+        if rows is None:
+            yield frame.iloc[start:start + chunk_rows]
+        else:
+            yield frame.iloc[rows[start:start + chunk_rows]]
+
+
+def write_csv(out: BinaryIO, frame: pd.DataFrame, rows: Optional[np.ndarray] = None,
+              compress: bool = False, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """CSV (gzip-compressed if asked) written chunk by chunk"""
+    target = gzip.GzipFile(fileobj=out, mode="wb") if compress else out
+    try:
+        target.write(frame.iloc[:0].to_csv(index=False).encode("utf-8"))
+        for chunk in iter_chunks(frame, rows, chunk_rows):
+            target.write(chunk.to_csv(index=False, header=False).encode("utf-8"))
+    finally:
+        if compress:
+            target.close()
+
+
+def _excel_rows(chunk: pd.DataFrame) -> Iterator[tuple]:
+    """Plain Python row values, with missing values as empty cells like to_excel"""
+    values = chunk.astype(object)
+    return values.where(chunk.notna(), None).itertuples(index=False, name=None)
+
+
+def write_excel(out: BinaryIO, sheets: Dict[str, pd.DataFrame], rows: Optional[np.ndarray] = None,
+                chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Workbook with one sheet per frame; rows selects rows of the first sheet.
+
+    openpyxl's write-only mode streams each sheet's rows to disk instead of keeping cell objects."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    for i, (name, frame) in enumerate(sheets.items()):
+        sheet = workbook.create_sheet(name)
+        sheet.append([str(column) for column in frame.columns])
+        for chunk in iter_chunks(frame, rows if i == 0 else None, chunk_rows):
+            for row in _excel_rows(chunk):
+                sheet.append(row)
+    workbook.save(out)
+
+
+def _arrow_schema(frame: pd.DataFrame):
+    """Schema for the whole frame, so every chunk is written with the same column types"""
+    import pyarrow as pa
+
+    schema = pa.Schema.from_pandas(frame.iloc[:0], preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            # Object columns have no type until a value is seen; type them by their first value
+            values = frame[field.name].to_numpy()
+            present = pd.notna(values)
+            value_type = pa.infer_type([values[present.argmax()]]) if present.any() else pa.string()
+            schema = schema.set(i, field.with_type(value_type))
+    return schema
+
+
+def write_parquet(out: BinaryIO, frame: pd.DataFrame, rows: Optional[np.ndarray] = None,
+                  compress: bool = False, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Parquet with one row group per chunk (zstd if compressed, else snappy)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(frame)
+    with pq.ParquetWriter(out, schema, compression="zstd" if compress else "snappy") as writer:
+        for chunk in iter_chunks(frame, rows, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_export(out: BinaryIO, fmt: str, sheets: Dict[str, pd.DataFrame], rows: Optional[np.ndarray] = None,
+                 compress: bool = False, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """Write an export in fmt; CSV and Parquet hold only the first frame, Excel holds every frame as a sheet"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {sorted(EXPORT_FORMATS)}")
+    sheets = {name: frame for name, frame in sheets.items() if frame is not None}
+    if fmt == "xlsx":
+        write_excel(out, sheets, rows, chunk_rows)
+        return
+    frame = next(iter(sheets.values()))
+    if fmt == "csv":
+        write_csv(out, frame, rows, compress, chunk_rows)
+    else:
+        write_parquet(out, frame, rows, compress, chunk_rows)
+
+
+def export_to_file(fmt: str, sheets: Dict[str, pd.DataFrame], rows: Optional[np.ndarray] = None,
+                   compress: bool = False) -> BinaryIO:
+    """Write an export to an anonymous temporary file and return it rewound for reading"""
+    out = tempfile.TemporaryFile()
+    try:
+        write_export(out, fmt, sheets, rows, compress)
+    except Exception:
+        out.close()
+        raise
+    out.seek(0)
+    return out
@@ -0,0 +1,82 @@
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+# layer -> (latitude column, longitude column)
+MAP_LAYERS = {
+    "pickup": ('pickup_latitude', 'pickup_longitude'),
+    "dropoff": ('dropoff_latitude', 'dropoff_longitude')
+}
+# Named map detail levels (web-map zoom) offered in the UI; None fits the zoom to the data
+MAP_DETAIL_LEVELS = {"Auto": None, "City": 11, "Neighborhood": 13, "Street": 15}
+MIN_ZOOM, MAX_ZOOM = 3, 17
+# Screen size of one cell; cells never get smaller than this at the zoom they were binned for
+CELL_PIXELS = 16
+TILE_PIXELS = 256
+# Map width the fitted zoom is chosen for
+VIEWPORT_PIXELS = 800
+
+
+def _coordinates(trips: pd.DataFrame, layer: str):
+    """Latitude/longitude arrays of one layer, keeping only valid coordinates"""
+    lat_col, lon_col = MAP_LAYERS[layer]
+    lat = pd.to_numeric(trips[lat_col], errors="coerce").to_numpy(dtype=np.float64)
+    lon = pd.to_numeric(trips[lon_col], errors="coerce").to_numpy(dtype=np.float64)
+    valid = ~np.isnan(lat) & ~np.isnan(lon) & (np.abs(lat) <= 85) & (np.abs(lon) <= 180)
+    return lat, lon, valid
+
+
+def fit_zoom(lat: np.ndarray, lon: np.ndarray) -> int:
+    """Largest zoom at which the points' extent fits the viewport"""
+    if not len(lat):
+        return MIN_ZOOM
+    span = max(np.ptp(lon), np.ptp(lat) / max(np.cos(np.radians(np.mean(lat))), 0.1), 1e-6)
+    zoom = int(np.floor(np.log2(360 * VIEWPORT_PIXELS / (TILE_PIXELS * span))))
+    return int(np.clip(zoom, MIN_ZOOM, MAX_ZOOM))
+
+
+def cell_size(zoom: int) -> float:
+    """Longitude width in degrees of a cell spanning CELL_PIXELS at this zoom"""
+    return 360.0 / (TILE_PIXELS * 2 ** zoom) * CELL_PIXELS
+
+
+def bin_trips(trips: pd.DataFrame, layer: str = "pickup", zoom: Optional[int] = None) -> Dict[str, Any]:
+    """Aggregate one coordinate layer into a square grid: trips and average group size per cell.
+
+    Latitude steps shrink by cos(latitude) so cells render square on a web-mercator map."""
+    lat, lon, valid = _coordinates(trips, layer)
+    lat, lon = lat[valid], lon[valid]
+    zoom = fit_zoom(lat, lon) if zoom is None else int(np.clip(zoom, MIN_ZOOM, MAX_ZOOM))
+    center = {"lat": float(np.mean(lat)) if len(lat) else 0.0, "lon": float(np.mean(lon)) if len(lon) else 0.0}
+    lon_step = cell_size(zoom)
+    lat_step = lon_step * np.cos(np.radians(center["lat"]))
+
+    rows = np.floor(lat / lat_step).astype(np.int64)
+    cols = np.floor(lon / lon_step).astype(np.int64)
+    # One int64 key per cell: row-major offset within the points' bounding grid
+    row_min = rows.min() if len(rows) else 0
+    col_min = cols.min() if len(cols) else 0
+    width = (cols.max() - col_min + 1) if len(cols) else 1
+    cells, cell_of = np.unique((rows - row_min) * width + (cols - col_min), return_inverse=True)
+    counts = np.bincount(cell_of, minlength=len(cells))
+
+    frame = pd.DataFrame({
+        "latitude": (cells // width + row_min + 0.5) * lat_step,
+        "longitude": (cells % width + col_min + 0.5) * lon_step,
+        "trips": counts
+    })
+    if 'group_size' in trips.columns:
+        group_size = pd.to_numeric(trips['group_size'], errors="coerce").to_numpy(dtype=np.float64)[valid]
+        known = ~np.isnan(group_size)
+        sized = np.bincount(cell_of[known], minlength=len(cells))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            frame["avg_group_size"] = np.bincount(cell_of[known], weights=group_size[known], minlength=len(cells)) / sized
+    return {
+        "layer": layer,
+        "zoom": zoom,
+        "center": center,
+        "cell_size": lon_step,
+        "points": int(len(lat)),
+        "cells": frame
+    }
@@ -0,0 +1,114 @@
+"""
+Intent Parser Question Corpus
+Labelled questions with the slots parse_question should extract, over a small fixed destination list.
+Used by test_intent_parser.py (accuracy) and benchmark_intent_parser.py (timing).
+"""
+
+# Small fixed destination list so the corpus needs no Excel file
+DESTINATIONS = [
+    "Moody Center, 2001 Robert Dedman Dr, Austin, TX, USA",
+    "Moody Center",
+    "Austin-Bergstrom International Airport, Austin, TX, USA",
+    "The University of Texas at Austin, Austin, TX, USA",
+    "Zilker Park, Austin, TX, USA",
+    "Rainey Street Historic District, Austin, TX, USA",
+    "Cabo Bob's Burritos, Rio Grande Street, Austin, TX, USA",
+    "601 Brushy Street, Austin, TX, USA",
+]
+
+AIRPORT = "Austin-Bergstrom International Airport, Austin, TX, USA"
+ZILKER = "Zilker Park, Austin, TX, USA"
+
+
+def slots(destination=None, time_period=None, age_group=None, aggregate=None, open_ended=False):
+    """Expected value of every slot; unlisted slots must come back empty"""
+    return {"destination": destination, "time_period": time_period, "age_group": age_group,
+            "aggregate": aggregate, "open_ended": open_ended}
+
+
+# (question, expected slots, expected analysis fields); nested "filters" must match exactly
+QUESTION_CORPUS = [
+    ("How many groups went to the Moody Center last month?",
+     slots(destination="Moody Center", time_period="last month"),
+     {"type": "destination_search", "filters": {}}),
+    ("What are the top destinations for 18-24 year-olds on Saturday nights?",
+     slots(age_group="18-24", aggregate="top_destinations"),
+     {"type": "day_of_week_analysis", "visualization": "bar",
+      "filters": {"age_group": "18-24", "day_of_week": "Saturday", "time_period": "evening"}}),
+    # "austin" is a destination keyword; the shortest Austin destination wins
+    ("What time do large groups (6+) usually ride in Austin on Fridays?",
+     slots(destination=ZILKER),
+     {"type": "day_of_week_analysis", "visualization": "line",
+      "filters": {"day_of_week": "Friday", "location_keyword": "austin", "min_group_size": 6}}),
+    ("Show me the most popular destinations",
+     slots(aggregate="top_destinations"),
+     {"type": "top_destinations", "visualization": "bar", "filters": {}}),
+    ("What's the average group size for trips?",
+     slots(aggregate="average_group_size"),
+     {"type": "group_size_analysis", "filters": {}}),
+    ("When is the busiest time for rideshares?",
+     slots(aggregate="busiest_hour"),
+     {"type": "general", "visualization": "line", "filters": {}}),
+    ("What are the peak hours?",
+     slots(),
+     {"type": "hourly_analysis", "visualization": "line", "filters": {}}),
+    ("Show monthly trends",
+     slots(),
+     {"type": "monthly_analysis", "filters": {}}),
+    ("How do weekend trips compare to weekday trips?",
+     slots(open_ended=True),
+     {"type": "day_of_week_analysis", "filters": {}}),
+    ("What is the share of small groups?",
+     slots(),
+     {"type": "general", "visualization": "pie", "filters": {"max_group_size": 3}}),
+    ("Show a map of pickup locations",
+     slots(),
+     {"type": "general", "visualization": "scatter", "filters": {}}),
+    ("How many trips to the airport this week?",
+     slots(destination=AIRPORT, time_period="this week"),
+     {"type": "destination_search"}),
+    ("Afternoon trips for 35 to 44 year olds",
+     slots(age_group="35-44"),
+     {"type": "age_group_analysis", "filters": {"age_group": "35-44", "time_period": "afternoon"}}),
+    # The free-text "in ..." pattern picks up the part of day as a destination
+    ("What about 45+ riders in the evening?",
+     slots(destination="the evening", age_group="45+"),
+     {"type": "age_group_analysis", "filters": {"age_group": "45+", "time_period": "evening"}}),
+    ("Which rankings of hours stand out?",
+     slots(),
+     {"type": "hourly_patterns", "filters": {}}),
+    ("Best drop-off locations on Sunday mornings",
+     slots(),
+     {"type": "day_of_week_analysis", "filters": {"day_of_week": "Sunday", "time_period": "morning"}}),
+    ("Is Zilker Park busy in the previous year?",
+     slots(destination=ZILKER, time_period="last year"),
+     {"type": "destination_search"}),
+    ("Top trips downtown with 6 or more riders",
+     slots(),
+     {"type": "general", "filters": {"location_keyword": "downtown", "min_group_size": 6}}),
+    ("Do riders stop for tacos on the way home?",
+     slots(),
+     {"type": "general", "visualization": "bar", "filters": {}}),
+    ("Give me the yearly ridership figures",
+     slots(),
+     {"type": "general", "filters": {}}),
+    ("What's the typical trip duration?",
+     slots(),
+     {"type": "general", "visualization": "line", "filters": {}}),
+    ("What share of demographics are older riders?",
+     slots(),
+     {"type": "age_group_analysis", "visualization": "pie", "filters": {}}),
+    ("What is the busiest day for 25-34 year olds?",
+     slots(age_group="25-34", aggregate="busiest_day"),
+     {"type": "age_group_analysis", "filters": {"age_group": "25-34"}}),
+    # Open-ended phrasing never takes the templated aggregate path
+    ("Explain the average group size for 25 to 34 year olds",
+     slots(age_group="25-34", open_ended=True),
+     {"type": "group_size_analysis", "filters": {"age_group": "25-34"}}),
+    ("Why are Saturday nights so busy?",
+     slots(open_ended=True),
+     {"type": "day_of_week_analysis", "filters": {"day_of_week": "Saturday", "time_period": "evening"}}),
+    ("Compare the Moody Center this month versus last month",
+     slots(destination="Moody Center", time_period="last month", open_ended=True),
+     {"type": "destination_search", "filters": {}}),
+]
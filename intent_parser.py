@@ -0,0 +1,296 @@
+import re
+from typing import Dict, List, Any, Optional, Tuple
+
+# Tokens are lowercase words, numbers, numeric ranges ("18-24") and open ranges ("6+")
+TOKEN_PATTERN = re.compile(r"\d+-\d+|\d+\+|\d+|[a-z]+")
+
+DAYS_OF_WEEK = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Destination keywords, in priority order, resolved against the destination index
+DESTINATION_KEYWORDS = [
+    "moody center", "moody", "center",
+    "downtown", "austin", "university", "campus",
+    "airport", "mall", "stadium", "theater",
+    "restaurant", "bar", "club", "hotel",
+    "park", "lake", "river", "bridge"
+]
+
+# Free-text destination patterns, tried in order when no keyword matches
+DESTINATION_PATTERNS = [
+    re.compile(r"\bwent to ([^?]+)"),
+    re.compile(r"\bgo to ([^?]+)"),
+    re.compile(r"\bvisiting ([^?]+)"),
+    re.compile(r"\bat ([^?]+)"),
+    re.compile(r"\bin ([^?]+)")
+]
+DESTINATION_PERIOD_CLEANUP = re.compile(r'\s+(last|this|next)\s+(month|week|year)')
+DESTINATION_NOISE_CLEANUP = re.compile(r'\s+(how many|groups|trips)')
+
+# Relative time periods, in priority order
+TIME_PERIODS = [
+    "last month", "this month", "last week", "this week",
+    "yesterday", "today", "last year", "this year"
+]
+
+# Priority order for each slot; the first value hit in the question wins
+AGE_GROUPS = ["18-24", "25-34", "35-44", "45+"]
+DAY_PERIODS = ["evening", "morning", "afternoon"]
+LOCATION_KEYWORDS = ["downtown", "austin"]
+VISUALIZATIONS = ["line", "pie", "bar", "scatter"]
+QUERY_TYPES = [
+    "group_size_analysis", "hourly_analysis", "day_of_week_analysis",
+    "age_group_analysis", "monthly_analysis", "top"
+]
+# Aggregates that can be answered exactly from the analysis helpers
+AGGREGATES = ["average_group_size", "busiest_hour", "busiest_day", "top_destinations"]
+
+
+def _build_phrase_table() -> Dict[Tuple[str, ...], List[Tuple[str, str]]]:
+    """Build the phrase -> [(slot, value)] table used by the single-pass scanner"""
+    entries = {
+        # Age groups
+        ("age_group", "18-24"): ["18-24", "18 to 24"],
+        ("age_group", "25-34"): ["25-34", "25 to 34"],
+        ("age_group", "35-44"): ["35-44", "35 to 44"],
+        ("age_group", "45+"): ["45+", "45 and up"],
+        # Part of day
+        ("day_period", "evening"): ["night", "nights", "tonight", "nightlife", "evening", "evenings", "late"],
+        ("day_period", "morning"): ["morning", "mornings", "early", "dawn"],
+        ("day_period", "afternoon"): ["afternoon", "afternoons", "midday"],
+        # Location keywords
+        ("location", "downtown"): ["downtown"],
+        ("location", "austin"): ["austin"],
+        # Group size
+        ("group_size", "large"): ["large group", "large groups", "6+", "6 or more"],
+        ("group_size", "small"): ["small group", "small groups", "1-3"],
+        # Visualization hints
+        ("visualization", "line"): [
+            "time", "times", "hour", "hours", "when", "schedule", "schedules",
+            "duration", "durations", "pattern", "patterns"
+        ],
+        ("visualization", "pie"): [
+            "distribution", "distributions", "percentage", "percentages",
+            "proportion", "proportions", "share"
+        ],
+        ("visualization", "bar"): ["top", "most", "popular", "best", "highest", "ranking", "rankings"],
+        ("visualization", "scatter"): ["map", "maps", "location", "locations", "geographic"],
+        # Analytical topics
+        ("topic", "group_size_analysis"): ["group size", "group sizes", "group distribution"],
+        ("topic", "hourly_analysis"): ["hourly", "peak hour", "peak hours", "time patterns", "when do"],
+        ("topic", "day_of_week_analysis"): [
+            "day of week", "day of the week", "days of the week",
+            "weekday", "weekdays", "weekend", "weekends"
+        ],
+        ("topic", "age_group_analysis"): [
+            "age group", "age groups", "demographics", "demographic",
+            "young", "younger", "youngest", "old", "older", "oldest",
+            "18-24", "18 to 24", "25-34", "25 to 34", "35-44", "35 to 44", "45+", "45 and up"
+        ],
+        ("topic", "monthly_analysis"): ["monthly", "seasonal", "over time", "trends"],
+        ("topic", "top"): ["top", "most popular", "best", "ranking", "rankings"],
+        # Qualifiers for the "top" topic
+        ("top_subject", "destination"): [
+            "destination", "destinations", "drop", "drops", "dropoff", "dropoffs",
+            "location", "locations"
+        ],
+        ("top_subject", "time"): ["time", "times", "hour", "hours"],
+        # Pure-aggregate questions
+        ("aggregate", "average_group_size"): [
+            "average group size", "avg group size", "mean group size", "typical group size",
+            "average number of passengers", "average passengers"
+        ],
+        ("aggregate", "busiest_hour"): [
+            "busiest hour", "busiest hours", "busiest time", "busiest times",
+            "peak hour", "peak time", "most popular hour", "most popular time"
+        ],
+        ("aggregate", "busiest_day"): [
+            "busiest day", "busiest days", "peak day", "most popular day"
+        ],
+        ("aggregate", "top_destinations"): [
+            "top destinations", "most popular destinations", "top drop off spots",
+            "top dropoff spots", "top drop offs", "top dropoffs"
+        ],
+        # Phrasing that needs the LLM rather than a template
+        ("open_ended", "yes"): [
+            "why", "explain", "compare", "comparison", "versus", "vs", "recommend",
+            "suggest", "should", "insight", "insights", "predict", "how come", "what if"
+        ],
+    }
+
+    for day in DAYS_OF_WEEK:
+        entries[("day", day.capitalize())] = [day, day + "s"]
+        entries.setdefault(("topic", "day_of_week_analysis"), []).extend([day, day + "s"])
+
+    for period in TIME_PERIODS:
+        synonyms = [period]
+        if period.startswith("last "):
+            synonyms.append("previous " + period[5:])
+        elif period.startswith("this "):
+            synonyms.append("current " + period[5:])
+        entries[("time_period", period)] = synonyms
+
+    for keyword in DESTINATION_KEYWORDS:
+        entries[("destination_keyword", keyword)] = [keyword]
+
+    table: Dict[Tuple[str, ...], List[Tuple[str, str]]] = {}
+    for (slot, value), phrases in entries.items():
+        for phrase in phrases:
+            key = tuple(TOKEN_PATTERN.findall(phrase))
+            table.setdefault(key, []).append((slot, value))
+    return table
+
+
+PHRASE_TABLE = _build_phrase_table()
+
+# Longest phrase (in tokens) the scanner needs to look ahead for
+MAX_PHRASE_TOKENS = max(len(key) for key in PHRASE_TABLE)
+
+
+def tokenize(question: str) -> List[str]:
+    """Split a question into lowercase tokens"""
+    return TOKEN_PATTERN.findall(question.lower())
+
+
+def scan_slots(tokens: List[str]) -> Dict[str, set]:
+    """Collect every (slot, value) hit in a single pass over the tokens"""
+    hits: Dict[str, set] = {}
+    count = len(tokens)
+    for i in range(count):
+        for n in range(1, min(MAX_PHRASE_TOKENS, count - i) + 1):
+            matches = PHRASE_TABLE.get(tuple(tokens[i:i + n]))
+            if matches:
+                for slot, value in matches:
+                    hits.setdefault(slot, set()).add(value)
+    return hits
+
+
+def _first(priority: List[str], values: Optional[set]) -> Optional[str]:
+    """Return the highest-priority value present in the hit set"""
+    if values:
+        for value in priority:
+            if value in values:
+                return value
+    return None
+
+
+class DestinationIndex:
+    """Pre-lowered destination list with precomputed keyword matches"""
+
+    def __init__(self, destinations: List[str]):
+        self.destinations = list(destinations)
+        self._lowered = [dest.lower() for dest in self.destinations]
+        self._best_matches: Dict[str, Optional[str]] = {}
+        for keyword in DESTINATION_KEYWORDS:
+            matches = self.similar(keyword, limit=1)
+            self._best_matches[keyword] = matches[0] if matches else None
+
+    def similar(self, search_term: str, limit: int = 10) -> List[str]:
+        """Destinations containing the search term, shortest first"""
+        search_lower = search_term.lower()
+        similar = [
+            dest for dest, lowered in zip(self.destinations, self._lowered)
+            if search_lower in lowered
+        ]
+        similar.sort(key=len)
+        return similar[:limit]
+
+    def best_match(self, keyword: str) -> Optional[str]:
+        """Most relevant destination for a known keyword"""
+        if keyword in self._best_matches:
+            return self._best_matches[keyword]
+        matches = self.similar(keyword, limit=1)
+        return matches[0] if matches else None
+
+
+def extract_destination(question_lower: str, hits: Dict[str, set],
+                        destination_index: Optional[DestinationIndex] = None) -> Optional[str]:
+    """Resolve the destination from keyword hits, falling back to free-text patterns"""
+    keywords = hits.get("destination_keyword")
+    if keywords and destination_index is not None:
+        for keyword in DESTINATION_KEYWORDS:
+            if keyword in keywords:
+                match = destination_index.best_match(keyword)
+                if match:
+                    return match
+
+    for pattern in DESTINATION_PATTERNS:
+        match = pattern.search(question_lower)
+        if match:
+            potential_dest = match.group(1).strip()
+            potential_dest = DESTINATION_PERIOD_CLEANUP.sub('', potential_dest)
+            potential_dest = DESTINATION_NOISE_CLEANUP.sub('', potential_dest)
+            if potential_dest and len(potential_dest) > 2:
+                return potential_dest
+
+    return None
+
+
+def extract_time_period(question: str) -> Optional[str]:
+    """Extract a relative time period such as "last month" from a question"""
+    return _first(TIME_PERIODS, scan_slots(tokenize(question)).get("time_period"))
+
+
+def parse_question(question: str, destination_index: Optional[DestinationIndex] = None) -> Dict[str, Any]:
+    """Extract query type, filters, destination and visualization from a question in one pass"""
+    question_lower = question.lower()
+    hits = scan_slots(TOKEN_PATTERN.findall(question_lower))
+
+    analysis = {
+        "type": "general",
+        "visualization": "bar",
+        "question": question,
+        "filters": {},
+        "destination_query": None,
+        "time_period": None,
+        "aggregate": None,
+        "open_ended": bool(hits.get("open_ended"))
+    }
+    filters = analysis["filters"]
+
+    destination = extract_destination(question_lower, hits, destination_index)
+    if destination:
+        analysis["destination_query"] = destination
+        analysis["type"] = "destination_search"
+
+    analysis["time_period"] = _first(TIME_PERIODS, hits.get("time_period"))
+
+    age_group = _first(AGE_GROUPS, hits.get("age_group"))
+    if age_group:
+        filters["age_group"] = age_group
+
+    day = _first([d.capitalize() for d in DAYS_OF_WEEK], hits.get("day"))
+    if day:
+        filters["day_of_week"] = day
+
+    day_period = _first(DAY_PERIODS, hits.get("day_period"))
+    if day_period:
+        filters["time_period"] = day_period
+
+    location = _first(LOCATION_KEYWORDS, hits.get("location"))
+    if location:
+        filters["location_keyword"] = location
+
+    group_size = _first(["large", "small"], hits.get("group_size"))
+    if group_size == "large":
+        filters["min_group_size"] = 6
+    elif group_size == "small":
+        filters["max_group_size"] = 3
+
+    visualization = _first(VISUALIZATIONS, hits.get("visualization"))
+    if visualization:
+        analysis["visualization"] = visualization
+
+    topic = _first(QUERY_TYPES, hits.get("topic"))
+    if topic == "top":
+        subjects = hits.get("top_subject", set())
+        if "destination" in subjects:
+            analysis["type"] = "top_destinations"
+        elif "time" in subjects:
+            analysis["type"] = "hourly_patterns"
+    elif topic:
+        analysis["type"] = topic
+
+    if not analysis["open_ended"]:
+        analysis["aggregate"] = _first(AGGREGATES, hits.get("aggregate"))
+
+    return analysis
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+FetiiAI API Load Test
+Starts api_server in-process with a stubbed LLM and drives it with concurrent keep-alive clients.
+
+    python load_test.py [--clients 50] [--requests 40] [--llm-latency 0.05]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable
+
+from api_server import ApiServer
+from events import LoggingSink
+
+# Mix of endpoints a dashboard client would hit: (method, path, body)
+REQUEST_MIX = [
+    ("GET", "/health", None),
+    ("GET", "/summary", None),
+    ("GET", "/analyze/group_size", None),
+    ("GET", "/analyze/hourly?day_of_week=Saturday", None),
+    ("GET", "/analyze/daily?age_group=18-24", None),
+    ("GET", "/analyze/age?time_period=evening", None),
+    ("GET", "/analyze/monthly", None),
+    ("GET", "/destinations/search?q=austin&limit=5", None),
+    ("POST", "/ask", {"question": "What is the average group size?"}),
+    ("POST", "/ask", {"question": "Why are Saturday nights so busy downtown?"}),
+]
+
+
+class StubLLM(Runnable):
+    """Chat model stand-in that sleeps for a fixed latency and returns a canned answer"""
+
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.calls = 0
+
+    def invoke(self, prompt, config=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        return AIMessage(content="Stubbed answer for load testing.")
+
+
+def build_server(data_file: str, llm_latency: float, threads: int = None) -> Tuple[ApiServer, StubLLM]:
+    """Load the dataset once behind a chatbot that talks to StubLLM"""
+    from chatbot import FetiiChatbot
+
+    stub = StubLLM(llm_latency)
+    chatbot = FetiiChatbot("sk-load-test", sink=LoggingSink(), llm=stub)
+    if not chatbot.data_processor.load_data(data_file=data_file):
+        raise SystemExit(f"Could not load data from {data_file}")
+    return ApiServer(chatbot.data_processor, chatbot, max_workers=threads), stub
+
+
+async def send_request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                       method: str, path: str, body: Dict = None) -> int:
+    """Send one request on an open keep-alive connection and return the status code"""
+    payload = json.dumps(body).encode("utf-8") if body is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload
+    )
+    await writer.drain()
+
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = 0
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    await reader.readexactly(length)
+    return status
+
+
+async def run_client(port: int, requests: int, seed: int) -> List[Tuple[str, int, float]]:
+    """One client: a single keep-alive connection issuing a random request mix"""
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    samples = []
+    try:
+        for _ in range(requests):
+            method, path, body = rng.choice(REQUEST_MIX)
+            start = time.perf_counter()
+            status = await send_request(reader, writer, method, path, body)
+            samples.append((path.split("?")[0], status, time.perf_counter() - start))
+    finally:
+        writer.close()
+        await writer.wait_closed()
+    return samples
+
+
+def report(samples: List[Tuple[str, int, float]], elapsed: float, stub: StubLLM) -> None:
+    """Print throughput, error count and latency percentiles per endpoint"""
+    latencies = np.array([latency for _, _, latency in samples]) * 1000
+    errors = sum(1 for _, status, _ in samples if status >= 400)
+    print(f"📊 {len(samples)} requests in {elapsed:.2f}s ({len(samples) / elapsed:.1f} req/s), "
+          f"{errors} errors, {stub.calls} LLM calls")
+    print(f"⏱️  overall p50={np.percentile(latencies, 50):.1f}ms "
+          f"p95={np.percentile(latencies, 95):.1f}ms p99={np.percentile(latencies, 99):.1f}ms")
+
+    by_path: Dict[str, List[float]] = {}
+    for path, _, latency in samples:
+        by_path.setdefault(path, []).append(latency * 1000)
+    for path, values in sorted(by_path.items()):
+        print(f"   {path:<24} n={len(values):<5} p50={np.percentile(values, 50):7.1f}ms "
+              f"p95={np.percentile(values, 95):7.1f}ms")
+
+
+async def run_load_test(server: ApiServer, stub: StubLLM, clients: int, requests: int) -> int:
+    """Start the server on an ephemeral port, run the clients, print the report"""
+    await server.start("127.0.0.1", 0)
+    port = server.server.sockets[0].getsockname()[1]
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_client(port, requests, seed) for seed in range(clients)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await server.close()
+
+    samples = [sample for client in results for sample in client]
+    report(samples, elapsed, stub)
+    return sum(1 for _, status, _ in samples if status >= 400)
+
+
+def main():
+    """Parse arguments and run the load test"""
+    parser = argparse.ArgumentParser(description="Load test the FetiiAI API server")
+    parser.add_argument("--data", default="FetiiAI_Data_Austin.xlsx")
+    parser.add_argument("--clients", type=int, default=50, help="Concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=40, help="Requests per client")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds the stub LLM sleeps per call")
+    parser.add_argument("--threads", type=int, default=None, help="Server worker threads")
+    args = parser.parse_args()
+
+    server, stub = build_server(args.data, args.llm_latency, args.threads)
+    errors = asyncio.run(run_load_test(server, stub, args.clients, args.requests))
+    raise SystemExit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
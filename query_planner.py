@@ -0,0 +1,291 @@
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+AGE_GROUPS = ["Under 18", "18-24", "25-34", "35-44", "45-54", "55+"]
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+DAY_PERIODS = ["morning", "afternoon", "evening"]
+
+# Tools exposed to the model. Each parameter is (type, allowed values or None).
+# "filters" tools receive their arguments as the analysis filter dict.
+TOOL_SPECS = {
+    "analyze_group_size_patterns": {
+        "description": "Group size statistics, distribution and size categories, plus hourly/daily/age breakdowns",
+        "style": "filters",
+        "parameters": {"age_group": ("str", AGE_GROUPS), "day_of_week": ("str", DAYS_OF_WEEK),
+                       "time_period": ("str", DAY_PERIODS)},
+        "required": []
+    },
+    "analyze_hourly_patterns": {
+        "description": "Trips per hour of day, peak hours, time-of-day buckets and large-group peak hours",
+        "style": "filters",
+        "parameters": {"age_group": ("str", AGE_GROUPS), "day_of_week": ("str", DAYS_OF_WEEK)},
+        "required": []
+    },
+    "analyze_day_of_week_patterns": {
+        "description": "Trips per day of week, weekend vs weekday volume and group sizes, top destinations per day",
+        "style": "filters",
+        "parameters": {"age_group": ("str", AGE_GROUPS), "time_period": ("str", DAY_PERIODS)},
+        "required": []
+    },
+    "analyze_age_group_correlations": {
+        "description": "Trips per rider age group with group sizes, destinations and hours per age group, "
+                       "plus the age mix of all checked-in riders",
+        "style": "filters",
+        "parameters": {"day_of_week": ("str", DAYS_OF_WEEK), "time_period": ("str", DAY_PERIODS)},
+        "required": []
+    },
+    "analyze_monthly_trends": {
+        "description": "Trips per month and year with group size and destination trends",
+        "style": "filters",
+        "parameters": {"age_group": ("str", AGE_GROUPS), "day_of_week": ("str", DAYS_OF_WEEK)},
+        "required": []
+    },
+    "get_destination_stats": {
+        "description": "Trip, passenger and time statistics for destinations matching a name; time_period is a phrase "
+                       "such as 'last month', 'in September' or 'from 2025-09-01 to 2025-09-07'",
+        "style": "kwargs",
+        "parameters": {"destination": ("str", None), "time_period": ("str", None)},
+        "required": ["destination"]
+    },
+    "get_top_destinations_by_age_and_day": {
+        "description": "Most visited drop-off addresses, optionally for an age group and day of week",
+        "style": "kwargs",
+        "parameters": {"age_group": ("str", AGE_GROUPS), "day_of_week": ("str", DAYS_OF_WEEK),
+                       "limit": ("int", None)},
+        "required": []
+    },
+    "search_similar_destinations": {
+        "description": "Full destination names containing a search term",
+        "style": "kwargs",
+        "parameters": {"search_term": ("str", None), "limit": ("int", None)},
+        "required": ["search_term"]
+    },
+    "get_rider_profile": {
+        "description": "One rider's trip count, first and last ride, average group size, top destinations and typical hours",
+        "style": "kwargs",
+        "parameters": {"user_id": ("int", None)},
+        "required": ["user_id"]
+    },
+    "get_most_frequent_riders": {
+        "description": "Riders with the most trips, with their profiles",
+        "style": "kwargs",
+        "parameters": {"limit": ("int", None)},
+        "required": []
+    },
+    "get_data_summary": {
+        "description": "Dataset overview: trip count, date range, unique destinations, average group size",
+        "style": "kwargs",
+        "parameters": {},
+        "required": []
+    }
+}
+
+# Limits applied when compacting tool results for the final prompt
+MAX_ITEMS = 24
+MAX_STRING = 200
+JSON_BLOCK = re.compile(r"\{.*\}", re.DOTALL)
+
+
+def describe_tools() -> str:
+    """Render the tool catalogue for the planning prompt"""
+    lines = []
+    for name, spec in TOOL_SPECS.items():
+        params = []
+        for param, (param_type, allowed) in spec["parameters"].items():
+            required = "required" if param in spec["required"] else "optional"
+            choices = f" one of {allowed}" if allowed else ""
+            params.append(f"{param}: {param_type} ({required}){choices}")
+        lines.append(f"- {name}({', '.join(params)}): {spec['description']}")
+    return "\n".join(lines)
+
+
+def compact_result(value: Any, depth: int = 0) -> Any:
+    """Shrink a tool result to JSON-safe values with bounded size"""
+    if isinstance(value, pd.DataFrame):
+        return compact_result(value.head(MAX_ITEMS).to_dict("records"), depth)
+    if isinstance(value, pd.Series):
+        return compact_result(value.head(MAX_ITEMS).to_dict(), depth)
+    if isinstance(value, (pd.Timestamp, np.datetime64)):
+        return str(pd.Timestamp(value))
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float):
+        return None if np.isnan(value) else round(value, 2)
+    if isinstance(value, str):
+        return value if len(value) <= MAX_STRING else value[:MAX_STRING] + "..."
+    if isinstance(value, dict):
+        if depth > 3:
+            return f"<{len(value)} items>"
+        items = list(value.items())
+        compacted = {str(compact_result(k, depth + 1)): compact_result(v, depth + 1) for k, v in items[:MAX_ITEMS]}
+        if len(items) > MAX_ITEMS:
+            compacted["..."] = f"{len(items) - MAX_ITEMS} more"
+        return compacted
+    if isinstance(value, (list, tuple, np.ndarray)):
+        items = list(value)
+        compacted = [compact_result(v, depth + 1) for v in items[:MAX_ITEMS]]
+        if len(items) > MAX_ITEMS:
+            compacted.append(f"... {len(items) - MAX_ITEMS} more")
+        return compacted
+    return value
+
+
+class QueryPlanner:
+    """Let the LLM plan typed calls over FetiiDataProcessor, run them in parallel and answer from the results"""
+
+    def __init__(self, data_processor, llm, max_workers: int = 4):
+        self.data_processor = data_processor
+        self.llm = llm
+        self.max_workers = max_workers
+
+    def _invoke(self, prompt: str) -> str:
+        """Call the model and return its text"""
+        result = self.llm.invoke(prompt)
+        return getattr(result, "content", result)
+
+    def plan(self, question: str) -> Dict[str, Any]:
+        """Ask the model for a call plan and validate it against the tool specs"""
+        prompt = f"""
+        You are FetiiAI's query planner. Choose the analysis tools needed to answer the user's question.
+
+        TOOLS:
+        {describe_tools()}
+
+        Reply with JSON only, in the form:
+        {{"calls": [{{"id": "c1", "tool": "<tool name>", "args": {{...}}}}]}}
+        Calls run independently and in parallel. Use as few calls as possible.
+
+        User Question: {question}
+        """
+        raw = self._invoke(prompt)
+        return self.parse_plan(raw)
+
+    def parse_plan(self, raw: str) -> Dict[str, Any]:
+        """Parse the model's JSON plan, keeping valid calls and reporting invalid ones"""
+        plan = {"calls": [], "errors": []}
+        match = JSON_BLOCK.search(raw or "")
+        if not match:
+            plan["errors"].append("Planner reply did not contain JSON")
+            return plan
+        try:
+            payload = json.loads(match.group(0))
+        except json.JSONDecodeError as e:
+            plan["errors"].append(f"Planner reply was not valid JSON: {str(e)}")
+            return plan
+
+        call_ids = set()
+        for i, call in enumerate(payload.get("calls", []), 1):
+            if not isinstance(call, dict):
+                plan["errors"].append(f"c{i}: call must be a JSON object")
+                continue
+            # Results are keyed by call id, so a reused id gets a suffix instead of replacing the earlier call
+            base_id = call_id = str(call.get("id") or f"c{i}")
+            suffix = 2
+            while call_id in call_ids:
+                call_id = f"{base_id}_{suffix}"
+                suffix += 1
+            call_ids.add(call_id)
+            try:
+                plan["calls"].append({
+                    "id": call_id,
+                    "tool": call.get("tool"),
+                    "args": self._validate_args(call.get("tool"), call.get("args") or {})
+                })
+            except ValueError as e:
+                plan["errors"].append(f"{call_id}: {str(e)}")
+        return plan
+
+    def _validate_args(self, tool: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Check a call's arguments against its spec, coercing simple types"""
+        if tool not in TOOL_SPECS:
+            raise ValueError(f"unknown tool {tool!r}")
+        if not isinstance(args, dict):
+            raise ValueError(f"arguments for {tool} must be a JSON object")
+        spec = TOOL_SPECS[tool]
+
+        validated = {}
+        for name, value in args.items():
+            if name not in spec["parameters"]:
+                raise ValueError(f"unexpected argument {name!r} for {tool}")
+            if value is None:
+                continue
+            param_type, allowed = spec["parameters"][name]
+            try:
+                value = self._to_int(value) if param_type == "int" else str(value)
+            except (TypeError, ValueError, OverflowError):
+                raise ValueError(f"argument {name!r} for {tool} must be {param_type}")
+            if allowed and value not in allowed:
+                raise ValueError(f"argument {name!r} for {tool} must be one of {allowed}")
+            validated[name] = value
+
+        missing = [name for name in spec["required"] if name not in validated]
+        if missing:
+            raise ValueError(f"missing required arguments {missing} for {tool}")
+        return validated
+
+    @staticmethod
+    def _to_int(value: Any) -> int:
+        """Integer argument; booleans and fractional numbers are rejected rather than truncated"""
+        if isinstance(value, bool):
+            raise TypeError("booleans are not integers")
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError(f"{value} is not a whole number")
+        return int(value)
+
+    def _run_call(self, call: Dict[str, Any]) -> Any:
+        """Execute one validated call against the data processor"""
+        method = getattr(self.data_processor, call["tool"])
+        if TOOL_SPECS[call["tool"]]["style"] == "filters":
+            return method(call["args"])
+        return method(**call["args"])
+
+    def execute(self, calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Run the plan's calls in parallel and return compact results keyed by call id"""
+        results = {}
+        if not calls:
+            return results
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(calls))) as executor:
+            futures = {call["id"]: executor.submit(self._run_call, call) for call in calls}
+            for call_id, future in futures.items():
+                try:
+                    results[call_id] = compact_result(future.result())
+                except Exception as e:
+                    results[call_id] = {"error": str(e)}
+        return results
+
+    def answer(self, question: str) -> Dict[str, Any]:
+        """Plan, execute and answer a question; returns the answer with its plan and results"""
+        plan = self.plan(question)
+        results = self.execute(plan["calls"])
+
+        calls_with_results = [
+            {"tool": call["tool"], "args": call["args"], "result": results.get(call["id"])}
+            for call in plan["calls"]
+        ]
+        prompt = f"""
+        You are FetiiAI, an expert data analyst for rideshare data.
+
+        User Question: {question}
+
+        TOOL RESULTS (JSON):
+        {json.dumps(calls_with_results, default=str)}
+
+        INSTRUCTIONS:
+        1. Use ONLY the tool results above
+        2. Provide specific numbers, counts, and statistics
+        3. If the results do not answer the question, say what data is missing
+
+        Answer the user's question:
+        """
+        return {
+            "answer": self._invoke(prompt),
+            "plan": plan["calls"],
+            "results": results,
+            "errors": plan["errors"]
+        }
@@ -0,0 +1,133 @@
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from time_partitions import HOUR_NS, MISSING_EPOCH, first_column, to_epoch_ns
+
+TOP_N = 3
+
+
+def _top_per_rider(positions: np.ndarray, values: np.ndarray, riders: int, top_n: int) -> np.ndarray:
+    """(riders, top_n) matrix of each rider's most frequent non-negative values, -1 padded; ties go to the lower value"""
+    matrix = np.full((riders, top_n), -1, dtype=np.int32)
+    keep = values >= 0
+    if not keep.any():
+        return matrix
+    pairs = pd.DataFrame({"rider": positions[keep], "value": values[keep]})
+    counts = pairs.groupby(["rider", "value"]).size().reset_index(name="n")
+    counts = counts.sort_values(["rider", "n", "value"], ascending=[True, False, True], kind="stable")
+    rank = counts.groupby("rider").cumcount().to_numpy()
+    top = counts[rank < top_n]
+    matrix[top["rider"].to_numpy(), rank[rank < top_n]] = top["value"].to_numpy()
+    return matrix
+
+
+class RiderProfiles:
+    """Per-rider trip count, first/last ride, average group size, top destinations and typical hours.
+
+    Columns are plain numpy arrays aligned to sorted rider ids; destinations are int32 codes into one
+    categories array, so a lookup is a binary search plus a few array reads."""
+
+    def __init__(self, trips: pd.DataFrame, top_n: int = TOP_N):
+        self.top_n = top_n
+        rider_col = first_column(trips, ['user_id', 'Booking User ID'])
+        if rider_col is None or trips.empty:
+            self.ids = np.array([], dtype=np.int64)
+            self.columns: Dict[str, np.ndarray] = {}
+            self.destinations = np.array([], dtype=object)
+            self.top_destinations = np.empty((0, top_n), dtype=np.int32)
+            self.typical_hours = np.empty((0, top_n), dtype=np.int8)
+            return
+
+        trips = trips[trips[rider_col].notna()]
+        self.ids, positions = np.unique(trips[rider_col].to_numpy(), return_inverse=True)
+        riders = len(self.ids)
+
+        time_col = first_column(trips, ['pickup_time', 'Trip Date and Time'])
+        epochs = to_epoch_ns(trips[time_col]) if time_col else np.full(len(trips), MISSING_EPOCH)
+        valid = epochs != MISSING_EPOCH
+        first = np.full(riders, MISSING_EPOCH, dtype=np.int64)
+        last = np.full(riders, np.iinfo(np.int64).min, dtype=np.int64)
+        np.minimum.at(first, positions[valid], epochs[valid])
+        np.maximum.at(last, positions[valid], epochs[valid])
+        seen = first != MISSING_EPOCH
+
+        self.columns = {
+            "trips": np.bincount(positions, minlength=riders).astype(np.int32),
+            "first_ride": np.where(seen, first, np.iinfo(np.int64).min).view("datetime64[ns]"),
+            "last_ride": np.where(seen, last, np.iinfo(np.int64).min).view("datetime64[ns]")
+        }
+        group_col = first_column(trips, ['group_size', 'Total Passengers', 'passengers'])
+        if group_col:
+            sizes = trips[group_col].to_numpy(dtype=np.float64, na_value=np.nan)
+            counted = ~np.isnan(sizes)
+            totals = np.bincount(positions[counted], weights=sizes[counted], minlength=riders)
+            counts = np.bincount(positions[counted], minlength=riders)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                self.columns["avg_group_size"] = (totals / counts).astype(np.float32)
+        for column in ['age', 'age_group']:
+            if column in trips.columns:
+                # Demographics are per rider; take the value from each rider's first trip row
+                firsts = np.unique(positions, return_index=True)[1]
+                self.columns[column] = trips[column].to_numpy()[firsts]
+
+        dest_col = first_column(trips, ['dropoff_location', 'Drop Off Address'])
+        if dest_col:
+            codes, self.destinations = pd.factorize(trips[dest_col])
+            self.destinations = np.asarray(self.destinations, dtype=object)
+        else:
+            codes, self.destinations = np.full(len(trips), -1), np.array([], dtype=object)
+        self.top_destinations = _top_per_rider(positions, codes, riders, top_n)
+
+        hours = np.where(valid, (epochs // HOUR_NS) % 24, -1)
+        self.typical_hours = _top_per_rider(positions, hours, riders, top_n).astype(np.int8)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _position(self, user_id) -> Optional[int]:
+        """Row of a rider id, by binary search over the sorted ids"""
+        if not len(self.ids):
+            return None
+        try:
+            user_id = np.asarray(user_id).astype(self.ids.dtype)
+        except (TypeError, ValueError):
+            return None
+        position = int(np.searchsorted(self.ids, user_id))
+        if position < len(self.ids) and self.ids[position] == user_id:
+            return position
+        return None
+
+    def _row(self, position: int) -> Dict[str, Any]:
+        profile = {"user_id": self.ids[position].item()}
+        for name, values in self.columns.items():
+            value = values[position]
+            if isinstance(value, np.datetime64):
+                value = None if np.isnat(value) else pd.Timestamp(value)
+            elif isinstance(value, np.floating):
+                value = round(value.item(), 2)
+            elif isinstance(value, np.generic):
+                value = value.item()
+            profile[name] = value
+        profile["top_destinations"] = [
+            self.destinations[code] for code in self.top_destinations[position] if code >= 0
+        ]
+        profile["typical_hours"] = [int(hour) for hour in self.typical_hours[position] if hour >= 0]
+        return profile
+
+    def lookup(self, user_id) -> Optional[Dict[str, Any]]:
+        """Profile for one rider, or None if the id has no trips"""
+        position = self._position(user_id)
+        return None if position is None else self._row(position)
+
+    def most_frequent(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Profiles of the riders with the most trips"""
+        if not len(self.ids):
+            return []
+        order = np.argsort(-self.columns["trips"], kind="stable")[:limit]
+        return [self._row(int(position)) for position in order]
+
+    def table(self) -> pd.DataFrame:
+        """Scalar columns as a frame indexed by user_id"""
+        return pd.DataFrame(self.columns, index=pd.Index(self.ids, name="user_id"))
@@ -0,0 +1,75 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from sketches import HyperLogLog, hash_values
+from time_partitions import MISSING_EPOCH, bucket_starts, first_column, to_epoch_ns
+
+GRAINS = ["day", "week", "month"]
+ROLLUP_COLUMNS = ["trips", "passengers", "riders"]
+
+
+class TripRollups:
+    """Day/week/month tables of trips, passengers and distinct riders, maintained incrementally on append"""
+
+    def __init__(self, trips: pd.DataFrame, grains=GRAINS, precision: int = 14):
+        self.grains = list(grains)
+        self.precision = precision
+        self.tables: Dict[str, pd.DataFrame] = {}
+        # A rider sketch per bucket, so distinct counts merge when new trips land in an existing bucket;
+        # exact up to HyperLogLog.SPARSE_LIMIT riders per bucket, fixed-size registers beyond that
+        self._riders: Dict[str, Dict[pd.Timestamp, HyperLogLog]] = {grain: {} for grain in self.grains}
+        for grain in self.grains:
+            self.tables[grain] = pd.DataFrame(columns=ROLLUP_COLUMNS, dtype="int64")
+            self.tables[grain].index.name = "period"
+        self.append(trips)
+
+    @staticmethod
+    def _columns(trips: pd.DataFrame):
+        """Epochs, passenger counts and rider ids for the rows that have a pickup time"""
+        time_col = first_column(trips, ['pickup_time', 'Trip Date and Time'])
+        if time_col is None:
+            return None
+        epochs = to_epoch_ns(trips[time_col])
+
+        valid = epochs != MISSING_EPOCH
+        group_col = first_column(trips, ['group_size', 'Total Passengers', 'passengers'])
+        rider_col = first_column(trips, ['user_id', 'Booking User ID'])
+        passengers = trips[group_col].to_numpy()[valid] if group_col else np.zeros(valid.sum(), dtype=np.int64)
+        riders = trips[rider_col].to_numpy()[valid] if rider_col else None
+        return epochs[valid], passengers, riders
+
+    def append(self, trips: pd.DataFrame) -> None:
+        """Fold new trips into every grain's table"""
+        columns = self._columns(trips) if trips is not None and len(trips) else None
+        if columns is None:
+            return
+        epochs, passengers, riders = columns
+        if riders is not None:
+            known = pd.notna(riders)
+            rider_hashes = hash_values(pd.Series(riders[known]))
+
+        for grain in self.grains:
+            periods = bucket_starts(epochs, grain)
+            batch = pd.DataFrame({"period": periods, "passengers": passengers})
+            grouped = batch.groupby("period")["passengers"].agg(["size", "sum"])
+
+            rider_sketches = self._riders[grain]
+            if riders is not None:
+                for period, rows in pd.Series(rider_hashes).groupby(periods[known]).indices.items():
+                    sketch = rider_sketches.setdefault(pd.Timestamp(period), HyperLogLog(self.precision))
+                    sketch.add_hashes(rider_hashes[rows])
+
+            table = self.tables[grain]
+            combined = table[["trips", "passengers"]].add(
+                grouped.rename(columns={"size": "trips", "sum": "passengers"}), fill_value=0
+            )
+            combined["riders"] = [rider_sketches[period].estimate() if period in rider_sketches else 0
+                                  for period in combined.index]
+            combined.index.name = "period"
+            self.tables[grain] = combined.astype("int64").sort_index()
+
+    def table(self, grain: str) -> pd.DataFrame:
+        """Rollup table for a grain, indexed by period start"""
+        return self.tables[grain]
@@ -0,0 +1,410 @@
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from time_partitions import HOUR_NS, MISSING_EPOCH, bucket_starts, to_epoch_ns
+
+# Hour ranges used by the analysis filters' time_period values
+TIME_PERIOD_HOURS = {"morning": (6, 12), "afternoon": (12, 18), "evening": (18, 24)}
+# Columns whose distinct values are sketched, by metric name
+DISTINCT_METRICS = {
+    "riders": ['user_id', 'Booking User ID'],
+    "destinations": ['dropoff_location', 'Drop Off Address']
+}
+# Columns summarized per cube cell, by metric name; discrete metrics keep an exact value histogram
+CUBE_METRICS = {
+    "group_size": ['Total Passengers', 'group_size', 'passengers'],
+    "trip_duration": ['trip_duration']
+}
+DISCRETE_METRICS = {"group_size"}
+CUBE_DIMENSIONS = ["age_group", "day_of_week", "hour"]
+
+
+def hash_values(values: pd.Series) -> np.ndarray:
+    """Stable 64-bit hashes; integral floats hash like ints so appended batches agree"""
+    values = values.dropna()
+    if pd.api.types.is_float_dtype(values) and (values % 1 == 0).all():
+        values = values.astype(np.int64)
+    if not pd.api.types.is_integer_dtype(values):
+        values = values.astype(str)
+    return pd.util.hash_array(values.to_numpy())
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch. Holds exact hashes until SPARSE_LIMIT, then 2**precision registers."""
+
+    SPARSE_LIMIT = 2048
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.hashes: Optional[np.ndarray] = np.array([], dtype=np.uint64)
+        self.registers: Optional[np.ndarray] = None
+
+    @property
+    def is_sparse(self) -> bool:
+        return self.registers is None
+
+    def add_hashes(self, hashes: np.ndarray) -> "HyperLogLog":
+        """Add pre-hashed values"""
+        if self.is_sparse:
+            self.hashes = np.union1d(self.hashes, hashes.astype(np.uint64))
+            if len(self.hashes) > self.SPARSE_LIMIT:
+                self._densify()
+        else:
+            self._add_to_registers(hashes)
+        return self
+
+    def update(self, values: pd.Series) -> "HyperLogLog":
+        """Add raw values"""
+        return self.add_hashes(hash_values(values))
+
+    def _densify(self):
+        self.registers = np.zeros(1 << self.precision, dtype=np.uint8)
+        self._add_to_registers(self.hashes)
+        self.hashes = None
+
+    def _add_to_registers(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        hashes = hashes.astype(np.uint64)
+        width = 64 - self.precision
+        index = (hashes >> np.uint64(width)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << width) - 1)
+        # remainder < 2**53, so the float conversion and frexp exponent (bit length) are exact
+        bit_length = np.frexp(remainder.astype(np.float64))[1]
+        rank = (width - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Fold another sketch of the same precision into this one"""
+        if other.is_sparse:
+            return self.add_hashes(other.hashes)
+        if self.is_sparse:
+            hashes = self.hashes
+            self.registers = other.registers.copy()
+            self.hashes = None
+            self._add_to_registers(hashes)
+        else:
+            np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    @classmethod
+    def union(cls, sketches: List["HyperLogLog"], precision: int = 14) -> "HyperLogLog":
+        """Merge many sketches at once"""
+        merged = cls(precision)
+        sparse = [s.hashes for s in sketches if s.is_sparse]
+        dense = [s.registers for s in sketches if not s.is_sparse]
+        if dense:
+            merged.registers = np.maximum.reduce(dense) if len(dense) > 1 else dense[0].copy()
+            merged.hashes = None
+        if sparse:
+            merged.add_hashes(np.unique(np.concatenate(sparse)))
+        return merged
+
+    def estimate(self) -> int:
+        """Distinct count: exact while sparse, HyperLogLog estimate (~1.04/sqrt(m) error) once dense"""
+        if self.is_sparse:
+            return int(len(self.hashes))
+        m = float(len(self.registers))
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * np.log(m / zeros)))
+        return int(round(raw))
+
+
+class DistinctCounter:
+    """HyperLogLog sketches per (day, age group, hour) cell; any filtered slice merges its cells"""
+
+    def __init__(self, trips: pd.DataFrame, precision: int = 14):
+        self.precision = precision
+        self.cells: Dict[Tuple, Dict[str, HyperLogLog]] = {}
+        self._cell_table: Optional[pd.DataFrame] = None
+        self._memo: Dict[Tuple, int] = {}
+        self.append(trips)
+
+    def append(self, trips: pd.DataFrame) -> None:
+        """Add trips to their cells' sketches"""
+        if trips is None or trips.empty:
+            return
+        time_col = next((col for col in ['pickup_time', 'Trip Date and Time'] if col in trips.columns), None)
+        if time_col is None:
+            return
+        epochs = to_epoch_ns(trips[time_col])
+        valid = epochs != MISSING_EPOCH
+        rows = trips[valid]
+        epochs = epochs[valid]
+
+        keys = pd.DataFrame({
+            "day": bucket_starts(epochs, "day"),
+            "age_group": rows['age_group'].fillna("Unknown").to_numpy() if 'age_group' in rows.columns else "Unknown",
+            "hour": (epochs // HOUR_NS) % 24
+        })
+        for metric, candidates in DISTINCT_METRICS.items():
+            column = next((col for col in candidates if col in rows.columns), None)
+            if column is None:
+                continue
+            values = rows[column].reset_index(drop=True)
+            for cell, positions in keys.groupby(["day", "age_group", "hour"]).indices.items():
+                sketches = self.cells.setdefault(cell, {})
+                sketches.setdefault(metric, HyperLogLog(self.precision)).update(values.iloc[positions])
+
+        self._cell_table = None
+        self._memo.clear()
+
+    def _cells(self) -> pd.DataFrame:
+        """Cell keys as a frame for vectorized selection"""
+        if self._cell_table is None:
+            keys = list(self.cells)
+            table = pd.DataFrame(keys, columns=["day", "age_group", "hour"])
+            table["day_of_week"] = pd.to_datetime(table["day"]).dt.day_name().str.lower() if keys else []
+            self._cell_table = table
+        return self._cell_table
+
+    def count(self, metric: str, filters: Dict[str, Any] = None, start=None, end=None) -> int:
+        """Distinct values of a metric among trips matching the filters, within [start, end) by day"""
+        filters = filters or {}
+        key = (metric, tuple(sorted(filters.items())), str(start), str(end))
+        if key in self._memo:
+            return self._memo[key]
+
+        table = self._cells()
+        mask = np.ones(len(table), dtype=bool)
+        if filters.get('age_group'):
+            mask &= (table["age_group"] == filters['age_group']).to_numpy()
+        if filters.get('day_of_week'):
+            mask &= (table["day_of_week"] == filters['day_of_week'].lower()).to_numpy()
+        if filters.get('time_period') in TIME_PERIOD_HOURS:
+            low, high = TIME_PERIOD_HOURS[filters['time_period']]
+            mask &= ((table["hour"] >= low) & (table["hour"] < high)).to_numpy()
+        if start is not None:
+            mask &= (table["day"] >= pd.Timestamp(start).normalize()).to_numpy()
+        if end is not None:
+            mask &= (table["day"] < pd.Timestamp(end)).to_numpy()
+
+        sketches = [
+            self.cells[cell][metric]
+            for cell in table.loc[mask, ["day", "age_group", "hour"]].itertuples(index=False, name=None)
+            if metric in self.cells[cell]
+        ]
+        result = HyperLogLog.union(sketches, self.precision).estimate()
+        self._memo[key] = result
+        return result
+
+
+class KLLSketch:
+    """Mergeable quantile sketch: levels of sampled items, each level's items weighing 2**level.
+    Exact until the first compaction (k items)."""
+
+    def __init__(self, k: int = 200, seed: int = 0):
+        self.k = k
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.array([], dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def is_exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def _capacity(self, level: int) -> int:
+        """Lower levels get geometrically smaller buffers (factor 2/3), the top level gets k"""
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def update(self, values) -> "KLLSketch":
+        """Add values; NaNs are ignored"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self.count += len(values)
+        self._compress()
+        return self
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """Fold another sketch into this one"""
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.array([], dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.array([], dtype=np.float64))
+                items = np.sort(self.levels[level])
+                # An odd item out stays behind; every other remaining item moves up with double weight
+                self.levels[level] = items[:len(items) % 2]
+                items = items[len(items) % 2:]
+                promoted = items[int(self._rng.integers(2))::2]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q; matches pandas' linear interpolation while exact"""
+        if self.count == 0:
+            return float("nan")
+        if self.is_exact:
+            return float(np.quantile(self.levels[0], q))
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level) for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        rank = q * cumulative[-1]
+        return float(values[order][min(int(np.searchsorted(cumulative, rank, side="left")), len(values) - 1)])
+
+
+class MetricSketch:
+    """Running moments plus a quantile summary: an exact histogram for discrete metrics, KLL otherwise"""
+
+    def __init__(self, discrete: bool = False, k: int = 200):
+        self.discrete = discrete
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = float("nan")
+        self.max = float("nan")
+        self.histogram: Optional[Dict[float, int]] = {} if discrete else None
+        self.quantiles: Optional[KLLSketch] = None if discrete else KLLSketch(k)
+
+    def update(self, values) -> "MetricSketch":
+        """Add values; NaNs are ignored"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        batch = MetricSketch(self.discrete)
+        batch.count = len(values)
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min, batch.max = float(values.min()), float(values.max())
+        if self.discrete:
+            uniques, counts = np.unique(values, return_counts=True)
+            batch.histogram = dict(zip(uniques.tolist(), counts.tolist()))
+        else:
+            batch.quantiles.update(values)
+        return self.merge(batch)
+
+    def merge(self, other: "MetricSketch") -> "MetricSketch":
+        """Combine moments (Chan et al.) and quantile summaries"""
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = other.min if np.isnan(self.min) else min(self.min, other.min)
+        self.max = other.max if np.isnan(self.max) else max(self.max, other.max)
+        if self.discrete:
+            for value, count in other.histogram.items():
+                self.histogram[value] = self.histogram.get(value, 0) + count
+        else:
+            self.quantiles.merge(other.quantiles)
+        return self
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation, as pandas computes it"""
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else float("nan")
+
+    def quantile(self, q: float) -> float:
+        """Value at quantile q, interpolated linearly between ranks like pandas"""
+        if not self.discrete:
+            return self.quantiles.quantile(q)
+        if self.count == 0:
+            return float("nan")
+        values = np.array(sorted(self.histogram))
+        cumulative = np.cumsum([self.histogram[value] for value in values])
+        position = q * (self.count - 1)
+        lower, upper = int(np.floor(position)), int(np.ceil(position))
+        low_value = values[np.searchsorted(cumulative, lower, side="right")]
+        high_value = values[np.searchsorted(cumulative, upper, side="right")]
+        return float(low_value + (high_value - low_value) * (position - lower))
+
+    def mode(self) -> Optional[float]:
+        """Most frequent value (smallest on ties); discrete metrics only"""
+        if not self.histogram:
+            return None
+        return max(sorted(self.histogram), key=lambda value: self.histogram[value])
+
+
+def _cell_key(value):
+    return None if pd.isna(value) else value
+
+
+class MetricCube:
+    """Per (age group, day of week, hour) cell summaries of group size and trip duration.
+    Filtered statistics merge the matching cells instead of scanning trips."""
+
+    def __init__(self, trips: pd.DataFrame):
+        self.dimensions = [dim for dim in CUBE_DIMENSIONS if dim in trips.columns]
+        self.metrics = {
+            metric: column for metric, candidates in CUBE_METRICS.items()
+            for column in [next((col for col in candidates if col in trips.columns), None)] if column
+        }
+        self.cells: Dict[Tuple, Dict[str, Any]] = {}
+        self._memo: Dict[Tuple, Dict[str, Any]] = {}
+        self.append(trips)
+
+    def append(self, trips: pd.DataFrame) -> None:
+        """Fold new trips into their cells"""
+        if trips is None or trips.empty:
+            return
+        keys = [trips[dim] for dim in self.dimensions] or [pd.Series(0, index=trips.index)]
+        for key, rows in trips.groupby(keys, dropna=False, sort=False):
+            key = key if isinstance(key, tuple) else (key,)
+            cell = self.cells.setdefault(tuple(_cell_key(value) for value in key[:len(self.dimensions)]), {"rows": 0})
+            cell["rows"] += len(rows)
+            for metric, column in self.metrics.items():
+                sketch = cell.setdefault(metric, MetricSketch(discrete=metric in DISCRETE_METRICS))
+                sketch.update(rows[column].to_numpy(dtype=np.float64, na_value=np.nan))
+        self._memo.clear()
+
+    def _matches(self, key: Tuple, filters: Dict[str, Any]) -> bool:
+        """Same filter semantics as the analyze_* methods; filters on absent dimensions are ignored"""
+        values = dict(zip(self.dimensions, key))
+        if 'age_group' in filters and 'age_group' in values and values['age_group'] != filters['age_group']:
+            return False
+        if 'day_of_week' in filters and 'day_of_week' in values:
+            if values['day_of_week'] is None or values['day_of_week'].lower() != filters['day_of_week'].lower():
+                return False
+        if 'time_period' in filters and 'hour' in values and filters['time_period'] in TIME_PERIOD_HOURS:
+            low, high = TIME_PERIOD_HOURS[filters['time_period']]
+            if values['hour'] is None or not low <= values['hour'] < high:
+                return False
+        return True
+
+    def summarize(self, filters: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Row count, merged metric sketches and per-dimension (mean, count) tables for the filtered slice"""
+        filters = filters or {}
+        memo_key = tuple(sorted((k, str(v)) for k, v in filters.items()))
+        if memo_key in self._memo:
+            return self._memo[memo_key]
+
+        selected = [(key, cell) for key, cell in self.cells.items() if self._matches(key, filters)]
+        result = {"rows": sum(cell["rows"] for _, cell in selected), "metrics": {}, "breakdowns": {}}
+        for metric in self.metrics:
+            merged = MetricSketch(discrete=metric in DISCRETE_METRICS)
+            for _, cell in selected:
+                merged.merge(cell[metric])
+            result["metrics"][metric] = merged
+
+            table = pd.DataFrame(
+                [key + (cell[metric].count, cell[metric].mean * cell[metric].count) for key, cell in selected],
+                columns=self.dimensions + ["count", "total"]
+            )
+            result["breakdowns"][metric] = {}
+            for dim in self.dimensions:
+                grouped = table.groupby(dim)[["count", "total"]].sum()
+                grouped = grouped[grouped["count"] > 0]
+                grouped["mean"] = grouped["total"] / grouped["count"]
+                result["breakdowns"][metric][dim] = grouped[["mean", "count"]]
+        self._memo[memo_key] = result
+        return result
@@ -0,0 +1,65 @@
+"""
+Blob Store Tests
+Round-trips frames and figures through the content-addressed blob store.
+
+    python -m pytest test_blob_store.py
+"""
+
+import os
+
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from blob_store import BlobStore
+
+
+@pytest.fixture
+def frame():
+    return pd.DataFrame({"hour": [20, 21, 22], "trips": [14, 31, 9], "label": ["8 PM", "9 PM", "10 PM"]})
+
+
+def stored_files(store: BlobStore):
+    return sorted(name for _, _, names in os.walk(store.directory) for name in names)
+
+
+def test_frames_round_trip_and_are_stored_once(tmp_path, frame):
+    store = BlobStore(str(tmp_path))
+    digest = store.put_frame(frame)
+
+    assert store.put_frame(frame.copy()) == digest
+    assert len(stored_files(store)) == 1
+    pdt.assert_frame_equal(BlobStore(str(tmp_path)).get_frame(digest), frame)
+
+
+def test_frames_fall_back_to_pickle_without_pyarrow(tmp_path, frame, monkeypatch):
+    def no_pyarrow(self, *args, **kwargs):
+        raise ImportError("Unable to find a usable engine; tried using: 'pyarrow', 'fastparquet'.")
+    monkeypatch.setattr(pd.DataFrame, "to_parquet", no_pyarrow)
+    store = BlobStore(str(tmp_path))
+
+    digest = store.put_frame(frame)
+
+    assert stored_files(store) == [digest + ".pkl.gz"]
+    pdt.assert_frame_equal(BlobStore(str(tmp_path)).get_frame(digest), frame)
+
+
+@pytest.mark.parametrize("values", [
+    [1, "two", 3.0],
+    [{}, {}],
+])
+def test_columns_arrow_cannot_write_fall_back_to_pickle(tmp_path, values):
+    store = BlobStore(str(tmp_path))
+
+    digest = store.put_frame(pd.DataFrame({"value": values}))
+
+    assert stored_files(store) == [digest + ".pkl.gz"]
+    assert BlobStore(str(tmp_path)).get_frame(digest)["value"].tolist() == values
+
+
+def test_missing_blobs_read_as_none(tmp_path):
+    store = BlobStore(str(tmp_path))
+
+    assert store.get_frame("0" * 64) is None
+    assert store.get_figure("0" * 64) is None
+    assert store.get_figure(store.put_figure('{"data": []}')) == '{"data": []}'
@@ -0,0 +1,75 @@
+"""
+Chat Store Tests
+Imports legacy session files into the SQLite chat store, from one and from many processes.
+
+    python -m pytest test_chat_store.py
+"""
+
+import json
+import threading
+
+import pytest
+
+from chat_store import ChatStore
+
+
+def write_legacy(path, sessions, **settings):
+    path.write_text(json.dumps({"chat_sessions": sessions, "chat_history": [], **settings}))
+    return str(path)
+
+
+@pytest.fixture
+def legacy_file(tmp_path):
+    return write_legacy(tmp_path / "session_data.json", {
+        "s1": {"created_at": "2025-09-01T20:00:00", "messages": [
+            {"role": "user", "content": "Busiest hour?", "timestamp": "2025-09-01T20:00:01"},
+            {"role": "assistant", "content": "10 PM", "timestamp": "2025-09-01T20:00:02", "visualization": '{"data": []}'}
+        ]},
+        "s2": {"created_at": "2025-09-02T21:00:00", "messages": [{"role": "user", "content": "Top destinations?"}]}
+    }, current_session_id="s2")
+
+
+def test_import_legacy_copies_sessions_and_settings_once(tmp_path, legacy_file):
+    store = ChatStore(str(tmp_path / "chat.db"))
+
+    assert store.import_legacy(legacy_file)
+    assert not store.import_legacy(legacy_file)
+
+    assert {s["id"]: s["message_count"] for s in store.list_sessions()} == {"s1": 2, "s2": 1}
+    assert store.load_messages("s1")[1]["visualization"] == '{"data": []}'
+    assert store.settings() == {"current_session_id": "s2", "legacy_imported": True}
+
+
+def test_concurrent_imports_import_once(tmp_path, legacy_file):
+    path = str(tmp_path / "chat.db")
+    ChatStore(path)
+    start = threading.Barrier(8)
+    results = []
+
+    def run():
+        store = ChatStore(path)
+        start.wait()
+        results.append(store.import_legacy(legacy_file))
+
+    threads = [threading.Thread(target=run) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(True) == 1
+    assert {s["id"]: s["message_count"] for s in ChatStore(path).list_sessions()} == {"s1": 2, "s2": 1}
+
+
+def test_failed_import_leaves_nothing_behind(tmp_path):
+    store = ChatStore(str(tmp_path / "chat.db"))
+    broken = write_legacy(tmp_path / "session_data.json", {
+        "s1": {"created_at": "2025-09-01", "messages": [{"role": "user", "content": "ok"}]},
+        "s2": {"created_at": "2025-09-02", "messages": [{"role": "user", "content": {"not": "text"}}]}
+    })
+
+    with pytest.raises(Exception):
+        store.import_legacy(broken)
+
+    assert store.list_sessions() == []
+    assert store.settings() == {}
@@ -0,0 +1,98 @@
+"""
+Data Processor Cache Tests
+Hammers the processor's memo and LRU caches from many threads, as the API server does.
+
+    python -m pytest test_data_processor.py
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import data_processor
+from data_processor import FetiiDataProcessor
+
+
+def make_processor() -> FetiiDataProcessor:
+    processor = FetiiDataProcessor(store_dir="")
+    pickups = pd.date_range("2025-09-01", periods=400, freq="37min")
+    processor.trips_data = pd.DataFrame({
+        "trip_id": np.arange(400),
+        "pickup_time": pickups,
+        "group_size": np.arange(400) % 12 + 1,
+        "dropoff_address": [f"Stop {i % 9}" for i in range(400)]
+    })
+    return processor
+
+
+def run_threads(worker, count: int = 16):
+    start = threading.Barrier(count)
+
+    def task(i):
+        start.wait()
+        return worker(i)
+
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        return list(executor.map(task, range(count)))
+
+
+def test_cached_builds_once_under_concurrency():
+    processor = make_processor()
+    builds = []
+
+    def builder():
+        builds.append(threading.get_ident())
+        time.sleep(0.05)
+        return object()
+
+    values = run_threads(lambda i: processor._cached("slow", builder))
+
+    assert len(builds) == 1
+    assert all(value is values[0] for value in values)
+
+
+def test_reload_during_build_does_not_cache_stale_value():
+    processor = make_processor()
+    building = threading.Event()
+    release = threading.Event()
+
+    def builder():
+        building.set()
+        release.wait(5)
+        return "stale"
+
+    thread = threading.Thread(target=processor._cached, args=("report", builder))
+    thread.start()
+    building.wait(5)
+    processor.trips_data = processor.trips_data.iloc[:10]
+    release.set()
+    thread.join()
+
+    assert processor._cached("report", lambda: "fresh") == "fresh"
+
+
+def test_lru_caches_survive_concurrent_eviction(monkeypatch):
+    monkeypatch.setattr(data_processor, "MAX_CACHED_FIGURES", 2)
+    monkeypatch.setattr(data_processor, "MAX_CACHED_QUERIES", 2)
+    processor = make_processor()
+
+    def worker(i):
+        results = []
+        for round_ in range(6):
+            size = (i + round_) % 5 + 1
+            data = pd.DataFrame({"hour": np.arange(size), "trips": np.arange(size) + i % 3})
+            results.append(processor.create_visualization_json("bar", data, title=f"Chart {size}"))
+            rows = processor.query_trip_rows(filters={"group_size": [size]}, sort_by="pickup_time")
+            results.append(len(rows))
+        return results
+
+    results = run_threads(worker)
+
+    # A KeyError inside the cache would surface as the "Error creating chart" fallback figure
+    assert all("Error creating chart" not in figure for worker_results in results for figure in worker_results[::2])
+    expected = [int((processor.trips_data["group_size"] == size).sum()) for size in range(1, 6)]
+    for i, worker_results in enumerate(results):
+        assert worker_results[1::2] == [expected[(i + round_) % 5] for round_ in range(6)]
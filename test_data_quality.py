@@ -0,0 +1,71 @@
+"""
+Data Quality Tests
+Profiles the same trips as loaded from Excel and as mapped from a trip store.
+
+    python -m pytest test_data_quality.py
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_quality import profile_frame
+from trip_store import write_store, open_store
+
+CATEGORICAL = ["dropoff_location", "day_of_week", "age_group"]
+NUMERIC = ["group_size", "hour", "pickup_latitude"]
+
+
+@pytest.fixture
+def excel_trips(tmp_path):
+    pickups = pd.date_range("2025-09-05 18:00", periods=8, freq="90min")
+    trips = pd.DataFrame({
+        "pickup_time": pickups,
+        "dropoff_location": ["Moody Center", "Rainey Street", "Moody Center", None,
+                             "Zilker Park", "Moody Center", "Rainey Street", "Moody Center"],
+        "group_size": [4, 8, 12, 6, 9, 14, 5, 7],
+        "pickup_latitude": np.linspace(30.25, 30.29, 8),
+        "age_group": ["18-24", "25-34", "18-24", "18-24", None, "35-44", "25-34", "18-24"],
+        "shared": [True, False, True, True, False, False, True, True]
+    })
+    path = tmp_path / "trips.xlsx"
+    trips.to_excel(path, index=False)
+    loaded = pd.read_excel(path)
+    # Derived columns as preprocessing adds them (int32 hours, str day names)
+    loaded["hour"] = loaded["pickup_time"].dt.hour
+    loaded["day_of_week"] = loaded["pickup_time"].dt.day_name()
+    return loaded
+
+
+@pytest.fixture
+def store_trips(tmp_path, excel_trips):
+    write_store(str(tmp_path / "store"), {"trips": excel_trips})
+    return open_store(str(tmp_path / "store"))[0]["trips"]
+
+
+@pytest.mark.parametrize("source", ["excel_trips", "store_trips"])
+def test_columns_are_classified_for_either_load(request, source):
+    profiles = profile_frame(request.getfixturevalue(source))["column_profiles"]
+
+    assert {col: profiles[col]["kind"] for col in CATEGORICAL + NUMERIC} == {
+        **{col: "categorical" for col in CATEGORICAL}, **{col: "numeric" for col in NUMERIC}
+    }
+    assert profiles["pickup_time"]["kind"] == "other"
+    assert profiles["shared"]["kind"] == "other"
+    assert (profiles["hour"]["min"], profiles["hour"]["max"]) == (0, 22)
+    assert profiles["dropoff_location"]["top_values"].to_dict() == {
+        "Moody Center": 4, "Rainey Street": 2, "Zilker Park": 1
+    }
+    assert profiles["age_group"]["missing"] == 1
+
+
+def test_excel_and_store_profiles_agree(excel_trips, store_trips):
+    excel = profile_frame(excel_trips)["column_profiles"]
+    store = profile_frame(store_trips)["column_profiles"]
+
+    for col in CATEGORICAL:
+        assert excel[col]["top_values"].to_dict() == store[col]["top_values"].to_dict()
+        assert (excel[col]["unique"], excel[col]["missing"]) == (store[col]["unique"], store[col]["missing"])
+    for col in NUMERIC:
+        assert {k: excel[col][k] for k in ("min", "max", "mean", "median", "outliers")} == \
+            {k: store[col][k] for k in ("min", "max", "mean", "median", "outliers")}
@@ -0,0 +1,46 @@
+"""
+Intent Parser Accuracy Tests
+Checks every slot parse_question extracts against a labelled question corpus.
+
+    python -m pytest test_intent_parser.py
+"""
+
+import pytest
+
+from intent_corpus import DESTINATIONS, QUESTION_CORPUS
+from intent_parser import DestinationIndex, parse_question
+
+
+@pytest.fixture(scope="module")
+def destination_index():
+    return DestinationIndex(DESTINATIONS)
+
+
+def extracted_slots(analysis):
+    """The slots of a parse_question result, in the corpus layout"""
+    return {
+        "destination": analysis["destination_query"],
+        "time_period": analysis["time_period"],
+        "age_group": analysis["filters"].get("age_group"),
+        "aggregate": analysis["aggregate"],
+        "open_ended": analysis["open_ended"]
+    }
+
+
+@pytest.mark.parametrize("question, expected_slots, expected_fields", QUESTION_CORPUS,
+                         ids=[question for question, _, _ in QUESTION_CORPUS])
+def test_parse_question_slots(destination_index, question, expected_slots, expected_fields):
+    analysis = parse_question(question, destination_index)
+
+    assert extracted_slots(analysis) == expected_slots
+    for key, value in expected_fields.items():
+        assert analysis[key] == value, key
+    assert analysis["question"] == question
+
+
+def test_parse_question_without_destination_index():
+    analysis = parse_question("How many groups went to Moody Center last month?")
+
+    # Keywords need the index; the free-text pattern still finds the destination, minus the period
+    assert analysis["destination_query"] == "moody center"
+    assert analysis["time_period"] == "last month"
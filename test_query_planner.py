@@ -0,0 +1,187 @@
+"""
+Query Planner Tests
+Drives QueryPlanner with a scripted fake model over a stub data processor.
+
+    python -m pytest test_query_planner.py
+"""
+
+import json
+import threading
+from typing import List
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import Runnable
+
+from query_planner import QueryPlanner
+
+
+class ScriptedLLM(Runnable):
+    """Fake chat model that replays canned responses and records its prompts"""
+
+    def __init__(self, responses: List[str]):
+        self.responses = list(responses)
+        self.prompts: List[str] = []
+
+    def invoke(self, prompt, config=None, **kwargs):
+        self.prompts.append(prompt)
+        if not self.responses:
+            raise RuntimeError("ScriptedLLM has no responses left")
+        return AIMessage(content=self.responses.pop(0))
+
+
+class StubProcessor:
+    """The few FetiiDataProcessor tools the tests call, recording how they were called"""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def _record(self, name, *args, **kwargs):
+        with self._lock:
+            self.calls.append((name, args, kwargs))
+
+    def analyze_hourly_patterns(self, filters):
+        self._record("analyze_hourly_patterns", filters)
+        return {"peak_hour": 22 if filters.get("day_of_week") == "Saturday" else 18, "filters": dict(filters)}
+
+    def get_destination_stats(self, destination, time_period=None):
+        self._record("get_destination_stats", destination=destination, time_period=time_period)
+        return {"destination": destination, "time_period": time_period, "total_trips": 12}
+
+    def get_data_summary(self):
+        self._record("get_data_summary")
+        raise RuntimeError("summary unavailable")
+
+
+def plan_reply(*calls) -> str:
+    return json.dumps({"calls": list(calls)})
+
+
+@pytest.fixture
+def processor():
+    return StubProcessor()
+
+
+def make_planner(processor, responses=()):
+    return QueryPlanner(processor, ScriptedLLM(list(responses)))
+
+
+def test_parse_plan_keeps_valid_calls_and_coerces_types(processor):
+    plan = make_planner(processor).parse_plan(
+        "Here is the plan: " + plan_reply(
+            {"id": "hours", "tool": "analyze_hourly_patterns", "args": {"day_of_week": "Saturday"}},
+            {"tool": "get_top_destinations_by_age_and_day", "args": {"limit": "5", "age_group": None}},
+            {"tool": "get_rider_profile", "args": {"user_id": 335736.0}}
+        )
+    )
+
+    assert plan["errors"] == []
+    assert plan["calls"] == [
+        {"id": "hours", "tool": "analyze_hourly_patterns", "args": {"day_of_week": "Saturday"}},
+        {"id": "c2", "tool": "get_top_destinations_by_age_and_day", "args": {"limit": 5}},
+        {"id": "c3", "tool": "get_rider_profile", "args": {"user_id": 335736}}
+    ]
+
+
+@pytest.mark.parametrize("reply, error", [
+    ("I would call the hourly tool", "did not contain JSON"),
+    ('{"calls": [{"id": "c1", "tool": }]}', "was not valid JSON"),
+])
+def test_parse_plan_rejects_replies_without_a_plan(processor, reply, error):
+    plan = make_planner(processor).parse_plan(reply)
+
+    assert plan["calls"] == []
+    assert len(plan["errors"]) == 1 and error in plan["errors"][0]
+
+
+@pytest.mark.parametrize("call, error", [
+    ({"id": "c1", "tool": "drop_table", "args": {}}, "unknown tool 'drop_table'"),
+    ({"id": "c1", "tool": "analyze_hourly_patterns", "args": {"city": "Austin"}}, "unexpected argument 'city'"),
+    ({"id": "c1", "tool": "analyze_hourly_patterns", "args": {"day_of_week": "Caturday"}}, "must be one of"),
+    ({"id": "c1", "tool": "get_rider_profile", "args": {"user_id": "abc"}}, "'user_id' for get_rider_profile must be int"),
+    ({"id": "c1", "tool": "get_rider_profile", "args": {"user_id": 3.7}}, "'user_id' for get_rider_profile must be int"),
+    ({"id": "c1", "tool": "get_most_frequent_riders", "args": {"limit": True}}, "'limit' for get_most_frequent_riders must be int"),
+    ({"id": "c1", "tool": "get_most_frequent_riders", "args": {"limit": "2.5"}}, "must be int"),
+    ({"id": "c1", "tool": "get_destination_stats", "args": {"time_period": "last month"}}, "missing required arguments"),
+    ({"id": "c1", "tool": "get_data_summary", "args": ["x"]}, "must be a JSON object"),
+    ("get_data_summary", "call must be a JSON object"),
+])
+def test_parse_plan_reports_invalid_calls(processor, call, error):
+    valid = {"id": "ok", "tool": "get_data_summary", "args": {}}
+    plan = make_planner(processor).parse_plan(plan_reply(call, valid))
+
+    assert plan["calls"] == [valid]
+    assert len(plan["errors"]) == 1
+    assert plan["errors"][0].startswith("c1: ") and error in plan["errors"][0]
+
+
+def test_parse_plan_makes_reused_ids_unique(processor):
+    plan = make_planner(processor).parse_plan(plan_reply(
+        {"id": "c1", "tool": "analyze_hourly_patterns", "args": {"day_of_week": "Friday"}},
+        {"id": "c1", "tool": "analyze_hourly_patterns", "args": {"day_of_week": "Saturday"}},
+        {"id": "c1_2", "tool": "get_data_summary", "args": {}}
+    ))
+
+    assert [call["id"] for call in plan["calls"]] == ["c1", "c1_2", "c1_2_2"]
+
+
+def test_execute_runs_each_call_and_keeps_errors_per_call(processor):
+    planner = make_planner(processor)
+    calls = planner.parse_plan(plan_reply(
+        {"id": "c1", "tool": "analyze_hourly_patterns", "args": {"day_of_week": "Friday"}},
+        {"id": "c1", "tool": "analyze_hourly_patterns", "args": {"day_of_week": "Saturday"}},
+        {"id": "c2", "tool": "get_destination_stats", "args": {"destination": "Moody Center"}},
+        {"id": "c3", "tool": "get_data_summary", "args": {}}
+    ))["calls"]
+
+    results = planner.execute(calls)
+
+    assert results["c1"]["peak_hour"] == 18
+    assert results["c1_2"]["peak_hour"] == 22
+    assert results["c2"] == {"destination": "Moody Center", "time_period": None, "total_trips": 12}
+    assert results["c3"] == {"error": "summary unavailable"}
+    # "filters" tools get the argument dict, "kwargs" tools get keyword arguments
+    assert ("analyze_hourly_patterns", ({"day_of_week": "Friday"},), {}) in processor.calls
+    assert ("get_destination_stats", (), {"destination": "Moody Center", "time_period": None}) in processor.calls
+
+
+def test_execute_without_calls_returns_no_results(processor):
+    assert make_planner(processor).execute([]) == {}
+
+
+def test_answer_plans_executes_and_answers_from_tool_results(processor):
+    llm = ScriptedLLM([
+        plan_reply(
+            {"id": "c1", "tool": "analyze_hourly_patterns", "args": {"day_of_week": "Friday"}},
+            {"id": "c1", "tool": "analyze_hourly_patterns", "args": {"day_of_week": "Saturday"}},
+            {"id": "c2", "tool": "no_such_tool", "args": {}}
+        ),
+        "Saturday peaks at 10 PM."
+    ])
+    planner = QueryPlanner(processor, llm)
+
+    result = planner.answer("When do Friday and Saturday rides peak?")
+
+    assert result["answer"] == "Saturday peaks at 10 PM."
+    assert [call["id"] for call in result["plan"]] == ["c1", "c1_2"]
+    assert result["errors"] == ["c2: unknown tool 'no_such_tool'"]
+    assert "When do Friday and Saturday rides peak?" in llm.prompts[0]
+    assert "analyze_hourly_patterns" in llm.prompts[0]
+
+    # Each call is paired with its own result in the answer prompt
+    tool_results = json.loads(llm.prompts[1].split("TOOL RESULTS (JSON):")[1].split("INSTRUCTIONS:")[0])
+    assert [(call["args"]["day_of_week"], call["result"]["peak_hour"]) for call in tool_results] == [
+        ("Friday", 18), ("Saturday", 22)
+    ]
+
+
+def test_chatbot_uses_the_model_it_is_given():
+    from chatbot import FetiiChatbot
+
+    llm = ScriptedLLM(["Scripted answer."])
+    chatbot = FetiiChatbot("sk-test", planner_mode=True, llm=llm)
+
+    assert chatbot.llm is llm
+    assert chatbot.planner.llm is llm
+    assert chatbot._generate_answer("How many trips?", "No data") == "Scripted answer."
@@ -0,0 +1,62 @@
+"""
+Trip Rollup Tests
+Checks rollup tables against direct groupbys, built at once and by appending batches.
+
+    python -m pytest test_rollups.py
+"""
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from rollups import TripRollups
+
+PERIOD_FREQUENCIES = {"day": "D", "week": "W-SUN", "month": "M"}
+
+
+def make_trips(count: int = 3000) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        "pickup_time": pd.Timestamp("2025-08-25") + pd.to_timedelta(np.sort(rng.integers(0, 40 * 86400, count)), unit="s"),
+        "user_id": rng.integers(0, 900, count).astype(float),
+        "group_size": rng.integers(1, 15, count)
+    })
+
+
+def test_rider_counts_match_exact_distinct_counts():
+    trips = make_trips()
+    trips.loc[::50, "user_id"] = np.nan
+    rollups = TripRollups(trips)
+
+    for grain, freq in PERIOD_FREQUENCIES.items():
+        periods = trips["pickup_time"].dt.to_period(freq).dt.start_time
+        expected = trips.groupby(periods).agg(trips=("group_size", "size"), passengers=("group_size", "sum"),
+                                              riders=("user_id", "nunique"))
+        table = rollups.table(grain)
+        assert table.index.tolist() == expected.index.tolist()
+        for column in ("trips", "passengers", "riders"):
+            assert table[column].tolist() == expected[column].tolist(), (grain, column)
+
+
+def test_append_matches_building_at_once():
+    trips = make_trips()
+    rollups = TripRollups(trips.iloc[:1000])
+    rollups.append(trips.iloc[1000:2200])
+    rollups.append(trips.iloc[2200:])
+
+    for grain in PERIOD_FREQUENCIES:
+        pdt.assert_frame_equal(rollups.table(grain), TripRollups(trips).table(grain))
+
+
+def test_large_buckets_use_bounded_sketches():
+    riders = 50000
+    trips = pd.DataFrame({
+        "pickup_time": pd.Timestamp("2025-09-06") + pd.to_timedelta(np.arange(riders) % 86400, unit="s"),
+        "user_id": np.arange(riders),
+        "group_size": 1
+    })
+    rollups = TripRollups(trips, grains=["day"])
+
+    sketch = rollups._riders["day"][pd.Timestamp("2025-09-06")]
+    assert not sketch.is_sparse and sketch.registers.nbytes == 1 << rollups.precision
+    assert abs(rollups.table("day")["riders"].iloc[0] - riders) < 0.03 * riders
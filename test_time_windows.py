@@ -0,0 +1,49 @@
+"""
+Time Window Tests
+Resolves time phrases against a fixed anchor, including phrases that are not real dates.
+
+    python -m pytest test_time_windows.py
+"""
+
+import pandas as pd
+import pytest
+
+from time_windows import find_time_window, describe_window
+
+ANCHOR = pd.Timestamp("2025-09-20 22:13")
+
+
+@pytest.mark.parametrize("text, start, end", [
+    ("trips last month", "2025-08-01", "2025-09-01"),
+    ("past 3 weeks", "2025-08-31", "2025-09-21"),
+    ("last 10 days", "2025-09-11", "2025-09-21"),
+    ("this week", "2025-09-15", "2025-09-22"),
+    ("previous year", "2024-01-01", "2025-01-01"),
+    ("yesterday", "2025-09-19", "2025-09-20"),
+    ("trips on 2025-09-05", "2025-09-05", "2025-09-06"),
+    ("from 2025-09-03 to 2025-09-01", "2025-09-01", "2025-09-04"),
+    ("in may", "2025-05-01", "2025-06-01"),
+    ("since october", "2024-10-01", "2024-11-01"),
+])
+def test_phrases_resolve_to_windows(text, start, end):
+    window = find_time_window(text, ANCHOR)
+
+    assert (window["start"], window["end"]) == (pd.Timestamp(start), pd.Timestamp(end))
+
+
+@pytest.mark.parametrize("text", [
+    "trips on 2025-02-30",
+    "between 2025-13-01 and 2025-14-01",
+    "past 10000000 days",
+    "last 99999999 months",
+    "in may 9999",
+    "how many trips?",
+])
+def test_invalid_dates_and_huge_spans_are_ignored(text):
+    assert find_time_window(text, ANCHOR) is None
+
+
+def test_invalid_phrase_falls_through_to_the_next_one():
+    window = find_time_window("between 2025-02-30 and 2025-03-02, or last week", ANCHOR)
+
+    assert describe_window(window) == "last week (2025-09-08 to 2025-09-14)"
@@ -0,0 +1,76 @@
+"""
+Trip Store Tests
+Round-trips frames through the memory-mapped columnar store.
+
+    python -m pytest test_trip_store.py
+"""
+
+import datetime
+import mmap
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from trip_store import write_store, open_store, read_manifest, value_counts
+
+
+def mapped(array: np.ndarray) -> bool:
+    """Whether an array's memory is a file mapping rather than the process heap"""
+    while array is not None and not isinstance(array, mmap.mmap):
+        array = getattr(array, "base", None)
+    return isinstance(array, mmap.mmap)
+
+
+@pytest.fixture
+def trips():
+    return pd.DataFrame({
+        "trip_id": np.arange(6),
+        "pickup_time": pd.date_range("2025-09-01 20:00", periods=6, freq="h"),
+        "dropoff_location": ["Zilker Park", "Moody Center", None, "Moody Center", "Rainey Street", "Zilker Park"],
+        "day_of_week": pd.Series(["Friday", "Friday", "Saturday", "Saturday", "Saturday", "Sunday"], dtype="string"),
+        "group_size": [4, 8, 12, 6, 9, 14]
+    })
+
+
+def test_string_columns_open_as_categoricals_over_mapped_codes(tmp_path, trips):
+    write_store(str(tmp_path / "store"), {"trips": trips})
+    tables, _ = open_store(str(tmp_path / "store"))
+    stored = tables["trips"]
+
+    for column in ("dropoff_location", "day_of_week"):
+        assert isinstance(stored[column].dtype, pd.CategoricalDtype)
+        assert mapped(stored[column].array.codes)
+        assert stored[column].astype(object).where(stored[column].notna(), None).tolist() == \
+            trips[column].astype(object).where(trips[column].notna(), None).tolist()
+    assert mapped(stored["group_size"].to_numpy())
+    # Sorted categories, so sorting by code is sorting by value
+    assert list(stored["dropoff_location"].cat.categories) == ["Moody Center", "Rainey Street", "Zilker Park"]
+
+
+def test_value_counts_matches_plain_column_on_selections(tmp_path, trips):
+    write_store(str(tmp_path / "store"), {"trips": trips})
+    stored = open_store(str(tmp_path / "store"))[0]["trips"]
+
+    for rows in (slice(None), slice(1, 5), slice(4, 6)):
+        for column in ("dropoff_location", "day_of_week"):
+            expected = trips[column].iloc[rows].value_counts()
+            actual = value_counts(stored[column].iloc[rows])
+            # No zero rows for categories outside the selection, ties in first-seen order
+            assert actual.index.tolist() == expected.index.tolist()
+            assert actual.tolist() == expected.tolist()
+
+
+def test_non_string_object_values_are_recorded_or_rejected(tmp_path):
+    mixed = pd.DataFrame({"code": pd.Series([7, "A1", 2.5, None], dtype=object)})
+    write_store(str(tmp_path / "mixed"), {"t": mixed})
+    entry = read_manifest(str(tmp_path / "mixed"))["tables"]["t"]["columns"][0]
+    stored = open_store(str(tmp_path / "mixed"))[0]["t"]
+
+    assert entry["category_types"] == ["float", "int", "str"]
+    assert [type(value) for value in stored["code"].iloc[:3]] == [int, str, float]
+
+    times = pd.DataFrame({"start": pd.Series([datetime.time(9, 30)], dtype=object)})
+    with pytest.raises(ValueError, match="'start' holds time values"):
+        write_store(str(tmp_path / "times"), {"t": times})
+    assert not any(tmp_path.glob("times*"))
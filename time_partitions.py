@@ -0,0 +1,160 @@
+from typing import Dict, List, Any, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+RowSelector = Union[slice, np.ndarray]
+
+# Epoch value used for missing pickup times; sorts after every real timestamp
+MISSING_EPOCH = np.iinfo(np.int64).max
+HOUR_NS = 3600 * 10**9
+
+# Rolling-window bucket sizes and the pandas frequency of their boundaries
+BUCKET_FREQUENCIES = {"day": "D", "week": "W-MON", "month": "MS"}
+
+
+def first_column(trips: pd.DataFrame, candidates) -> Optional[str]:
+    """First of the candidate column names (mapped, then raw Fetii names) present in trips"""
+    return next((col for col in candidates if col in trips.columns), None)
+
+
+def to_epoch_ns(timestamps) -> np.ndarray:
+    """int64 nanoseconds since the epoch, with MISSING_EPOCH for unparseable or missing values"""
+    values = pd.to_datetime(pd.Series(timestamps), errors="coerce").to_numpy().astype("datetime64[ns]")
+    epochs = values.view(np.int64).copy()
+    epochs[np.isnat(values)] = MISSING_EPOCH
+    return epochs
+
+
+def bucket_starts(epochs: np.ndarray, grain: str) -> np.ndarray:
+    """Start of the day, ISO week (Monday) or month containing each epoch, as datetime64[ns]"""
+    days = epochs.view("datetime64[ns]").astype("datetime64[D]")
+    if grain == "day":
+        starts = days
+    elif grain == "week":
+        # 1970-01-01 was a Thursday, so (days + 3) % 7 is 0 on Mondays
+        starts = days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+    elif grain == "month":
+        starts = days.astype("datetime64[M]")
+    else:
+        raise ValueError(f"Unknown grain {grain!r}; expected one of {list(BUCKET_FREQUENCIES)}")
+    return starts.astype("datetime64[ns]")
+
+
+def _bound(value) -> Optional[int]:
+    """Window bound as epoch nanoseconds"""
+    if value is None:
+        return None
+    return int(pd.Timestamp(value).as_unit("ns").value)
+
+
+class TimePartitions:
+    """Month partitions over an int64 pickup-epoch index, with min/max metadata used to skip rows outside a window"""
+
+    def __init__(self, timestamps: pd.Series = None, epochs: np.ndarray = None):
+        epochs = to_epoch_ns(timestamps) if epochs is None else np.asarray(epochs, dtype=np.int64)
+
+        # Trips are normally stored sorted by pickup time, so partitions are plain row ranges.
+        # Otherwise keep a sort order and map partition ranges back to row positions.
+        if epochs.size < 2 or bool(np.all(epochs[1:] >= epochs[:-1])):
+            self.order = None
+            self.sorted_epochs = epochs
+        else:
+            self.order = np.argsort(epochs, kind="stable")
+            self.sorted_epochs = epochs[self.order]
+        valid = int(np.searchsorted(self.sorted_epochs, MISSING_EPOCH, side="left"))
+        self.valid = valid
+
+        months = self.sorted_epochs[:valid].view("datetime64[ns]").astype("datetime64[M]")
+        boundaries = np.flatnonzero(months[1:] != months[:-1]) + 1
+        starts = np.concatenate([[0], boundaries]) if valid else np.array([], dtype=np.int64)
+        stops = np.concatenate([boundaries, [valid]]) if valid else np.array([], dtype=np.int64)
+
+        self.partitions: List[Dict[str, Any]] = [
+            {
+                "key": str(months[start]),
+                "month": int(months[start].astype(int) % 12) + 1,
+                "start": int(start),
+                "stop": int(stop),
+                "rows": int(stop - start),
+                "min": pd.Timestamp(int(self.sorted_epochs[start])),
+                "max": pd.Timestamp(int(self.sorted_epochs[stop - 1]))
+            }
+            for start, stop in zip(starts, stops)
+        ]
+        self._mins = np.array([self.sorted_epochs[p["start"]] for p in self.partitions], dtype=np.int64)
+        self._maxs = np.array([self.sorted_epochs[p["stop"] - 1] for p in self.partitions], dtype=np.int64)
+
+    def _selector(self, lo: int, hi: int) -> RowSelector:
+        """Row selector (for iloc) covering sorted positions [lo, hi)"""
+        if self.order is None:
+            return slice(lo, hi)
+        return np.sort(self.order[lo:hi])
+
+    def prune(self, start=None, end=None) -> List[Dict[str, Any]]:
+        """Partitions whose [min, max] range overlaps the window [start, end)"""
+        first, last = 0, len(self.partitions)
+        start, end = _bound(start), _bound(end)
+        if start is not None:
+            first = int(np.searchsorted(self._maxs, start, side="left"))
+        if end is not None:
+            last = int(np.searchsorted(self._mins, end, side="left"))
+        return self.partitions[first:last]
+
+    def span(self, start=None, end=None) -> tuple:
+        """Sorted positions [lo, hi) of trips in [start, end); only the edge partitions are searched"""
+        candidates = self.prune(start, end)
+        if not candidates:
+            return 0, 0
+
+        lo, hi = candidates[0]["start"], candidates[-1]["stop"]
+        if start is not None:
+            first = candidates[0]
+            lo = first["start"] + int(np.searchsorted(
+                self.sorted_epochs[first["start"]:first["stop"]], _bound(start), side="left"))
+        if end is not None:
+            last = candidates[-1]
+            hi = last["start"] + int(np.searchsorted(
+                self.sorted_epochs[last["start"]:last["stop"]], _bound(end), side="left"))
+        return lo, hi
+
+    def positions(self, start=None, end=None) -> RowSelector:
+        """Rows picked up in [start, end)"""
+        return self._selector(*self.span(start, end))
+
+    def count(self, start=None, end=None) -> int:
+        """Number of trips in [start, end) without touching the rows"""
+        lo, hi = self.span(start, end)
+        return hi - lo
+
+    def month_positions(self, month: int, year: Optional[int] = None) -> RowSelector:
+        """Rows in a calendar month (across all years unless one is given)"""
+        ranges = [
+            (p["start"], p["stop"]) for p in self.partitions
+            if p["month"] == month and (year is None or p["key"].startswith(f"{year:04d}-"))
+        ]
+        if len(ranges) == 1:
+            return self._selector(*ranges[0])
+        sorted_positions = np.concatenate([np.arange(lo, hi) for lo, hi in ranges]) if ranges else np.array([], dtype=np.int64)
+        return sorted_positions if self.order is None else np.sort(self.order[sorted_positions])
+
+    def rolling_counts(self, bucket: str = "day", window: int = 1) -> pd.Series:
+        """Trips per day/week/month bucket, summed over the trailing `window` buckets.
+
+        Counts come from cumulative positions at bucket edges, so each window costs O(1)."""
+        if not self.valid:
+            return pd.Series(dtype="int64")
+        freq = BUCKET_FREQUENCIES[bucket]
+        first = pd.Timestamp(int(self.sorted_epochs[0])).normalize()
+        last = pd.Timestamp(int(self.sorted_epochs[self.valid - 1]))
+        if bucket == "week":
+            first -= pd.Timedelta(days=first.dayofweek)
+        elif bucket == "month":
+            first = first.replace(day=1)
+        edges = pd.date_range(first, last + pd.tseries.frequencies.to_offset(freq), freq=freq)
+
+        # cumulative[i] = trips picked up before edges[i]
+        cumulative = np.searchsorted(self.sorted_epochs[:self.valid], edges.as_unit("ns").asi8, side="left")
+        ends = cumulative[1:]
+        starts = cumulative[np.maximum(np.arange(1, len(cumulative)) - window, 0)]
+        return pd.Series(ends - starts, index=edges[:-1], name="trips")
@@ -0,0 +1,129 @@
+import re
+from typing import Dict, Any, Optional
+
+import pandas as pd
+
+MONTHS = {
+    "january": 1, "jan": 1, "february": 2, "feb": 2, "march": 3, "mar": 3,
+    "april": 4, "apr": 4, "may": 5, "june": 6, "jun": 6, "july": 7, "jul": 7,
+    "august": 8, "aug": 8, "september": 9, "sept": 9, "sep": 9,
+    "october": 10, "oct": 10, "november": 11, "nov": 11, "december": 12, "dec": 12
+}
+_MONTH_NAMES = "|".join(sorted(MONTHS, key=len, reverse=True))
+_DATE = r"\d{4}-\d{1,2}-\d{1,2}"
+
+# Phrase patterns
+DATE_RANGE_PATTERN = re.compile(rf"\b(?:from|between)\s+({_DATE})\s+(?:to|and|until|through)\s+({_DATE})\b")
+SINGLE_DATE_PATTERN = re.compile(rf"\b(?:on\s+)?({_DATE})\b")
+ROLLING_PATTERN = re.compile(r"\b(?:last|past|previous)\s+(\d+)\s+(day|week|month)s?\b")
+CALENDAR_PATTERN = re.compile(r"\b(this|current|last|previous)\s+(week|month|year)\b")
+DAY_PATTERN = re.compile(r"\b(today|yesterday)\b")
+# "May" is only a month when it reads like one ("in may", "may 2025")
+MONTH_PATTERN = re.compile(
+    rf"\b(?:(in|during|for|of|since)\s+)?({_MONTH_NAMES})\b(?:\s+(\d{{4}}))?"
+)
+
+
+def _month_start(timestamp: pd.Timestamp) -> pd.Timestamp:
+    return timestamp.normalize().replace(day=1)
+
+
+def _window(label: str, start: pd.Timestamp, end: pd.Timestamp) -> Dict[str, Any]:
+    # Windows are compared with nanosecond epochs; out-of-range years raise here like other bad dates
+    return {"label": label, "start": start.as_unit("ns"), "end": end.as_unit("ns")}
+
+
+def _month_window(text: str, anchor: pd.Timestamp) -> Optional[Dict[str, Any]]:
+    """Named month, optionally with a year; without one, its latest occurrence up to the anchor"""
+    for match in MONTH_PATTERN.finditer(text):
+        preposition, name, year = match.groups()
+        if name == "may" and not (year or preposition):
+            continue
+        month = MONTHS[name]
+        if year:
+            year = int(year)
+        else:
+            year = anchor.year if month <= anchor.month else anchor.year - 1
+        start = pd.Timestamp(year=year, month=month, day=1)
+        return _window(match.group(0).strip(), start, start + pd.DateOffset(months=1))
+    return None
+
+
+def _date_range_window(text: str, today: pd.Timestamp) -> Optional[Dict[str, Any]]:
+    match = DATE_RANGE_PATTERN.search(text)
+    if not match:
+        return None
+    start, end = sorted([pd.Timestamp(match.group(1)), pd.Timestamp(match.group(2))])
+    return _window(match.group(0), start, end + pd.Timedelta(days=1))
+
+
+def _rolling_window(text: str, today: pd.Timestamp) -> Optional[Dict[str, Any]]:
+    match = ROLLING_PATTERN.search(text)
+    if not match:
+        return None
+    count, unit = int(match.group(1)), match.group(2)
+    end = today + pd.Timedelta(days=1)
+    offset = pd.DateOffset(months=count) if unit == "month" else pd.Timedelta(days=count * (7 if unit == "week" else 1))
+    return _window(match.group(0), end - offset, end)
+
+
+def _calendar_window(text: str, today: pd.Timestamp) -> Optional[Dict[str, Any]]:
+    match = CALENDAR_PATTERN.search(text)
+    if not match:
+        return None
+    previous = match.group(1) in ("last", "previous")
+    unit = match.group(2)
+    if unit == "week":
+        start = today - pd.Timedelta(days=today.dayofweek)
+        length = pd.Timedelta(days=7)
+        start = start - length if previous else start
+        return _window(match.group(0), start, start + length)
+    if unit == "month":
+        start = _month_start(today) - pd.DateOffset(months=1) if previous else _month_start(today)
+        return _window(match.group(0), start, start + pd.DateOffset(months=1))
+    start = pd.Timestamp(year=today.year - 1 if previous else today.year, month=1, day=1)
+    return _window(match.group(0), start, start + pd.DateOffset(years=1))
+
+
+def _day_window(text: str, today: pd.Timestamp) -> Optional[Dict[str, Any]]:
+    match = DAY_PATTERN.search(text)
+    if not match:
+        return None
+    start = today - pd.Timedelta(days=1) if match.group(1) == "yesterday" else today
+    return _window(match.group(0), start, start + pd.Timedelta(days=1))
+
+
+def _single_date_window(text: str, today: pd.Timestamp) -> Optional[Dict[str, Any]]:
+    match = SINGLE_DATE_PATTERN.search(text)
+    if not match:
+        return None
+    start = pd.Timestamp(match.group(1))
+    return _window(match.group(0), start, start + pd.Timedelta(days=1))
+
+
+# Phrase resolvers, tried in order; the first that resolves wins
+WINDOW_RESOLVERS = (_date_range_window, _rolling_window, _calendar_window, _day_window, _single_date_window,
+                    _month_window)
+
+
+def find_time_window(text: str, anchor) -> Optional[Dict[str, Any]]:
+    """Resolve the first time phrase in the text to a [start, end) window anchored at `anchor`"""
+    if not text or anchor is None or pd.isna(anchor):
+        return None
+    text = text.lower()
+    today = pd.Timestamp(anchor).normalize()
+    for resolve in WINDOW_RESOLVERS:
+        try:
+            window = resolve(text, today)
+        except (ValueError, OverflowError):
+            # Impossible dates ("2025-02-30") and spans past the Timestamp range are not time phrases
+            continue
+        if window is not None:
+            return window
+    return None
+
+
+def describe_window(window: Dict[str, Any]) -> str:
+    """Human-readable form such as 'last month (2025-08-01 to 2025-08-31)'"""
+    last_day = window["end"] - pd.Timedelta(days=1)
+    return f"{window['label']} ({window['start']:%Y-%m-%d} to {last_day:%Y-%m-%d})"
@@ -0,0 +1,60 @@
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+MAX_PAGE_SIZE = 1000
+# Columns that follow pickup order, so time-sorted trips need no sort for them
+TIME_ORDER_COLUMNS = ('pickup_time',)
+
+
+def filter_rows(trips: pd.DataFrame, rows: np.ndarray, filters: Dict[str, Any] = None) -> np.ndarray:
+    """Narrow row positions by column filters, reading only the candidate rows.
+
+    A (low, high) tuple is an inclusive range, a list is membership and anything else is equality."""
+    for column, condition in (filters or {}).items():
+        if column not in trips.columns or condition is None:
+            continue
+        # A store Categorical gathers its codes here instead of decoding the whole column
+        values = trips[column].iloc[rows]
+        if isinstance(condition, tuple):
+            low, high = condition
+            mask = np.ones(len(rows), dtype=bool)
+            if low is not None:
+                mask &= (values >= low).to_numpy()
+            if high is not None:
+                mask &= (values <= high).to_numpy()
+        elif isinstance(condition, list):
+            mask = values.isin(condition).to_numpy()
+        else:
+            mask = (values == condition).to_numpy()
+        rows = rows[mask]
+    return rows
+
+
+def sort_rows(trips: pd.DataFrame, rows: np.ndarray, sort_by: Optional[str] = None,
+              ascending: bool = True, time_sorted: bool = False) -> np.ndarray:
+    """Order row positions by one column (missing values last); ties keep row order"""
+    if not sort_by or sort_by not in trips.columns:
+        return rows
+    if time_sorted and sort_by in TIME_ORDER_COLUMNS and ascending:
+        return rows
+    # Store Categoricals have sorted categories, so they sort by code in value order
+    keys = trips[sort_by].iloc[rows].reset_index(drop=True)
+    order = keys.sort_values(ascending=ascending, kind="stable", na_position="last").index.to_numpy()
+    return rows[order]
+
+
+def page_of(trips: pd.DataFrame, rows: np.ndarray, page: int = 0, page_size: int = 50) -> Dict[str, Any]:
+    """One page of rows plus paging metadata; only the page's rows are materialized"""
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+    total = len(rows)
+    pages = max(1, -(-total // page_size))
+    page = min(max(0, int(page)), pages - 1)
+    return {
+        "rows": trips.iloc[rows[page * page_size:(page + 1) * page_size]],
+        "total": total,
+        "page": page,
+        "pages": pages,
+        "page_size": page_size
+    }
@@ -0,0 +1,76 @@
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from user_directory import UserDirectory
+
+
+class TripRiders:
+    """Trip -> checked-in riders adjacency in CSR form.
+
+    riders[offsets[i]:offsets[i + 1]] are the user ids checked in on the trip at row i, so per-trip
+    rider attributes are array gathers and bincounts rather than a join that repeats every trip row."""
+
+    def __init__(self, trip_ids: np.ndarray, checkins: pd.DataFrame):
+        trip_ids = np.asarray(trip_ids)
+        checkins = checkins.dropna(subset=['trip_id', 'user_id'])
+
+        # Locate each check-in's trip row by binary search over the sorted trip ids
+        order = np.argsort(trip_ids, kind="stable")
+        sorted_ids = trip_ids[order]
+        checkin_trips = checkins['trip_id'].to_numpy().astype(trip_ids.dtype)
+        found = np.searchsorted(sorted_ids, checkin_trips)
+        found = np.minimum(found, max(len(sorted_ids) - 1, 0))
+        known = (sorted_ids[found] == checkin_trips) if len(sorted_ids) else np.zeros(len(checkin_trips), dtype=bool)
+        rows = order[found[known]]
+
+        user_ids = checkins['user_id'].to_numpy()[known].astype(np.int64)
+        id_dtype = np.int32 if not len(user_ids) or user_ids.max() <= np.iinfo(np.int32).max else np.int64
+        by_trip = np.argsort(rows, kind="stable")
+        self.riders = user_ids[by_trip].astype(id_dtype)
+        self.offsets = np.zeros(len(trip_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(trip_ids)), out=self.offsets[1:])
+        self.unmatched = int((~known).sum())
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def counts(self) -> np.ndarray:
+        """Checked-in riders per trip"""
+        return np.diff(self.offsets)
+
+    def riders_of(self, row: int) -> np.ndarray:
+        """User ids checked in on one trip"""
+        return self.riders[self.offsets[row]:self.offsets[row + 1]]
+
+    def trip_rows(self) -> np.ndarray:
+        """Trip row of every entry in `riders`"""
+        return np.repeat(np.arange(len(self), dtype=np.int64), self.counts())
+
+    def age_mix(self, directory: UserDirectory, age_groups: List[str]) -> pd.DataFrame:
+        """Per-trip checked-in rider count, mean age of riders with demographics and riders per age group
+        ("Unknown" for riders missing from the demographics)"""
+        codes = directory.codes(self.riders)
+        known = codes >= 0
+        ages = np.full(len(self.riders), np.nan)
+        if 'age' in directory.attributes:
+            ages = np.asarray(directory.gather(codes, ['age'])['age'], dtype=np.float64)
+        labels = np.asarray(directory.gather(codes, ['age_group'])['age_group'], dtype=object)
+        labels[~known] = "Unknown"
+
+        trips = len(self)
+        trip_rows = self.trip_rows()
+        aged = ~np.isnan(ages)
+        riders_with_age = np.bincount(trip_rows[aged], minlength=trips)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_age = np.bincount(trip_rows[aged], weights=ages[aged], minlength=trips) / riders_with_age
+        mix = {"checked_in_riders": self.counts(), "riders_with_age": riders_with_age, "mean_rider_age": mean_age}
+
+        groups = list(age_groups) + ["Unknown"] if "Unknown" not in age_groups else list(age_groups)
+        codes = pd.Categorical(labels, categories=groups).codes
+        counts = np.bincount(trip_rows[codes >= 0] * len(groups) + codes[codes >= 0],
+                             minlength=trips * len(groups)).reshape(trips, len(groups))
+        for i, group in enumerate(groups):
+            mix[group] = counts[:, i].astype(np.int32)
+        return pd.DataFrame(mix)
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# On-disk columnar store: one .npy file per column plus a JSON manifest.
+# Numeric and datetime columns are memory-mapped as-is; string columns are
+# dictionary-encoded (integer codes + categories) and opened as Categoricals
+# over the mapped codes, so the codes pages are shared between processes too.
+STORE_FORMAT = 2
+MANIFEST_FILE = "manifest.json"
+# Category values that JSON round-trips with their type intact (bool before int: bool is an int subclass)
+CATEGORY_TYPES = {bool: "bool", int: "int", float: "float", str: "str"}
+
+
+def _column_kind(series: pd.Series) -> str:
+    """Classify a column as numeric, datetime or string storage"""
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return "numeric"
+    if pd.api.types.is_datetime64_dtype(series) or pd.api.types.is_timedelta64_dtype(series):
+        return "datetime"
+    return "string"
+
+
+def _code_dtype(categories: int) -> np.dtype:
+    """Smallest code width pandas uses for this many categories, so opening wraps the codes without a copy"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if categories < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _category_values(name: str, categories) -> list:
+    """Category values as JSON scalars; anything JSON would not round-trip is rejected"""
+    values = []
+    for value in categories:
+        if isinstance(value, np.generic):
+            value = value.item()
+        if type(value) not in CATEGORY_TYPES:
+            raise ValueError(f"Column {name!r} holds {type(value).__name__} values, which the trip store cannot encode")
+        values.append(value)
+    return values
+
+
+def _encode_strings(name: str, series: pd.Series):
+    """Dictionary-encode a column: (codes, category values, category value types)"""
+    try:
+        # Sorted categories keep groupby order and value_counts tie-breaks the same as on the plain column
+        codes, categories = pd.factorize(series, sort=True, use_na_sentinel=True)
+    except TypeError:
+        # Mixed value types do not sort; keep first-seen order
+        codes, categories = pd.factorize(series, use_na_sentinel=True)
+    values = _category_values(name, categories)
+    types = sorted({CATEGORY_TYPES[type(value)] for value in values})
+    return codes.astype(_code_dtype(len(values))), values, types
+
+
+def _write_table(frame: pd.DataFrame, directory: str, table: str) -> Dict[str, Any]:
+    """Write one frame's columns and return its manifest entry"""
+    columns = []
+    for i, name in enumerate(frame.columns):
+        series = frame[name]
+        kind = _column_kind(series)
+        entry = {"name": name, "kind": kind, "file": f"{table}.{i}.npy"}
+
+        if kind == "numeric":
+            values = series.to_numpy()
+            entry["dtype"] = str(values.dtype)
+        elif kind == "datetime":
+            values = series.to_numpy()
+            entry["dtype"] = str(values.dtype)
+            values = values.view(np.int64)
+        else:
+            values, categories, types = _encode_strings(name, series)
+            entry["dtype"] = "category"
+            # Recorded so readers know the column is not plain strings
+            entry["category_types"] = types
+            entry["categories"] = f"{table}.{i}.categories.json"
+            with open(os.path.join(directory, entry["categories"]), "w", encoding="utf-8") as f:
+                json.dump(categories, f)
+
+        np.save(os.path.join(directory, entry["file"]), np.ascontiguousarray(values))
+        columns.append(entry)
+    return {"rows": len(frame), "columns": columns}
+
+
+def write_store(directory: str, tables: Dict[str, Optional[pd.DataFrame]], metadata: Dict[str, Any] = None) -> str:
+    """Write frames to a columnar store, replacing any existing store atomically"""
+    directory = os.path.abspath(directory)
+    staging = f"{directory}.tmp-{os.getpid()}"
+    if os.path.exists(staging):
+        shutil.rmtree(staging)
+    os.makedirs(staging)
+
+    manifest = {"format": STORE_FORMAT, "metadata": metadata or {}, "tables": {}}
+    try:
+        for table, frame in tables.items():
+            if frame is not None:
+                manifest["tables"][table] = _write_table(frame.reset_index(drop=True), staging, table)
+        with open(os.path.join(staging, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.replace(staging, directory)
+    return directory
+
+
+def default_store_dir() -> str:
+    """Per-user cache directory for stores ($XDG_CACHE_HOME/fetii/trip_stores, else ~/.cache/...)"""
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "fetii", "trip_stores")
+
+
+def source_fingerprint(path: str, version: int = 0) -> str:
+    """Key a source file by path, size and modification time (plus a preprocessing version)"""
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}|{version}|{STORE_FORMAT}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def read_manifest(directory: str) -> Optional[Dict[str, Any]]:
+    """Return the store manifest, or None if the directory holds no compatible store"""
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return manifest if manifest.get("format") == STORE_FORMAT else None
+
+
+def _read_column(directory: str, entry: Dict[str, Any]) -> Any:
+    """Map one column; values (or string codes) stay on the shared file pages"""
+    # Copy-on-write mapping: pages are shared between processes until a process writes to them
+    values = np.load(os.path.join(directory, entry["file"]), mmap_mode="c").view(np.ndarray)
+    if entry["kind"] == "numeric":
+        return values
+    if entry["kind"] == "datetime":
+        return values.view(np.dtype(entry["dtype"]))
+
+    with open(os.path.join(directory, entry["categories"]), "r", encoding="utf-8") as f:
+        categories = json.load(f)
+    # One recorded value type lets pandas infer the categories dtype; mixed types stay Python objects
+    dtype = None if len(entry["category_types"]) == 1 else object
+    # Codes of -1 are missing values
+    return pd.Categorical.from_codes(values, categories=pd.Index(categories, dtype=dtype))
+
+
+def value_counts(series: pd.Series) -> pd.Series:
+    """series.value_counts() that treats a store Categorical like the plain column it encodes.
+
+    A Categorical lists categories missing from the selection with a count of 0 and breaks ties by
+    category order; a plain column lists present values only, ties in order of first appearance."""
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.value_counts()
+    codes = series.cat.codes.to_numpy()
+    present, first, counts = np.unique(codes, return_index=True, return_counts=True)
+    seen = present >= 0
+    present, first, counts = present[seen], first[seen], counts[seen]
+    order = np.lexsort((first, -counts))
+    index = pd.Index(series.cat.categories.take(present[order]), name=series.name)
+    return pd.Series(counts[order], index=index, name="count")
+
+
+def _read_table(directory: str, table: Dict[str, Any]) -> pd.DataFrame:
+    """Assemble a frame from mapped columns without copying them"""
+    data = {entry["name"]: _read_column(directory, entry) for entry in table["columns"]}
+    return pd.DataFrame(data, copy=False)
+
+
+def open_store(directory: str) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Any]]:
+    """Open a store written by write_store; returns ({table: frame}, metadata)"""
+    manifest = read_manifest(directory)
+    if manifest is None:
+        raise FileNotFoundError(f"No trip store found in {directory}")
+    tables = {name: _read_table(directory, table) for name, table in manifest["tables"].items()}
+    return tables, manifest["metadata"]
+
+
+
+def main():
+    """Build a store from an Excel file: python trip_store.py <data.xlsx> <store_dir>"""
+    import sys
+    from data_processor import FetiiDataProcessor
+    from events import LoggingSink
+
+    if len(sys.argv) != 3:
+        raise SystemExit("usage: python trip_store.py <data.xlsx> <store_dir>")
+    processor = FetiiDataProcessor(LoggingSink())
+    if not processor.load_data(data_file=sys.argv[1]):
+        raise SystemExit(f"Could not load data from {sys.argv[1]}")
+    print(f"✅ Trip store written to {processor.save_store(sys.argv[2])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from typing import Dict, List, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class UserDirectory:
+    """User ids factorized to dense int32 codes, with per-user attributes stored as arrays indexed by code.
+
+    Trip-level demographics are a gather (attributes[codes]) instead of a join that copies the trips frame."""
+
+    def __init__(self, users: pd.DataFrame, id_column: str = 'user_id'):
+        users = users[users[id_column].notna()].drop_duplicates(subset=id_column, keep="first")
+        order = np.argsort(users[id_column].to_numpy(), kind="stable")
+        # Code = position in the sorted ids, so lookups are binary searches
+        self.ids = users[id_column].to_numpy()[order]
+        self.attributes: Dict[str, Any] = {
+            column: users[column].array.take(order) for column in users.columns if column != id_column
+        }
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def codes(self, user_ids) -> np.ndarray:
+        """Dense code for each user id, -1 for ids without a record"""
+        user_ids = np.asarray(user_ids)
+        if not len(self.ids) or not len(user_ids):
+            return np.full(len(user_ids), -1, dtype=np.int32)
+        found = np.minimum(np.searchsorted(self.ids, user_ids), len(self.ids) - 1)
+        return np.where(self.ids[found] == user_ids, found, -1).astype(np.int32)
+
+    def gather(self, codes: np.ndarray, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Attribute values for each code; code -1 gives a missing value"""
+        columns = list(self.attributes) if columns is None else columns
+        return {column: self.attributes[column].take(codes, allow_fill=True) for column in columns}
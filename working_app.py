@@ -6,15 +6,21 @@ from streamlit_chat import message
 from streamlit_option_menu import option_menu
 import os
 from datetime import datetime, timedelta
-import io
 import json
 import uuid
 import numpy as np
 import glob
+from urllib.parse import urlencode
 
 # Import our custom modules
 from chatbot import FetiiChatbot
+from blob_store import BlobStore
+from chat_store import ChatStore
 from data_processor import FetiiDataProcessor
+from events import StreamlitSink
+from exports import export_to_file, export_file_name, export_mime, parquet_available
+from geo_bins import MAP_LAYERS, MAP_DETAIL_LEVELS
+from trip_store import read_manifest, value_counts
 from config import STREAMLIT_CONFIG, AUSTIN_DESTINATIONS
 
 # Page configuration
@@ -27,6 +33,9 @@ st.set_page_config(
 
 # Use default Streamlit styling - no custom CSS
 
+# App settings restored across restarts (chat history lives in the chat store)
+PERSISTED_SETTINGS = ('current_session_id', 'data_loaded', 'api_key_entered', 'auto_loaded', 'api_key', 'loaded_data_file')
+
 def initialize_session_state():
     """Initialize session state variables"""
     if 'chatbot' not in st.session_state:
@@ -61,44 +70,46 @@ def initialize_session_state():
     
     if 'users_data' not in st.session_state:
         st.session_state.users_data = None
+    
+    if 'chat_store' not in st.session_state:
+        st.session_state.chat_store = ChatStore()
+    
+    if 'blob_store' not in st.session_state:
+        st.session_state.blob_store = BlobStore()
+    
+    if 'session_restored' not in st.session_state:
+        st.session_state.session_restored = False
 
 def save_session_data():
-    """Save session data to JSON file for persistence"""
+    """Save app settings for persistence; chat messages are appended as they are sent"""
     try:
-        session_data = {
-            'chat_sessions': st.session_state.chat_sessions,
-            'current_session_id': st.session_state.current_session_id,
-            'data_loaded': st.session_state.data_loaded,
-            'api_key_entered': st.session_state.api_key_entered,
-            'auto_loaded': st.session_state.auto_loaded,
-            'api_key': st.session_state.api_key,
-            'chat_history': st.session_state.chat_history,
-            'loaded_data_file': st.session_state.loaded_data_file
-        }
-        
-        with open('session_data.json', 'w') as f:
-            json.dump(session_data, f, indent=2)
+        st.session_state.chat_store.save_settings({key: st.session_state[key] for key in PERSISTED_SETTINGS})
     except Exception as e:
         st.error(f"Error saving session data: {str(e)}")
 
 def load_session_data():
-    """Load session data from JSON file"""
+    """Restore settings and the chat session list once per browser session; messages load when a session is opened"""
+    if st.session_state.session_restored:
+        return True
     try:
-        if os.path.exists('session_data.json'):
-            with open('session_data.json', 'r') as f:
-                session_data = json.load(f)
-                
-            # Restore session state
-            st.session_state.chat_sessions = session_data.get('chat_sessions', {})
-            st.session_state.current_session_id = session_data.get('current_session_id', None)
-            st.session_state.data_loaded = session_data.get('data_loaded', False)
-            st.session_state.api_key_entered = session_data.get('api_key_entered', False)
-            st.session_state.auto_loaded = session_data.get('auto_loaded', False)
-            st.session_state.api_key = session_data.get('api_key', None)
-            st.session_state.chat_history = session_data.get('chat_history', [])
-            st.session_state.loaded_data_file = session_data.get('loaded_data_file', None)
-            
-            return True
+        store = st.session_state.chat_store
+        # Histories saved by older versions as one session_data.json are imported once
+        store.import_legacy()
+        settings = store.settings()
+        
+        # Restore session state
+        st.session_state.current_session_id = settings.get('current_session_id', None)
+        st.session_state.data_loaded = settings.get('data_loaded', False)
+        st.session_state.api_key_entered = settings.get('api_key_entered', False)
+        st.session_state.auto_loaded = settings.get('auto_loaded', False)
+        st.session_state.api_key = settings.get('api_key', None)
+        st.session_state.loaded_data_file = settings.get('loaded_data_file', None)
+        st.session_state.chat_sessions = {session['id']: session for session in store.list_sessions()}
+        if st.session_state.current_session_id in st.session_state.chat_sessions:
+            st.session_state.chat_history = store.load_messages(st.session_state.current_session_id)
+        
+        st.session_state.session_restored = True
+        return True
     except Exception as e:
         st.error(f"Error loading session data: {str(e)}")
     
@@ -107,11 +118,13 @@ def load_session_data():
 def create_new_chat_session():
     """Create a new chat session"""
     session_id = str(uuid.uuid4())
+    created_at = datetime.now().isoformat()
+    st.session_state.chat_store.create_session(session_id, created_at)
     st.session_state.current_session_id = session_id
     st.session_state.chat_sessions[session_id] = {
         'id': session_id,
-        'created_at': datetime.now().isoformat(),
-        'messages': []
+        'created_at': created_at,
+        'message_count': 0
     }
     st.session_state.chat_history = []
     save_session_data()
@@ -125,18 +138,23 @@ def save_message_to_session(role, content, data=None, visualization=None):
             'timestamp': datetime.now().isoformat()
         }
         
-        if data is not None:
-            message_data['data'] = data
-        
-        if visualization is not None:
-            message_data['visualization'] = visualization
+        # Payloads are written once to the content-addressed blob store; the message keeps their hashes
+        try:
+            if data is not None:
+                message_data['data_blob'] = st.session_state.blob_store.put_frame(data)
+            
+            if visualization is not None:
+                figure_json = visualization if isinstance(visualization, str) else visualization.to_json()
+                message_data['visualization_blob'] = st.session_state.blob_store.put_figure(figure_json)
+        except Exception as e:
+            st.warning(f"⚠️ Could not store message attachments: {str(e)}")
         
-        st.session_state.chat_sessions[st.session_state.current_session_id]['messages'].append(message_data)
+        # One appended row per message, whatever the size of the history
+        st.session_state.chat_store.append_message(st.session_state.current_session_id, message_data)
+        st.session_state.chat_sessions[st.session_state.current_session_id]['message_count'] += 1
         
         # Also add to chat_history for display
         st.session_state.chat_history.append(message_data)
-        
-        save_session_data()
 
 def auto_load_app():
     """Auto-load API key and data if available"""
@@ -160,7 +178,7 @@ def auto_load_app():
     # If API key found, initialize chatbot
     if api_key and not st.session_state.chatbot:
         try:
-            st.session_state.chatbot = FetiiChatbot(api_key)
+            st.session_state.chatbot = FetiiChatbot(api_key, sink=StreamlitSink())
             st.session_state.api_key = api_key
             st.session_state.api_key_entered = True
             st.success("✅ API Key loaded automatically!")
@@ -254,8 +272,33 @@ def is_deployed_environment():
     ]
     return any(deployed_indicators)
 
+def export_url(fmt, **params):
+    """Streaming export URL on the API server named by FETII_API_URL, or None to build exports in the app.
+
+    Streamlit keeps a download button's whole file in memory; the API server sends it from disk in blocks."""
+    api_url = os.getenv("FETII_API_URL")
+    if not api_url:
+        return None
+    params = {key: value for key, value in params.items() if value is not None}
+    return f"{api_url.rstrip('/')}/export/{fmt}" + (f"?{urlencode(params)}" if params else "")
+
+def load_data_from_store(store_dir):
+    """Map a shared trip store instead of parsing Excel (multi-process deployments)"""
+    processor = st.session_state.chatbot.data_processor if st.session_state.chatbot else FetiiDataProcessor(StreamlitSink())
+    if not processor.load_store(store_dir):
+        return False
+    st.session_state.trips_data = processor.trips_data
+    st.session_state.users_data = processor.users_data
+    return True
+
 def load_data_directly(file_path):
     """Load data directly from file and process it"""
+    # Processes started with FETII_TRIP_STORE share one pre-built store instead of each parsing the file
+    store_dir = os.getenv("FETII_TRIP_STORE")
+    if store_dir and read_manifest(store_dir) is not None:
+        st.info(f"🗂️ Mapping shared trip store: {store_dir}")
+        return load_data_from_store(store_dir)
+    
     try:
         # Read the Excel file
         import pandas as pd
@@ -391,7 +434,7 @@ def render_sidebar():
             if api_key:
                 st.session_state.api_key = api_key
                 try:
-                    st.session_state.chatbot = FetiiChatbot(api_key)
+                    st.session_state.chatbot = FetiiChatbot(api_key, sink=StreamlitSink())
                     st.session_state.api_key_entered = True
                     save_session_data()
                     st.success("✅ API Key configured successfully!")
@@ -536,7 +579,7 @@ def render_sidebar():
         if st.session_state.current_session_id:
             session_info = st.session_state.chat_sessions.get(st.session_state.current_session_id, {})
             created_at = session_info.get('created_at', 'Unknown')
-            message_count = len(session_info.get('messages', []))
+            message_count = session_info.get('message_count', 0)
             
             st.info(f"**Current Session:**\n📅 Created: {created_at[:10] if created_at != 'Unknown' else 'Unknown'}\n Messages: {message_count}")
         
@@ -553,7 +596,7 @@ def render_sidebar():
             
             for session_id, session_data in sorted_sessions[:5]:  # Show last 5 sessions
                 created_at = session_data.get('created_at', 'Unknown')
-                message_count = len(session_data.get('messages', []))
+                message_count = session_data.get('message_count', 0)
                 is_current = session_id == st.session_state.current_session_id
                 
                 # Create a button for each session
@@ -565,7 +608,7 @@ def render_sidebar():
                 if st.button(button_text, key=f"session_{session_id}", help=f"Switch to session from {created_at[:10] if created_at != 'Unknown' else 'Unknown'}"):
                     # Switch to this session
                     st.session_state.current_session_id = session_id
-                    st.session_state.chat_history = session_data.get('messages', [])
+                    st.session_state.chat_history = st.session_state.chat_store.load_messages(session_id)
                     save_session_data()
                     st.rerun()
         
@@ -575,9 +618,9 @@ def render_sidebar():
         with col1:
             if st.button("🗑️ Clear Chat", help="Clear current chat session"):
                 if st.session_state.current_session_id and st.session_state.current_session_id in st.session_state.chat_sessions:
-                    st.session_state.chat_sessions[st.session_state.current_session_id]['messages'] = []
+                    st.session_state.chat_store.clear_session(st.session_state.current_session_id)
+                    st.session_state.chat_sessions[st.session_state.current_session_id]['message_count'] = 0
                 st.session_state.chat_history = []
-                save_session_data()
                 st.rerun()
         
         with col2:
@@ -615,7 +658,8 @@ def chat_interface():
                         
                         # Save messages to current session
                         save_message_to_session("user", question)
-                        save_message_to_session("assistant", response["answer"])
+                        save_message_to_session("assistant", response["answer"],
+                                                data=response.get("data"), visualization=response.get("visualization"))
                         
                         # Rerun to show the new message
                         st.rerun()
@@ -644,14 +688,22 @@ def chat_interface():
                     else:
                         message(content, is_user=False, key=f"assistant_{i}")
                         
+                        # Data and charts are blob-store hashes; older messages may hold them inline
+                        blob_store = st.session_state.blob_store
+                        data = blob_store.get_frame(msg["data_blob"]) if msg.get("data_blob") else msg.get("data")
+                        visualization = blob_store.get_figure(msg["visualization_blob"]) if msg.get("visualization_blob") else msg.get("visualization")
+                        
                         # Show data if available (for assistant messages)
-                        if "data" in msg and msg["data"] is not None and hasattr(msg["data"], 'empty') and not msg["data"].empty:
+                        if data is not None and hasattr(data, 'empty') and not data.empty:
                             st.markdown("### 📊 Data:")
-                            st.dataframe(msg["data"].head(10))
+                            st.dataframe(data.head(10))
                         
-                        if "visualization" in msg and msg["visualization"]:
+                        if visualization:
                             st.markdown("### 📈 Visualization:")
-                            st.plotly_chart(msg["visualization"], use_container_width=True)
+                            # Charts are stored as figure JSON; older sessions may hold figure objects
+                            if isinstance(visualization, str):
+                                visualization = json.loads(visualization)
+                            st.plotly_chart(visualization, use_container_width=True)
                 elif isinstance(msg, str):
                     # Handle legacy string format - assume it's a user message
                     import re
@@ -692,7 +744,8 @@ def chat_interface():
                 
                 # Save messages to current session
                 save_message_to_session("user", user_input)
-                save_message_to_session("assistant", response["answer"])
+                save_message_to_session("assistant", response["answer"],
+                                        data=response.get("data"), visualization=response.get("visualization"))
                 
                 # Rerun to show the new message
                 st.rerun()
@@ -712,10 +765,17 @@ def analytics_interface():
         return
     
     data_processor = st.session_state.chatbot.data_processor
+    # Everything below comes from one snapshot per data version, so reruns only re-render
+    snapshot = data_processor.get_analytics_snapshot()
+    figures = snapshot["figures"]
+    has_trips = data_processor.trips_data is not None and not data_processor.trips_data.empty
+    
+    def show_figure(name):
+        st.plotly_chart(json.loads(figures[name]), use_container_width=True)
     
     # Key metrics
     st.subheader("📊 Key Metrics")
-    summary = data_processor.get_data_summary()
+    summary = snapshot["summary"]
     
     col1, col2, col3, col4 = st.columns(4)
     
@@ -735,169 +795,93 @@ def analytics_interface():
     st.subheader("📊 Data Visualizations")
     
     # Popular destinations
-    if data_processor.trips_data is not None and not data_processor.trips_data.empty:
+    if has_trips:
         st.subheader("🏆 Top Destinations")
-        # Use the correct column name
         if 'dropoff_location' in data_processor.trips_data.columns:
-            top_destinations = data_processor.trips_data['dropoff_location'].value_counts().head(10)
-            
-            if not top_destinations.empty:
-                fig = px.bar(
-                    x=top_destinations.values,
-                    y=top_destinations.index,
-                    orientation='h',
-                    title="Top 10 Destinations",
-                    labels={'x': 'Number of Trips', 'y': 'Destination'}
-                )
-                fig.update_layout(height=500)
-                st.plotly_chart(fig, use_container_width=True)
+            if "top_destinations" in figures:
+                show_figure("top_destinations")
         else:
             st.warning("Dropoff location data not available")
     
     # Group size distribution
-    if data_processor.trips_data is not None and not data_processor.trips_data.empty:
+    if has_trips:
         st.subheader("👥 Group Size Distribution")
-        # Use the correct column name
         if 'group_size' in data_processor.trips_data.columns:
-            group_size_dist = data_processor.trips_data['group_size'].value_counts().sort_index()
-            
-            if not group_size_dist.empty:
-                fig = px.bar(
-                    x=group_size_dist.index,
-                    y=group_size_dist.values,
-                    title="Group Size Distribution",
-                    labels={'x': 'Group Size', 'y': 'Number of Trips'}
-                )
-                st.plotly_chart(fig, use_container_width=True)
+            if "group_sizes" in figures:
+                show_figure("group_sizes")
         else:
             st.warning("Group size data not available")
     
     # Time-based analysis
-    if data_processor.trips_data is not None and not data_processor.trips_data.empty:
+    if has_trips:
         st.subheader("⏰ Time-based Analysis")
         
-        # Hourly distribution
-        if 'pickup_time' in data_processor.trips_data.columns:
-            # Extract hour from pickup_time
-            data_processor.trips_data['hour'] = pd.to_datetime(data_processor.trips_data['pickup_time']).dt.hour
-            hourly_dist = data_processor.trips_data['hour'].value_counts().sort_index()
-            
-            if not hourly_dist.empty:
-                fig = px.bar(
-                    x=hourly_dist.index,
-                    y=hourly_dist.values,
-                    title="Trips by Hour of Day",
-                    labels={'x': 'Hour', 'y': 'Number of Trips'}
-                )
-                st.plotly_chart(fig, use_container_width=True)
+        if "hourly" in figures:
+            show_figure("hourly")
         
-        # Day of week analysis
-        if 'pickup_time' in data_processor.trips_data.columns:
-            data_processor.trips_data['day_of_week'] = pd.to_datetime(data_processor.trips_data['pickup_time']).dt.day_name()
-            daily_dist = data_processor.trips_data['day_of_week'].value_counts()
-            
-            if not daily_dist.empty:
-                fig = px.bar(
-                    x=daily_dist.index,
-                    y=daily_dist.values,
-                    title="Trips by Day of Week",
-                    labels={'x': 'Day', 'y': 'Number of Trips'}
-                )
-                st.plotly_chart(fig, use_container_width=True)
+        if "daily" in figures:
+            show_figure("daily")
     
     # Age group analysis
     if data_processor.users_data is not None and not data_processor.users_data.empty:
         st.subheader("👥 Age Group Analysis")
         
-        if 'age' in data_processor.users_data.columns:
-            # Create age groups
-            data_processor.users_data['age_group'] = pd.cut(
-                data_processor.users_data['age'], 
-                bins=[0, 18, 25, 35, 45, 55, 100], 
-                labels=['Under 18', '18-24', '25-34', '35-44', '45-54', '55+']
-            )
-            
-            age_dist = data_processor.users_data['age_group'].value_counts()
-            
-            if not age_dist.empty:
-                fig = px.pie(
-                    values=age_dist.values,
-                    names=age_dist.index,
-                    title="Age Group Distribution"
-                )
-                st.plotly_chart(fig, use_container_width=True)
+        if "age_groups" in figures:
+            show_figure("age_groups")
     
     # Geographic analysis
-    if data_processor.trips_data is not None and not data_processor.trips_data.empty:
+    if has_trips:
         st.subheader("🗺️ Geographic Analysis")
         
-        if 'pickup_latitude' in data_processor.trips_data.columns and 'pickup_longitude' in data_processor.trips_data.columns:
-            # Create a map of pickup locations
-            fig = px.scatter_mapbox(
-                data_processor.trips_data,
-                lat='pickup_latitude',
-                lon='pickup_longitude',
-                color='group_size',
-                size='group_size',
-                hover_data=['pickup_location', 'dropoff_location'],
-                title="Pickup Locations by Group Size",
-                mapbox_style="open-street-map"
-            )
-            fig.update_layout(height=500)
-            st.plotly_chart(fig, use_container_width=True)
+        # Trips are binned into grid cells server-side, so the map payload is bounded by cell count
+        layers = [name for name, columns in MAP_LAYERS.items() if set(columns) <= set(data_processor.trips_data.columns)]
+        if layers:
+            col1, col2 = st.columns(2)
+            with col1:
+                layer = st.selectbox("Map Layer", layers, format_func=lambda name: f"{name.title()}s")
+            with col2:
+                detail = st.selectbox("Map Detail", list(MAP_DETAIL_LEVELS))
+            map_figure = data_processor.get_map_figure(layer, MAP_DETAIL_LEVELS[detail])
+            if map_figure is not None:
+                st.plotly_chart(json.loads(map_figure), use_container_width=True)
     
     # Revenue analysis (if available)
-    if data_processor.trips_data is not None and not data_processor.trips_data.empty:
+    if has_trips:
         st.subheader("💰 Revenue Analysis")
         
-        # Calculate estimated revenue based on group size
-        if 'group_size' in data_processor.trips_data.columns:
-            # Assume $5 per person as base fare
-            data_processor.trips_data['estimated_revenue'] = data_processor.trips_data['group_size'] * 5
-            
-            total_revenue = data_processor.trips_data['estimated_revenue'].sum()
-            avg_revenue_per_trip = data_processor.trips_data['estimated_revenue'].mean()
-            
+        if "total_revenue" in snapshot["metrics"]:
             col1, col2 = st.columns(2)
             with col1:
-                st.metric("Total Estimated Revenue", f"${total_revenue:,.2f}")
+                st.metric("Total Estimated Revenue", f"${snapshot['metrics']['total_revenue']:,.2f}")
             with col2:
-                st.metric("Average Revenue per Trip", f"${avg_revenue_per_trip:.2f}")
+                st.metric("Average Revenue per Trip", f"${snapshot['metrics']['avg_revenue_per_trip']:.2f}")
     
     # Advanced analytics
     st.subheader("🔍 Advanced Analytics")
     
     # Correlation analysis
-    if data_processor.trips_data is not None and not data_processor.trips_data.empty:
+    if has_trips:
         st.subheader("📊 Correlation Analysis")
         
-        numeric_cols = data_processor.trips_data.select_dtypes(include=[np.number]).columns
-        if len(numeric_cols) > 1:
-            corr_matrix = data_processor.trips_data[numeric_cols].corr()
-            
-            fig = px.imshow(
-                corr_matrix,
-                title="Correlation Matrix",
-                color_continuous_scale="RdBu"
-            )
-            st.plotly_chart(fig, use_container_width=True)
+        if "correlation" in figures:
+            show_figure("correlation")
     
     # Data quality metrics
     st.subheader("🔍 Data Quality Metrics")
     
-    if data_processor.trips_data is not None and not data_processor.trips_data.empty:
+    if has_trips:
+        quality = data_processor.get_quality_report()["trips"]
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            missing_data = data_processor.trips_data.isnull().sum().sum()
+            missing_data = quality["total_nulls"]
             st.metric("Missing Values", missing_data)
         
         with col2:
-            duplicate_trips = data_processor.trips_data.duplicated().sum()
-            st.metric("Duplicate Trips", duplicate_trips)
+            st.metric("Duplicate Trips", quality["duplicate_rows"])
         
         with col3:
-            data_quality_score = ((len(data_processor.trips_data) - missing_data) / len(data_processor.trips_data)) * 100
+            data_quality_score = ((quality["rows"] - missing_data) / quality["rows"]) * 100
             st.metric("Data Quality Score", f"{data_quality_score:.1f}%")
 
 def data_explorer_interface():
@@ -924,18 +908,20 @@ def data_explorer_interface():
         st.write(f"**Shape:** {data_processor.trips_data.shape}")
         st.write(f"**Columns:** {list(data_processor.trips_data.columns)}")
         
+        profile = data_processor.get_quality_report()["trips"]
+        
         # Data types
         st.write("**Data Types:**")
-        st.dataframe(data_processor.trips_data.dtypes.to_frame('Data Type'))
+        st.dataframe(profile["dtypes"].to_frame('Data Type'))
         
         # Missing values
         st.write("**Missing Values:**")
-        missing_values = data_processor.trips_data.isnull().sum()
+        missing_values = profile["null_counts"]
         st.dataframe(missing_values[missing_values > 0].to_frame('Missing Count'))
         
         # Basic statistics
         st.write("**Basic Statistics:**")
-        st.dataframe(data_processor.trips_data.describe())
+        st.dataframe(profile["describe"])
     
     if data_processor.users_data is not None and not data_processor.users_data.empty:
         st.write("**Users Data:**")
@@ -944,24 +930,28 @@ def data_explorer_interface():
         st.write(f"**Shape:** {data_processor.users_data.shape}")
         st.write(f"**Columns:** {list(data_processor.users_data.columns)}")
         
+        profile = data_processor.get_quality_report()["users"]
+        
         # Data types
         st.write("**Data Types:**")
-        st.dataframe(data_processor.users_data.dtypes.to_frame('Data Type'))
+        st.dataframe(profile["dtypes"].to_frame('Data Type'))
         
         # Missing values
         st.write("**Missing Values:**")
-        missing_values = data_processor.users_data.isnull().sum()
+        missing_values = profile["null_counts"]
         st.dataframe(missing_values[missing_values > 0].to_frame('Missing Count'))
         
         # Basic statistics
         st.write("**Basic Statistics:**")
-        st.dataframe(data_processor.users_data.describe())
+        st.dataframe(profile["describe"])
     
     # Interactive filters
     st.subheader("🔍 Interactive Filters")
     
     if data_processor.trips_data is not None and not data_processor.trips_data.empty:
         col1, col2 = st.columns(2)
+        group_size_range = None
+        date_range = ()
         
         with col1:
             # Group size filter
@@ -975,20 +965,13 @@ def data_explorer_interface():
                     max_value=max_group_size,
                     value=(min_group_size, max_group_size)
                 )
-                
-                filtered_data = data_processor.trips_data[
-                    (data_processor.trips_data['group_size'] >= group_size_range[0]) &
-                    (data_processor.trips_data['group_size'] <= group_size_range[1])
-                ]
-            else:
-                filtered_data = data_processor.trips_data
         
         with col2:
             # Date range filter
-            if 'pickup_time' in data_processor.trips_data.columns:
-                data_processor.trips_data['pickup_time'] = pd.to_datetime(data_processor.trips_data['pickup_time'])
-                min_date = data_processor.trips_data['pickup_time'].min().date()
-                max_date = data_processor.trips_data['pickup_time'].max().date()
+            time_bounds = data_processor.get_time_bounds()
+            if time_bounds:
+                min_date = time_bounds[0].date()
+                max_date = time_bounds[1].date()
                 
                 date_range = st.date_input(
                     "Date Range",
@@ -996,57 +979,80 @@ def data_explorer_interface():
                     min_value=min_date,
                     max_value=max_date
                 )
-                
-                if len(date_range) == 2:
-                    filtered_data = filtered_data[
-                        (filtered_data['pickup_time'].dt.date >= date_range[0]) &
-                        (filtered_data['pickup_time'].dt.date <= date_range[1])
-                    ]
+        
+        # Filters and sorting run as a row-id query (binary-searched date window, filters over that slice);
+        # only the visible page of rows is materialized and sent to the browser
+        query = {}
+        if len(date_range) == 2:
+            query["start"] = pd.Timestamp(date_range[0])
+            query["end"] = pd.Timestamp(date_range[1]) + pd.Timedelta(days=1)
+        if group_size_range:
+            query["filters"] = {'group_size': tuple(group_size_range)}
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sort_by = st.selectbox("Sort By", ["(none)"] + list(data_processor.trips_data.columns))
+        with col2:
+            descending = st.checkbox("Descending")
+        with col3:
+            page_size = st.selectbox("Rows per Page", [20, 50, 100, 500])
+        if sort_by != "(none)":
+            query["sort_by"] = sort_by
+            query["ascending"] = not descending
+        
+        total_rows = len(data_processor.query_trip_rows(**query))
+        page_count = max(1, -(-total_rows // page_size))
+        page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+        result = data_processor.get_trip_page(page=page_number - 1, page_size=page_size, **query)
         
         # Show filtered data
-        st.write(f"**Filtered Data ({len(filtered_data)} rows):**")
-        st.dataframe(filtered_data.head(20))
+        st.write(f"**Filtered Data ({result['total']} rows, page {result['page'] + 1} of {result['pages']}):**")
+        st.dataframe(result["rows"])
         
         # Download filtered data
-        if st.button("📥 Download Filtered Data"):
-            csv = filtered_data.to_csv(index=False)
+        filtered_url = export_url(
+            "csv",
+            start=query["start"].date().isoformat() if "start" in query else None,
+            end=query["end"].date().isoformat() if "end" in query else None,
+            min_group_size=query["filters"]["group_size"][0] if "filters" in query else None,
+            max_group_size=query["filters"]["group_size"][1] if "filters" in query else None,
+            sort_by=query.get("sort_by"),
+            descending=int(not query["ascending"]) if "sort_by" in query else None
+        )
+        if filtered_url:
+            st.link_button("📥 Download Filtered Data", filtered_url)
+        elif st.button("📥 Download Filtered Data"):
+            with export_to_file("csv", {"Trips": data_processor.trips_data},
+                                rows=data_processor.query_trip_rows(**query)) as export:
+                csv = export.read()
             st.download_button(
                 label="Download CSV",
                 data=csv,
-                file_name="filtered_fetii_data.csv",
-                mime="text/csv"
+                file_name=export_file_name("filtered_fetii_data", "csv"),
+                mime=export_mime("csv")
             )
     
     # Data quality analysis
     st.subheader("🔍 Data Quality Analysis")
     
     if data_processor.trips_data is not None and not data_processor.trips_data.empty:
+        quality = data_processor.get_quality_report()["trips"]
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            # Completeness
-            completeness = (1 - data_processor.trips_data.isnull().sum().sum() / (len(data_processor.trips_data) * len(data_processor.trips_data.columns))) * 100
-            st.metric("Data Completeness", f"{completeness:.1f}%")
+            st.metric("Data Completeness", f"{quality['completeness']:.1f}%")
         
         with col2:
-            # Uniqueness
-            uniqueness = (1 - data_processor.trips_data.duplicated().sum() / len(data_processor.trips_data)) * 100
-            st.metric("Data Uniqueness", f"{uniqueness:.1f}%")
+            st.metric("Data Uniqueness", f"{quality['uniqueness']:.1f}%")
         
         with col3:
-            # Validity
-            # Check for valid coordinates
-            if 'pickup_latitude' in data_processor.trips_data.columns and 'pickup_longitude' in data_processor.trips_data.columns:
-                valid_coords = data_processor.trips_data[
-                    (data_processor.trips_data['pickup_latitude'].notna()) &
-                    (data_processor.trips_data['pickup_longitude'].notna()) &
-                    (data_processor.trips_data['pickup_latitude'].between(-90, 90)) &
-                    (data_processor.trips_data['pickup_longitude'].between(-180, 180))
-                ]
-                validity = len(valid_coords) / len(data_processor.trips_data) * 100
-            else:
-                validity = 100
-            st.metric("Data Validity", f"{validity:.1f}%")
+            # Share of trips with valid pickup coordinates
+            st.metric("Data Validity", f"{quality['validity']:.1f}%")
+        
+        outliers = {col: count for col, count in quality["outliers"].items() if count}
+        if outliers:
+            st.write("**Outliers (beyond 1.5 IQR):**")
+            st.dataframe(pd.Series(outliers).to_frame('Outlier Count'))
     
     # Advanced data exploration
     st.subheader("🔍 Advanced Data Exploration")
@@ -1055,31 +1061,30 @@ def data_explorer_interface():
         # Column analysis
         st.write("**Column Analysis:**")
         
-        for col in data_processor.trips_data.columns:
+        column_profiles = data_processor.get_quality_report()["trips"]["column_profiles"]
+        for col, profile in column_profiles.items():
             with st.expander(f"📊 {col}"):
-                col_data = data_processor.trips_data[col]
-                
-                if col_data.dtype in ['int64', 'float64']:
+                if profile["kind"] == "numeric":
                     # Numeric column
                     st.write(f"**Type:** Numeric")
-                    st.write(f"**Min:** {col_data.min()}")
-                    st.write(f"**Max:** {col_data.max()}")
-                    st.write(f"**Mean:** {col_data.mean():.2f}")
-                    st.write(f"**Median:** {col_data.median():.2f}")
-                    st.write(f"**Missing:** {col_data.isnull().sum()}")
+                    st.write(f"**Min:** {profile['min']}")
+                    st.write(f"**Max:** {profile['max']}")
+                    st.write(f"**Mean:** {profile['mean']:.2f}")
+                    st.write(f"**Median:** {profile['median']:.2f}")
+                    st.write(f"**Missing:** {profile['missing']}")
                     
                     # Histogram
-                    fig = px.histogram(col_data, title=f"Distribution of {col}")
+                    fig = px.histogram(data_processor.trips_data[col], title=f"Distribution of {col}")
                     st.plotly_chart(fig, use_container_width=True)
                 
-                elif col_data.dtype == 'object':
+                elif profile["kind"] == "categorical":
                     # Categorical column
                     st.write(f"**Type:** Categorical")
-                    st.write(f"**Unique values:** {col_data.nunique()}")
-                    st.write(f"**Missing:** {col_data.isnull().sum()}")
+                    st.write(f"**Unique values:** {profile['unique']}")
+                    st.write(f"**Missing:** {profile['missing']}")
                     
                     # Top values
-                    top_values = col_data.value_counts().head(10)
+                    top_values = profile["top_values"]
                     st.write("**Top 10 values:**")
                     st.dataframe(top_values.to_frame('Count'))
                     
@@ -1089,43 +1094,63 @@ def data_explorer_interface():
                 
                 else:
                     # Other types
-                    st.write(f"**Type:** {col_data.dtype}")
-                    st.write(f"**Unique values:** {col_data.nunique()}")
-                    st.write(f"**Missing:** {col_data.isnull().sum()}")
+                    st.write(f"**Type:** {profile['dtype']}")
+                    st.write(f"**Unique values:** {profile['unique']}")
+                    st.write(f"**Missing:** {profile['missing']}")
     
     # Data export options
     st.subheader("📤 Data Export Options")
     
     if data_processor.trips_data is not None and not data_processor.trips_data.empty:
-        col1, col2, col3 = st.columns(3)
+        # Exports are written to a temporary file in chunks. Streamlit holds the finished file in memory,
+        # so with FETII_API_URL set the buttons link to the API server, which streams it from disk instead.
+        compress = st.checkbox("Compress exports (gzip CSV, zstd Parquet)")
+        compress_param = 1 if compress else None
+        sheets = {"Trips": data_processor.trips_data}
+        if data_processor.users_data is not None and not data_processor.users_data.empty:
+            sheets["Users"] = data_processor.users_data
+        col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            if st.button("📥 Download Trips Data (CSV)"):
-                csv = data_processor.trips_data.to_csv(index=False)
+            if export_url("csv"):
+                st.link_button("📥 Download Trips Data (CSV)", export_url("csv", compress=compress_param))
+            elif st.button("📥 Download Trips Data (CSV)"):
+                with export_to_file("csv", sheets, compress=compress) as export:
+                    data = export.read()
                 st.download_button(
                     label="Download CSV",
-                    data=csv,
-                    file_name="fetii_trips_data.csv",
-                    mime="text/csv"
+                    data=data,
+                    file_name=export_file_name("fetii_trips_data", "csv", compress),
+                    mime=export_mime("csv", compress)
                 )
         
         with col2:
-            if st.button("📊 Download Trips Data (Excel)"):
-                # Create Excel file
-                output = io.BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    data_processor.trips_data.to_excel(writer, sheet_name='Trips', index=False)
-                    if data_processor.users_data is not None and not data_processor.users_data.empty:
-                        data_processor.users_data.to_excel(writer, sheet_name='Users', index=False)
-                
+            if export_url("xlsx"):
+                st.link_button("📊 Download Trips Data (Excel)", export_url("xlsx"))
+            elif st.button("📊 Download Trips Data (Excel)"):
+                with export_to_file("xlsx", sheets) as export:
+                    data = export.read()
                 st.download_button(
                     label="Download Excel",
-                    data=output.getvalue(),
-                    file_name="fetii_data.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                    data=data,
+                    file_name=export_file_name("fetii_data", "xlsx"),
+                    mime=export_mime("xlsx")
                 )
         
         with col3:
+            if export_url("parquet"):
+                st.link_button("🗄️ Download Trips Data (Parquet)", export_url("parquet", compress=compress_param))
+            elif parquet_available() and st.button("🗄️ Download Trips Data (Parquet)"):
+                with export_to_file("parquet", sheets, compress=compress) as export:
+                    data = export.read()
+                st.download_button(
+                    label="Download Parquet",
+                    data=data,
+                    file_name=export_file_name("fetii_trips_data", "parquet", compress),
+                    mime=export_mime("parquet", compress)
+                )
+        
+        with col4:
             if st.button("📋 Copy Data to Clipboard"):
                 st.code(data_processor.trips_data.head(10).to_string(), language="text")
                 st.success("Data copied to clipboard!")
@@ -1181,7 +1206,7 @@ def generate_executive_summary(data_processor):
         avg_group_size = data_processor.trips_data['group_size'].mean() if 'group_size' in data_processor.trips_data.columns else 0
         
         # Top destinations
-        top_destinations = data_processor.trips_data['dropoff_location'].value_counts().head(5) if 'dropoff_location' in data_processor.trips_data.columns else []
+        top_destinations = value_counts(data_processor.trips_data['dropoff_location']).head(5) if 'dropoff_location' in data_processor.trips_data.columns else []
         
         # Time analysis
         if 'pickup_time' in data_processor.trips_data.columns:
@@ -1264,30 +1289,31 @@ def generate_performance_report(data_processor):
             else:
                 st.metric("Avg Group Size", "N/A")
         
+        # Day-grain rollup (built once per data load) instead of regrouping the raw trips
+        rollups = data_processor.get_rollups()
+        daily_rollup = rollups.table("day") if rollups is not None else None
+        
         with col3:
-            if 'pickup_time' in data_processor.trips_data.columns:
-                data_processor.trips_data['pickup_time'] = pd.to_datetime(data_processor.trips_data['pickup_time'])
-                unique_days = data_processor.trips_data['pickup_time'].dt.date.nunique()
-                st.metric("Active Days", unique_days)
+            if daily_rollup is not None and not daily_rollup.empty:
+                st.metric("Active Days", len(daily_rollup))
             else:
                 st.metric("Active Days", "N/A")
         
         with col4:
             if 'dropoff_location' in data_processor.trips_data.columns:
-                unique_destinations = data_processor.trips_data['dropoff_location'].nunique()
-                st.metric("Unique Destinations", unique_destinations)
+                st.metric("Unique Destinations", data_processor.count_distinct("destinations"))
             else:
                 st.metric("Unique Destinations", "N/A")
         
         # Performance trends
         st.subheader("📈 Performance Trends")
         
-        if 'pickup_time' in data_processor.trips_data.columns:
+        if daily_rollup is not None and not daily_rollup.empty:
             # Daily trends
-            daily_trips = data_processor.trips_data.groupby(data_processor.trips_data['pickup_time'].dt.date).size()
+            daily_trips = daily_rollup['trips']
             
             fig = px.line(
-                x=daily_trips.index,
+                x=daily_trips.index.date,
                 y=daily_trips.values,
                 title="Daily Trip Trends",
                 labels={'x': 'Date', 'y': 'Number of Trips'}
@@ -1344,10 +1370,8 @@ def generate_detailed_analysis(data_processor):
         # Correlation analysis
         st.subheader("📊 Correlation Analysis")
         
-        numeric_cols = data_processor.trips_data.select_dtypes(include=[np.number]).columns
-        if len(numeric_cols) > 1:
-            corr_matrix = data_processor.trips_data[numeric_cols].corr()
-            
+        corr_matrix = data_processor.get_quality_report()["trips"]["correlation"]
+        if corr_matrix is not None:
             fig = px.imshow(
                 corr_matrix,
                 title="Correlation Matrix",